@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Load test of the provider API with FastAPI's test client.
+
+Builds an artifact directory with --live runs in progress and a run index holding --runs finished
+runs of --hosts hosts, then has --clients threads poll the endpoints a dashboard uses for
+--seconds, half of them sending back the ETag they received. Prints the request rate, latency
+percentiles, 304 and cache hit ratios. Exits non-zero if walking the pages of a run, of the runs
+or of a host history misses or repeats an item.
+
+    python benchmarks/api_load.py --runs 200 --hosts 2000 --clients 8 --seconds 10
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+from fastapi.testclient import TestClient
+
+from airflow_ansible_provider.api import create_app
+from airflow_ansible_provider.utils.progress import write_progress
+from airflow_ansible_provider.utils.retention import IN_PROGRESS_MARKER, mark
+from airflow_ansible_provider.utils.run_index import RunIndex
+
+
+def build(artifact_dir: str, runs: int, hosts: int, live: int) -> tuple[list[str], list[str]]:
+    index = RunIndex(os.path.join(artifact_dir, "run_index.sqlite"), batch_size=10000)
+    idents = [str(uuid.UUID(int=i + 1)) for i in range(runs)]
+    host_names = [f"host-{h:05d}.example.com" for h in range(hosts)]
+    now = time.time()
+    for r, ident in enumerate(idents):
+        for h, host in enumerate(host_names):
+            failed = (h + r) % 97 == 0
+            index.add(
+                {
+                    "runner_ident": ident,
+                    "event": "runner_on_failed" if failed else "runner_on_ok",
+                    "event_data": {
+                        "host": host,
+                        "task": "upgrade packages",
+                        "task_action": "ansible.builtin.apt",
+                        "duration": 1.5,
+                        "res": {"msg": "Failed to lock apt"} if failed else {"changed": h % 10 == 0},
+                    },
+                }
+            )
+        index.flush()
+        index.record_run(
+            {
+                "ident": ident,
+                "dag_id": f"dag_{r % 5}",
+                "task_id": "upgrade",
+                "run_id": f"scheduled__{r}",
+                "playbook": "site.yml",
+                "status": "successful",
+                "rc": 0,
+                "started": now - 600 + r,
+                "finished": now - 300 + r,
+                "hosts": hosts,
+            }
+        )
+    for i in range(live):
+        run_dir = os.path.join(artifact_dir, str(uuid.uuid4()))
+        os.makedirs(run_dir)
+        mark(run_dir, IN_PROGRESS_MARKER)
+        write_progress(run_dir, {"hosts_done": i * 10, "total_hosts": hosts, "current_task": "upgrade"})
+    return idents, host_names
+
+
+def walk(client: TestClient, url: str, limit: int, key) -> tuple[int, int]:
+    """Number of items and of distinct items over every page of ``url``"""
+    seen, total, cursor = set(), 0, None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        page = client.get(url, params=params).json()
+        total += len(page["items"])
+        seen.update(key(item) for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return total, len(seen)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--hosts", type=int, default=2000)
+    parser.add_argument("--live", type=int, default=20)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--cache-ttl", type=float, default=2.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as artifact_dir:
+        start = time.perf_counter()
+        idents, host_names = build(artifact_dir, args.runs, args.hosts, args.live)
+        build_seconds = time.perf_counter() - start
+        app = create_app(
+            artifact_dir,
+            os.path.join(artifact_dir, "run_index.sqlite"),
+            cache_ttl=args.cache_ttl,
+            require_auth=False,
+        )
+        client = TestClient(app)
+
+        checks = {
+            "run_hosts": (
+                walk(client, f"/runs/{idents[0]}/hosts", 333, lambda item: item["id"]),
+                args.hosts,
+            ),
+            "runs": (walk(client, "/runs", 37, lambda item: item["ident"]), args.runs),
+            "host_history": (
+                walk(client, f"/hosts/{host_names[0]}/history", 17, lambda item: item["id"]),
+                args.runs,
+            ),
+        }
+        failures = [
+            name for name, ((total, distinct), expected) in checks.items()
+            if not total == distinct == expected
+        ]
+
+        urls = [
+            "/runs/live",
+            "/runs?limit=50",
+            f"/runs/{idents[-1]}",
+            f"/runs/{idents[-1]}/hosts?limit=500",
+            f"/hosts/{host_names[1]}/history?limit=50",
+            f"/hosts/{host_names[1]}/last_failure",
+        ]
+        latencies: list[float] = []
+        statuses: dict[int, int] = {}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + args.seconds
+
+        def poll(conditional: bool) -> None:
+            etags: dict[str, str] = {}
+            own_latencies, own_statuses = [], {}
+            i = 0
+            while time.perf_counter() < deadline:
+                url = urls[i % len(urls)]
+                i += 1
+                headers = {"If-None-Match": etags[url]} if conditional and url in etags else {}
+                t = time.perf_counter()
+                response = client.get(url, headers=headers)
+                own_latencies.append(time.perf_counter() - t)
+                own_statuses[response.status_code] = own_statuses.get(response.status_code, 0) + 1
+                if "etag" in response.headers:
+                    etags[url] = response.headers["etag"]
+            with lock:
+                latencies.extend(own_latencies)
+                for code, count in own_statuses.items():
+                    statuses[code] = statuses.get(code, 0) + count
+
+        threads = [
+            threading.Thread(target=poll, args=(n % 2 == 0,)) for n in range(args.clients)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        cache = app.state.cache.stats()
+        report = {
+            "build_seconds": round(build_seconds, 1),
+            "requests": len(latencies),
+            "requests_per_second": round(len(latencies) / elapsed),
+            "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+            "p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 2),
+            "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+            "statuses": statuses,
+            "not_modified_ratio": round(statuses.get(304, 0) / len(latencies), 3),
+            "cache_hit_ratio": round(cache["hits"] / max(cache["hits"] + cache["misses"], 1), 3),
+            "pagination": {name: list(result[0]) + [result[1]] for name, result in checks.items()},
+            "pagination_failures": failures,
+        }
+        print(json.dumps(report, indent=2))
+        if failures or set(statuses) - {200, 304}:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Startup cost of ansible-playbook, cold versus through the warm controller pool.
+
+Runs the same ansible-playbook command --runs times as a fresh process and through the client
+script of a zygote started by ensure_pool, and reports the mean and p95 wall time of both.
+The default command, ``--version``, goes through ansible's CLI, config and plugin setup; pass
+a real job after ``--`` to measure time to first task, e.g.
+
+    python benchmarks/controller_pool_startup.py --runs 20 -- -i localhost, -c local playbooks/fleet.yml
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+
+from airflow_ansible_provider.utils.controller_pool import ensure_pool, request_status
+
+
+def timed_runs(cmd: list[str], runs: int) -> dict:
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True
+        )
+        durations.append(time.perf_counter() - start)
+    durations.sort()
+    return {
+        "runs": runs,
+        "mean_seconds": round(statistics.mean(durations), 3),
+        "p95_seconds": round(durations[int(0.95 * (runs - 1))], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", 1)[0])
+    parser.add_argument("--binary", default=shutil.which("ansible-playbook"))
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("args", nargs="*", default=["--version"])
+    args = parser.parse_args()
+    pool_dir = tempfile.mkdtemp(prefix="controller-pool-bench-")
+    try:
+        start = time.perf_counter()
+        pooled = ensure_pool(args.binary, pool_dir=pool_dir, idle_timeout=60)
+        if pooled is None:
+            raise SystemExit("the zygote did not start, see the log in " + pool_dir)
+        client, status = pooled
+        report = {
+            "zygote_start_seconds": round(time.perf_counter() - start, 3),
+            "preload_seconds": status["preload_seconds"],
+            "preload_failed": status["preloaded"]["failed"],
+            "cold": timed_runs([args.binary] + args.args, args.runs),
+            "pooled": timed_runs([client] + args.args, args.runs),
+        }
+        report["saved_per_run_seconds"] = round(
+            report["cold"]["mean_seconds"] - report["pooled"]["mean_seconds"], 3
+        )
+        report["zygote"] = request_status(client.replace("-ansible-playbook", ".sock"))
+    finally:
+        shutil.rmtree(pool_dir, ignore_errors=True)
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Write throughput of the segmented event log.
+
+Feeds synthetic ansible-runner events (hosts x tasks) through SegmentedEventLog and, with
+--baseline, through one JSON file per event as ansible-runner's job_events would. Reports
+events/second, MB/second, files created and bytes on disk, plus the cost of seeking one host.
+
+    python benchmarks/event_log_throughput.py --hosts 10000 --tasks 50 --baseline
+"""
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+
+from airflow_ansible_provider.utils.event_log import EventLogReader, SegmentedEventLog
+
+
+def synthetic_events(hosts: int, tasks: int):
+    now = datetime.datetime.now().isoformat()
+    for t in range(tasks):
+        task_uuid = str(uuid.uuid4())
+        yield {
+            "uuid": str(uuid.uuid4()),
+            "event": "playbook_on_task_start",
+            "created": now,
+            "event_data": {"task": f"task {t}", "task_uuid": task_uuid},
+        }
+        for h in range(hosts):
+            yield {
+                "uuid": str(uuid.uuid4()),
+                "counter": t * hosts + h,
+                "event": "runner_on_ok",
+                "created": now,
+                "stdout": f"ok: [host{h:05d}]",
+                "event_data": {
+                    "host": f"host{h:05d}",
+                    "task": f"task {t}",
+                    "task_uuid": task_uuid,
+                    "duration": 0.25,
+                    "res": {"changed": False, "msg": "", "rc": 0},
+                },
+            }
+
+
+def du(path: str) -> tuple[int, int]:
+    files, size = 0, 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            files += 1
+            size += os.path.getsize(os.path.join(root, name))
+    return files, size
+
+
+def bench_event_log(args, workdir: str) -> dict:
+    directory = os.path.join(workdir, "event_log")
+    raw = 0
+    start = time.perf_counter()
+    with SegmentedEventLog(directory, block_events=args.block_events) as log:
+        for event in synthetic_events(args.hosts, args.tasks):
+            log.write(event)
+            raw += len(json.dumps(event)) + 1
+        count = log.seq
+    elapsed = time.perf_counter() - start
+    files, size = du(directory)
+    seek_start = time.perf_counter()
+    host_events = sum(1 for _ in EventLogReader(directory).events(host="host00042"))
+    return {
+        "events": count,
+        "seconds": round(elapsed, 3),
+        "events_per_second": round(count / elapsed),
+        "raw_mb_per_second": round(raw / elapsed / 2**20, 2),
+        "files": files,
+        "bytes_on_disk": size,
+        "compression_ratio": round(raw / max(size, 1), 2),
+        "seek_one_host_seconds": round(time.perf_counter() - seek_start, 3),
+        "seek_one_host_events": host_events,
+    }
+
+
+def bench_job_events(args, workdir: str) -> dict:
+    directory = os.path.join(workdir, "job_events")
+    os.makedirs(directory)
+    count = 0
+    start = time.perf_counter()
+    for event in synthetic_events(args.hosts, args.tasks):
+        with open(
+            os.path.join(directory, f"{count}-{event['uuid']}.json"), "w", encoding="utf-8"
+        ) as f:
+            json.dump(event, f)
+        count += 1
+    elapsed = time.perf_counter() - start
+    files, size = du(directory)
+    return {
+        "events": count,
+        "seconds": round(elapsed, 3),
+        "events_per_second": round(count / elapsed),
+        "files": files,
+        "bytes_on_disk": size,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", 1)[0])
+    parser.add_argument("--hosts", type=int, default=1000)
+    parser.add_argument("--tasks", type=int, default=50)
+    parser.add_argument("--block-events", type=int, default=256)
+    parser.add_argument(
+        "--baseline", action="store_true", help="also write one file per event"
+    )
+    args = parser.parse_args()
+    workdir = tempfile.mkdtemp(prefix="event-log-bench-")
+    try:
+        report = {"event_log": bench_event_log(args, workdir)}
+        if args.baseline:
+            report["job_events"] = bench_job_events(args, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+End-to-end scalability harness for AnsibleOperator.
+
+Starts a fleet of lightweight in-process paramiko SSH servers on loopback
+ports, writes a matching inventory, drives ``AnsibleOperator.pre_execute`` and
+``AnsibleOperator.execute`` with a representative playbook and reports
+hosts/second, controller CPU, RSS and the time spent in each provider phase.
+
+Everything runs on a single Linux box without network access: every fake host
+executes the commands it receives locally as the current user, and file
+transfers use ``ssh_transfer_method=piped`` so no SFTP server is needed.
+
+    python benchmarks/fleet_harness.py --hosts 200 --forks 50
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from getpass import getuser
+from types import SimpleNamespace
+
+import paramiko
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CONN_ID = "ansible_fleet_harness"
+
+
+class FakeHost(paramiko.ServerInterface):
+    """SSH server that accepts any login and runs exec requests locally."""
+
+    def check_auth_none(self, username):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_auth_publickey(self, username, key):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def get_allowed_auths(self, username):
+        return "none,publickey,password"
+
+    def check_channel_request(self, kind, chanid):
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_pty_request(self, *args, **kwargs):
+        return True
+
+    def check_channel_env_request(self, channel, name, value):
+        return True
+
+    def check_channel_exec_request(self, channel, command):
+        threading.Thread(
+            target=run_command, args=(channel, command), daemon=True
+        ).start()
+        return True
+
+
+def run_command(channel: paramiko.Channel, command: bytes):
+    """Run one exec request through /bin/sh and stream it over the channel"""
+    proc = subprocess.Popen(
+        ["/bin/sh", "-c", command.decode("utf-8", "replace")],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=os.path.expanduser("~"),
+    )
+
+    def pump_stdin():
+        try:
+            while True:
+                data = channel.recv(65536)
+                if not data:
+                    break
+                proc.stdin.write(data)
+                proc.stdin.flush()
+        except (OSError, EOFError):
+            pass
+        finally:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+
+    def pump_output(stream, send):
+        for chunk in iter(lambda: stream.read1(65536), b""):
+            send(chunk)
+
+    threads = [
+        threading.Thread(target=pump_stdin, daemon=True),
+        threading.Thread(
+            target=pump_output, args=(proc.stdout, channel.sendall), daemon=True
+        ),
+        threading.Thread(
+            target=pump_output,
+            args=(proc.stderr, channel.sendall_stderr),
+            daemon=True,
+        ),
+    ]
+    for t in threads:
+        t.start()
+    rc = proc.wait()
+    for t in threads[1:]:
+        t.join()
+    channel.send_exit_status(rc)
+    channel.shutdown_write()
+    channel.close()
+
+
+class FakeFleet:
+    """N fake SSH hosts, one loopback listener each"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.host_key = paramiko.RSAKey.generate(2048)
+        self.ports: list[int] = []
+        self._sockets: list[socket.socket] = []
+        self._transports: list[paramiko.Transport] = []
+        self._stop = threading.Event()
+
+    def start(self):
+        for _ in range(self.size):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind(("127.0.0.1", 0))
+            sock.listen(128)
+            sock.settimeout(0.5)
+            self._sockets.append(sock)
+            self.ports.append(sock.getsockname()[1])
+            threading.Thread(target=self._serve, args=(sock,), daemon=True).start()
+        return self
+
+    def _serve(self, sock: socket.socket):
+        while not self._stop.is_set():
+            try:
+                conn, _ = sock.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            transport = paramiko.Transport(conn)
+            transport.add_server_key(self.host_key)
+            transport.start_server(server=FakeHost())
+            self._transports.append(transport)
+
+    def stop(self):
+        self._stop.set()
+        for sock in self._sockets:
+            sock.close()
+        for transport in self._transports:
+            transport.close()
+
+    def inventory(self, workdir: str) -> dict:
+        """Inventory matching the running fleet"""
+        hosts = {}
+        for i, port in enumerate(self.ports):
+            hosts[f"host{i:05d}"] = {
+                "ansible_host": "127.0.0.1",
+                "ansible_port": port,
+                "ansible_python_interpreter": sys.executable,
+                "ansible_ssh_transfer_method": "piped",
+                "ansible_ssh_common_args": "-o StrictHostKeyChecking=no "
+                "-o UserKnownHostsFile=/dev/null",
+            }
+        return {"fleet": {"hosts": hosts, "vars": {"fleet_workdir": workdir}}}
+
+
+class TaskInstance:
+    """Just enough of a TaskInstance for AnsibleOperator"""
+
+    def __init__(self):
+        self.xcom = {}
+
+    def xcom_push(self, key, value):
+        self.xcom[key] = value
+
+
+def usage() -> dict:
+    me = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {
+        "cpu_self": me.ru_utime + me.ru_stime,
+        "cpu_children": children.ru_utime + children.ru_stime,
+        "max_rss_kb_self": me.ru_maxrss,
+        "max_rss_kb_children": children.ru_maxrss,
+    }
+
+
+def run(args) -> dict:
+    workdir = tempfile.mkdtemp(prefix="fleet-harness-")
+    project_dir = os.path.dirname(os.path.abspath(args.playbook))
+    artifact_dir = os.path.join(workdir, "artifacts")
+    fleet = FakeFleet(args.hosts).start()
+    try:
+        inventory_path = os.path.join(workdir, "fleet.json")
+        with open(inventory_path, "w", encoding="utf-8") as f:
+            json.dump(fleet.inventory(workdir), f)
+
+        key = io.StringIO()
+        paramiko.RSAKey.generate(2048).write_private_key(key)
+        os.environ[f"AIRFLOW_CONN_{CONN_ID.upper()}"] = json.dumps(
+            {
+                "conn_type": "ansible",
+                "host": "127.0.0.1",
+                "login": getuser(),
+                "extra": {"port": 22, "private_key": key.getvalue()},
+            }
+        )
+        os.environ.setdefault("ANSIBLE_HOST_KEY_CHECKING", "False")
+
+        # pylint: disable=import-outside-toplevel
+        from airflow_ansible_provider.operators.ansible_operator import (
+            AnsibleOperator,
+        )
+
+        op = AnsibleOperator(
+            task_id="fleet_harness",
+            python_callable=lambda: None,
+            git_repo_conn_id=CONN_ID,
+            playbook=os.path.basename(args.playbook),
+            project_dir=project_dir,
+            artifact_dir=artifact_dir,
+            inventory=inventory_path,
+            forks=args.forks,
+        )
+        # every fake host listens on its own port, the connection port must not win
+        op.extravars.pop("ansible_port", None)
+
+        context = {
+            "ti": TaskInstance(),
+            "run_id": f"fleet_harness__{uuid.uuid4()}",
+            "dag_run": SimpleNamespace(conf={"hosts": args.hosts}),
+        }
+        before = usage()
+        start = time.perf_counter()
+        op.pre_execute(context)
+        exec_start = time.perf_counter()
+        result = op.execute(context)
+        end = time.perf_counter()
+        after = usage()
+    finally:
+        fleet.stop()
+
+    return {
+        "hosts": args.hosts,
+        "forks": args.forks,
+        "playbook": args.playbook,
+        "status": result.get("status"),
+        "rc": result.get("rc"),
+        "wall_seconds": round(end - start, 3),
+        "hosts_per_second": round(args.hosts / max(end - exec_start, 1e-9), 2),
+        "controller_cpu_seconds": {
+            "self": round(after["cpu_self"] - before["cpu_self"], 3),
+            "children": round(after["cpu_children"] - before["cpu_children"], 3),
+        },
+        "max_rss_kb": {
+            "self": after["max_rss_kb_self"],
+            "children": after["max_rss_kb_children"],
+        },
+        "phases": result.get("timings", {}),
+        "workdir": workdir,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", 1)[0])
+    parser.add_argument("--hosts", type=int, default=50, help="number of fake hosts")
+    parser.add_argument("--forks", type=int, default=20, help="ansible forks")
+    parser.add_argument(
+        "--playbook",
+        default=os.path.join(HERE, "playbooks", "fleet.yml"),
+        help="playbook to run against the fleet",
+    )
+    args = parser.parse_args()
+    print(json.dumps(run(args), indent=4))
+
+
+if __name__ == "__main__":
+    main()
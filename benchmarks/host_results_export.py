@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Size and write time of the columnar host results export on a large fleet.
+
+Feeds synthetic runner events (--hosts x --tasks results, a few changed and failed hosts) to
+HostResultTable and writes them in every available format, then reads back two columns. The
+JSON size of a ci_events-like dict (last event per host, as in ansible_return.json) is printed
+for comparison.
+
+    python benchmarks/host_results_export.py --hosts 10000 --tasks 10
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from airflow_ansible_provider.utils.host_results import HostResultTable, read_host_results
+
+
+def events(hosts: int, tasks: int):
+    for t in range(tasks):
+        for h in range(hosts):
+            host = f"host-{h:06d}.example.com"
+            if h % 997 == 0 and t == tasks - 1:
+                event, res = "runner_on_failed", {"msg": "Failed to lock apt for exclusive operation"}
+            elif h % 10 == 0:
+                event, res = "runner_on_ok", {"changed": True, "msg": "1 package upgraded"}
+            else:
+                event, res = "runner_on_ok", {"changed": False}
+            yield {
+                "event": event,
+                "event_data": {
+                    "play": "site",
+                    "task": f"task {t}",
+                    "task_action": "ansible.builtin.apt",
+                    "host": host,
+                    "duration": 0.5 + (h % 7) / 10,
+                    "res": res,
+                },
+            }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hosts", type=int, default=10000)
+    parser.add_argument("--tasks", type=int, default=10)
+    args = parser.parse_args()
+
+    table = HostResultTable()
+    ci_events = {}
+    start = time.perf_counter()
+    for data in events(args.hosts, args.tasks):
+        table.add(data, "site.yml")
+        ci_events[data["event_data"]["host"]] = data
+    add_seconds = time.perf_counter() - start
+
+    report = {
+        "rows": len(table),
+        "add_seconds": round(add_seconds, 3),
+        "ci_events_json_bytes": len(json.dumps(ci_events, indent=4)),
+        "formats": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in ("parquet", "csv"):
+            directory = os.path.join(tmp, fmt)
+            start = time.perf_counter()
+            try:
+                export = table.write(directory, fmt)
+            except ImportError:
+                report["formats"][fmt] = "pyarrow is not installed"
+                continue
+            write_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            columns = read_host_results(export["path"], ["host", "changed"])
+            read_seconds = time.perf_counter() - start
+            report["formats"][fmt] = {
+                "bytes": os.path.getsize(export["path"]),
+                "write_seconds": round(write_seconds, 3),
+                "read_two_columns_seconds": round(read_seconds, 3),
+                "rows_read": len(columns["host"]),
+            }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
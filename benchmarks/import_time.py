@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Import-time budget of the provider, as seen by the DAG processor.
+
+For every entry point (``get_provider_info``, the ``@ansible_task`` decorator and the operator) a
+fresh interpreter first imports Airflow and the base operator stack, which the DAG processor has
+loaded anyway, then imports the entry point under ``-X importtime``. The cumulative time of the
+modules imported by that second step is checked against the budget, and the heavy dependencies
+that must only load when a task runs must not be imported at all. Exits non-zero on a violation.
+
+    python benchmarks/import_time.py --runs 5 --budget-ms 150
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# loaded only when a task executes
+HEAVY = ("ansible_runner", "boto3", "botocore", "paramiko", "sshtunnel")
+
+BASELINE = """
+import airflow
+if int(airflow.__version__.split(".")[0]) >= 3:
+    import airflow.providers.standard.operators.python
+    import airflow.sdk.bases.decorator
+else:
+    import airflow.operators.python_operator
+    import airflow.decorators.base
+"""
+
+TARGETS = {
+    "get_provider_info": "from airflow_ansible_provider import get_provider_info; get_provider_info()",
+    "decorator": "from airflow_ansible_provider.decorators import ansible_task",
+    "operator": "from airflow_ansible_provider.operators.ansible_operator import AnsibleOperator",
+}
+
+MARKER = "-- provider imports --"
+
+
+def measure(statement: str) -> tuple[float, list[str]]:
+    """Cumulative import time in ms of ``statement`` after the baseline, and the heavy modules loaded"""
+    code = (
+        BASELINE
+        + "import sys\n"
+        + f"sys.stderr.write({MARKER!r} + '\\n')\n"
+        + statement
+        + "\n"
+        + f"print(__import__('json').dumps(sorted(m for m in {HEAVY!r} if m in sys.modules)))\n"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # the marker splits the baseline imports from the entry point ones
+    target_lines = proc.stderr.split(MARKER + "\n", 1)[-1].splitlines()
+    total_us = 0
+    for line in target_lines:
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        # top level imports of this step, nested ones are part of their cumulative time
+        if not name.startswith("  ") and cumulative.strip().isdigit():
+            total_us += int(cumulative)
+    return total_us / 1000, json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=150,
+        help="Median import time allowed for each entry point on top of Airflow",
+    )
+    args = parser.parse_args()
+
+    report = {}
+    failed = False
+    for name, statement in TARGETS.items():
+        durations = []
+        heavy: list[str] = []
+        for _ in range(args.runs):
+            duration, heavy = measure(statement)
+            durations.append(duration)
+        median = statistics.median(durations)
+        ok = median <= args.budget_ms and not heavy
+        failed = failed or not ok
+        report[name] = {
+            "median_ms": round(median, 1),
+            "max_ms": round(max(durations), 1),
+            "budget_ms": args.budget_ms,
+            "heavy_modules": heavy,
+            "ok": ok,
+        }
+    print(json.dumps(report, indent=2))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
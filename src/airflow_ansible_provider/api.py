@@ -0,0 +1,354 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+Read-only HTTP API over the provider's artifacts and run index, mounted by the plugin on the
+Airflow 3 API server under ``/ansible``.
+
+- ``GET /runs/live``: runs in progress with their last progress snapshot
+- ``GET /runs``: finished runs from the run index, newest first
+- ``GET /runs/{ident}``: progress, ansible-runner status and summary of one run
+- ``GET /runs/{ident}/hosts``: task results of one run, or the last outcome of each host
+- ``GET /hosts/{host}/history``: latest results of one host across runs
+- ``GET /hosts/{host}/last_failure``: most recent failed or unreachable result of one host
+
+Lists are paginated with an opaque ``cursor`` (``next_cursor`` of the previous page). Responses carry
+an ETag and are cached in process for ``cache_ttl`` seconds. Only imported by the plugin on Airflow 3,
+which ships FastAPI.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from typing import Optional
+
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+
+from airflow_ansible_provider.utils.outcomes import outcome
+from airflow_ansible_provider.utils.progress import PROGRESS_FILE
+from airflow_ansible_provider.utils.response_cache import (
+    InvalidCursor,
+    ResponseCache,
+    decode_cursor,
+    encode_cursor,
+    etag_matches,
+)
+from airflow_ansible_provider.utils.results import summarize_result
+from airflow_ansible_provider.utils.retention import IDENT_RE, IN_PROGRESS_MARKER
+from airflow_ansible_provider.utils.run_index import RunIndex
+
+MAX_PAGE_SIZE = 1000
+
+log = logging.getLogger(__name__)
+
+
+class NotFound(LookupError):
+    """The run, host or run index does not exist"""
+
+
+def _read_json(path: str) -> dict | None:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        # written by a crashed task
+        log.warning("Ignoring unreadable %s", path)
+        return None
+
+
+def _read_text(path: str) -> str | None:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def _position(cursor: str | None) -> tuple | None:
+    """Position decoded from ``cursor``, every cursor of the API holds two scalars"""
+    if not cursor:
+        return None
+    position = decode_cursor(cursor)
+    if len(position) != 2 or not all(isinstance(v, (str, int, float)) for v in position):
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}")
+    return tuple(position)
+
+
+def _page(items: list[dict], limit: int, position) -> dict:
+    """``items`` holds up to ``limit + 1`` rows, the extra one only tells a next page exists"""
+    next_cursor = encode_cursor(position(items[limit - 1])) if len(items) > limit else None
+    return {"items": items[:limit], "next_cursor": next_cursor}
+
+
+class RunStatusReader:
+    """
+    Queries behind the API, on the artifact directory and the optional run index.
+
+    The ``dag_ids`` argument of the queries limits them to the runs of these DAGs, ``None`` allows every DAG.
+    The DAG of a run comes from its run index row or its ``progress.json``, a run with neither is only
+    visible without restriction.
+
+    :param artifact_dir: The artifact directory of the operators
+    :param run_index_path: The run index file, endpoints needing it answer 404 while it does not exist
+    """
+
+    def __init__(self, artifact_dir: str, run_index_path: str | None = None) -> None:
+        self.artifact_dir = artifact_dir
+        self.run_index_path = run_index_path
+        self._index: RunIndex | None = None
+
+    def _run_dir(self, ident: str) -> str:
+        if not IDENT_RE.match(ident):
+            # also keeps the path inside the artifact directory
+            raise NotFound(f"Unknown run {ident}")
+        return os.path.join(self.artifact_dir, ident)
+
+    def index(self, required: bool = True) -> RunIndex | None:
+        if self._index is None and self.run_index_path and os.path.exists(self.run_index_path):
+            self._index = RunIndex(self.run_index_path)
+        if self._index is None and required:
+            raise NotFound("The run index does not exist")
+        return self._index
+
+    def live_runs(self, dag_ids: set[str] | None = None) -> list[dict]:
+        runs = []
+        try:
+            entries = list(os.scandir(self.artifact_dir))
+        except FileNotFoundError:
+            return runs
+        for entry in entries:
+            if not IDENT_RE.match(entry.name) or not os.path.exists(
+                os.path.join(entry.path, IN_PROGRESS_MARKER)
+            ):
+                continue
+            progress = _read_json(os.path.join(entry.path, PROGRESS_FILE))
+            if dag_ids is not None and (progress or {}).get("dag_id") not in dag_ids:
+                continue
+            runs.append({"ident": entry.name, "progress": progress})
+        runs.sort(key=lambda run: (run["progress"] or {}).get("updated") or 0, reverse=True)
+        return runs
+
+    def runs(
+        self, dag_id: str | None, limit: int, cursor: str | None, dag_ids: set[str] | None = None
+    ) -> dict:
+        before = _position(cursor)
+        items = self.index().runs(dag_id=dag_id, limit=limit + 1, before=before, dag_ids=dag_ids)
+        return _page(items, limit, lambda run: (run["finished"], run["ident"]))
+
+    def _visible_run(self, ident: str, dag_ids: set[str] | None) -> tuple[str, dict | None, dict | None]:
+        """Directory, run index row and progress of a run, :class:`NotFound` when the caller may not read its DAG"""
+        run_dir = self._run_dir(ident)
+        index = self.index(required=False)
+        run = index.run(ident) if index is not None else None
+        if run is None and not os.path.isdir(run_dir):
+            raise NotFound(f"Unknown run {ident}")
+        progress = _read_json(os.path.join(run_dir, PROGRESS_FILE))
+        if dag_ids is not None and (run or progress or {}).get("dag_id") not in dag_ids:
+            # same answer as an unknown run, not to disclose which runs exist
+            raise NotFound(f"Unknown run {ident}")
+        return run_dir, run, progress
+
+    def run_status(self, ident: str, dag_ids: set[str] | None = None) -> dict:
+        run_dir, run, progress = self._visible_run(ident, dag_ids)
+        ansible_return = _read_json(os.path.join(run_dir, "ansible_return.json"))
+        rc = _read_text(os.path.join(run_dir, "rc"))
+        return {
+            "ident": ident,
+            "running": os.path.exists(os.path.join(run_dir, IN_PROGRESS_MARKER)),
+            "progress": progress,
+            "status": _read_text(os.path.join(run_dir, "status")),
+            "rc": int(rc) if rc and rc.lstrip("-").isdigit() else None,
+            "run": run,
+            "summary": summarize_result(ansible_return) if ansible_return else None,
+        }
+
+    def run_hosts(
+        self, ident: str, limit: int, cursor: str | None, dag_ids: set[str] | None = None
+    ) -> dict:
+        """Task results from the run index, else the last outcome of each host from ``ansible_return.json``"""
+        run_dir, _, _ = self._visible_run(ident, dag_ids)
+        position = _position(cursor)
+        index = self.index(required=False)
+        if index is not None and (position is None or position[0] == "id"):
+            items = index.run_results(ident, limit=limit + 1, after=position[1] if position else None)
+            if items or position:
+                page = _page(items, limit, lambda row: ("id", row["id"]))
+                return {"source": "run_index", **page}
+        ansible_return = _read_json(os.path.join(run_dir, "ansible_return.json"))
+        if ansible_return is None:
+            raise NotFound(f"No host results for run {ident}")
+        hosts = _host_outcomes(ansible_return)
+        after = position[1] if position and position[0] == "host" else None
+        items = [
+            {"host": host, **hosts[host]}
+            for host in sorted(hosts)
+            if after is None or host > after
+        ][: limit + 1]
+        return {"source": "ansible_return", **_page(items, limit, lambda row: ("host", row["host"]))}
+
+    def host_history(
+        self, host: str, limit: int, cursor: str | None, dag_ids: set[str] | None = None
+    ) -> dict:
+        before = _position(cursor)
+        items = self.index().host_history(host, limit=limit + 1, before=before, dag_ids=dag_ids)
+        return _page(items, limit, lambda row: (row["at"], row["id"]))
+
+    def last_failure(self, host: str, dag_ids: set[str] | None = None) -> dict | None:
+        return self.index().last_failure(host, dag_ids=dag_ids)
+
+
+def _host_outcomes(ansible_return: dict) -> dict[str, dict]:
+    """Last outcome of each host recorded in ``ansible_return``: outcome groups or ci_events"""
+    hosts: dict[str, dict] = {}
+    for group in ansible_return.get("outcomes") or []:
+        for host in group["hosts"]:
+            hosts[host] = {k: group.get(k) for k in ("status", "task", "task_action", "msg")}
+    if hosts:
+        return hosts
+    ci_events = ansible_return.get("ci_events") or {}
+    if ansible_return.get("ci_events_grouped"):
+        ci_events = {host: entry["event"] for entry in ci_events.values() for host in entry["hosts"]}
+    for host, data in ci_events.items():
+        host_outcome = outcome(data)
+        if host_outcome is not None:
+            hosts[host] = host_outcome
+    return hosts
+
+
+def _user_id(user) -> str:
+    if user is None:
+        return ""
+    get_id = getattr(user, "get_id", None)
+    return str(get_id() if get_id is not None else user)
+
+
+def readable_dag_ids(user) -> set[str] | None:
+    """DAGs ``user`` may read through the Airflow auth manager, ``None`` (every DAG) without a user"""
+    if user is None:
+        return None
+    from airflow.api_fastapi.app import get_auth_manager  # pylint: disable=import-outside-toplevel
+
+    auth_manager = get_auth_manager()
+    if hasattr(auth_manager, "get_authorized_dag_ids"):
+        return set(auth_manager.get_authorized_dag_ids(user=user, method="GET"))
+    # auth managers of Airflow 3.0
+    return set(auth_manager.get_permitted_dag_ids(user=user, methods=["GET"]))
+
+
+def create_app(
+    artifact_dir: str,
+    run_index_path: str | None = None,
+    cache_ttl: float = 2.0,
+    cache_entries: int = 1024,
+    require_auth: bool = True,
+):
+    """
+    FastAPI app serving :class:`RunStatusReader`.
+
+    :param artifact_dir: The artifact directory of the operators
+    :param run_index_path: The run index file of the operators, if they use one
+    :param cache_ttl: Seconds a response is served from the in-process cache, 0 disables it
+    :param cache_entries: Responses kept in the cache
+    :param require_auth: Require the Airflow API token and only serve the DAGs the user may read, only disable
+        it for tests and benchmarks
+    """
+    if require_auth:
+        # pylint: disable=import-outside-toplevel
+        from airflow.api_fastapi.core_api.security import get_user
+    else:
+
+        def get_user():
+            return None
+
+    reader = RunStatusReader(artifact_dir, run_index_path)
+    cache = ResponseCache(ttl=cache_ttl, max_entries=cache_entries)
+    app = FastAPI(title="Ansible Provider")
+    app.state.reader = reader
+    app.state.cache = cache
+
+    def respond(request: Request, user, build) -> Response:
+        """``build`` is called with the DAGs the user may read on a cache miss"""
+        # responses depend on the permissions of the user, never share them
+        key = f"{_user_id(user)}:{request.url.path}?{request.url.query}"
+        try:
+            body, tag = cache.get_or_build(key, lambda: build(readable_dag_ids(user)))
+        except NotFound as e:
+            raise HTTPException(status_code=404, detail=str(e)) from e
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        headers = {"ETag": tag, "Cache-Control": f"private, max-age={int(cache_ttl)}"}
+        if etag_matches(request.headers.get("if-none-match"), tag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    # plain def endpoints run in the threadpool, the reader does blocking file and sqlite reads
+
+    @app.get("/runs/live")
+    def live_runs(request: Request, user=Depends(get_user)):
+        return respond(request, user, lambda dag_ids: {"items": reader.live_runs(dag_ids)})
+
+    @app.get("/runs")
+    def runs(
+        request: Request,
+        dag_id: Optional[str] = None,
+        limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
+        user=Depends(get_user),
+    ):
+        return respond(request, user, lambda dag_ids: reader.runs(dag_id, limit, cursor, dag_ids))
+
+    @app.get("/runs/{ident}")
+    def run_status(request: Request, ident: str, user=Depends(get_user)):
+        return respond(request, user, lambda dag_ids: reader.run_status(ident, dag_ids))
+
+    @app.get("/runs/{ident}/hosts")
+    def run_hosts(
+        request: Request,
+        ident: str,
+        limit: int = Query(500, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
+        user=Depends(get_user),
+    ):
+        return respond(
+            request, user, lambda dag_ids: reader.run_hosts(ident, limit, cursor, dag_ids)
+        )
+
+    @app.get("/hosts/{host}/history")
+    def host_history(
+        request: Request,
+        host: str,
+        limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
+        user=Depends(get_user),
+    ):
+        return respond(
+            request, user, lambda dag_ids: reader.host_history(host, limit, cursor, dag_ids)
+        )
+
+    @app.get("/hosts/{host}/last_failure")
+    def last_failure(request: Request, host: str, user=Depends(get_user)):
+        return respond(
+            request,
+            user,
+            lambda dag_ids: {"host": host, "last_failure": reader.last_failure(host, dag_ids)},
+        )
+
+    return app
@@ -85,8 +85,12 @@ class AnsibleDecoratedOperator(DecoratedOperator, AnsibleOperator):
         self.log.debug("AnsibleDecoratedOperator.execute op_args: %s", self.op_args)
         kwargs = determine_kwargs(self.python_callable, self.op_args, context)
         self.log.debug("AnsibleDecoratedOperator.execute kwargs: %s", kwargs)
-        super().execute(context)
-        return self.python_callable(*self.op_args, **kwargs)
+        shaped = super().execute(context)
+        result = self.python_callable(*self.op_args, **kwargs)
+        if result is context.get("ansible_return"):
+            # The callable handed back ansible_return untouched, push it according to result_mode
+            return shaped
+        return result
 
 
 def ansible_task(
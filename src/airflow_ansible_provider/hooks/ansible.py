@@ -26,17 +26,18 @@ import warnings
 from collections.abc import Sequence
 from functools import cached_property
 from io import StringIO
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import paramiko
 from airflow.exceptions import AirflowException
 from airflow.utils.platform import getuser
-from paramiko.config import SSH_PORT
-from sshtunnel import SSHTunnelForwarder
-from tenacity import Retrying, stop_after_attempt, wait_fixed, wait_random
 
 from airflow_ansible_provider import IS_AIRFLOW_3_PLUS
 
+if TYPE_CHECKING:
+    # paramiko and sshtunnel are imported when used, DAG parsing does not need them
+    import paramiko
+    from sshtunnel import SSHTunnelForwarder
+
 if IS_AIRFLOW_3_PLUS:
     from airflow.sdk import BaseHook
 else:
@@ -45,6 +46,7 @@ else:
 # from airflow.utils.types import NOTSET, ArgNotSet
 # from airflow.utils.log.secrets_masker import mask_secret
 
+SSH_PORT = 22
 TIMEOUT_DEFAULT = 10
 CMD_TIMEOUT = 10
 CONNECTION_TIMEOUT = 10
@@ -91,16 +93,16 @@ class AnsibleHook(BaseHook):
     """
 
     # List of classes to try loading private keys as, ordered (roughly) by most common to least common
-    _pkey_loaders: Sequence[type[paramiko.PKey]] = (
-        paramiko.RSAKey,
-        paramiko.ECDSAKey,
-        paramiko.Ed25519Key,
+    _pkey_loaders: Sequence[str] = (
+        "RSAKey",
+        "ECDSAKey",
+        "Ed25519Key",
     )
 
     _host_key_mappings = {
-        "rsa": paramiko.RSAKey,
-        "ecdsa": paramiko.ECDSAKey,
-        "ed25519": paramiko.Ed25519Key,
+        "rsa": "RSAKey",
+        "ecdsa": "ECDSAKey",
+        "ed25519": "Ed25519Key",
     }
 
     conn_name_attr = "ansible_conn_id"
@@ -223,7 +225,6 @@ class AnsibleHook(BaseHook):
         self.password = password
         self.private_key = private_key
         self.private_key_passphrase = private_key_passphrase
-        self.pkey = None
         self.port = port
         self.conn_timeout = conn_timeout
         self.cmd_timeout = cmd_timeout
@@ -273,10 +274,6 @@ class AnsibleHook(BaseHook):
                 ):
                     if getattr(self, field) is not None:
                         setattr(self, field, extra_options.get(field))
-                if self.private_key:
-                    self.pkey = self._pkey_from_private_key(
-                        self.private_key, passphrase=self.private_key_passphrase
-                    )
 
                 # host_key = extra_options.get("host_key")
                 # no_host_key_check = extra_options.get("no_host_key_check")
@@ -340,7 +337,7 @@ class AnsibleHook(BaseHook):
         #     if host_info and host_info.get("proxycommand") and not self.host_proxy_cmd:
         #         self.host_proxy_cmd = host_info["proxycommand"]
 
-        if not (self.password or self.pkey):
+        if not (self.password or self.private_key):
             raise AirflowException("password or private_key is not set")
 
     # def get_parameter_value(
@@ -368,13 +365,32 @@ class AnsibleHook(BaseHook):
     #             raise
     #         return default
 
+    @cached_property
+    def pkey(self) -> paramiko.PKey | None:
+        """The private key, parsed on first use so that paramiko is not imported at DAG parse time"""
+        if not self.private_key:
+            return None
+        return self._pkey_from_private_key(
+            self.private_key, passphrase=self.private_key_passphrase
+        )
+
     @cached_property
     def host_proxy(self) -> paramiko.ProxyCommand | None:
+        import paramiko  # pylint: disable=import-outside-toplevel
+
         cmd = self.host_proxy_cmd
         return paramiko.ProxyCommand(cmd) if cmd else None
 
     def get_conn(self) -> paramiko.SSHClient | None:
         """Establish an SSH connection to the remote host."""
+        import paramiko  # pylint: disable=import-outside-toplevel
+        from tenacity import (  # pylint: disable=import-outside-toplevel
+            Retrying,
+            stop_after_attempt,
+            wait_fixed,
+            wait_random,
+        )
+
         if not self.remote_host:
             warnings.warn("remote_host is not provided. We can not provide the ssh client.")
             return None
@@ -486,6 +502,8 @@ class AnsibleHook(BaseHook):
 
         :return: sshtunnel.SSHTunnelForwarder object
         """
+        from sshtunnel import SSHTunnelForwarder  # pylint: disable=import-outside-toplevel
+
         if local_port:
             local_bind_address: tuple[str, int] | tuple[str] = ("localhost", local_port)
         else:
@@ -525,12 +543,14 @@ class AnsibleHook(BaseHook):
         :return: ``paramiko.PKey`` appropriate for given key
         :raises AirflowException: if key cannot be read
         """
+        import paramiko  # pylint: disable=import-outside-toplevel
+
         if len(private_key.splitlines()) < 2:
             raise AirflowException("Key must have BEGIN and END header/footer on separate lines.")
 
         for pkey_class in self._pkey_loaders:
             try:
-                key = pkey_class.from_private_key(StringIO(private_key), password=passphrase)
+                key = getattr(paramiko, pkey_class).from_private_key(StringIO(private_key), password=passphrase)
                 # Test it actually works. If Paramiko loads an openssh generated key, sometimes it will
                 # happily load it as the wrong type, only to fail when actually used.
                 key.sign_ssh_data(b"")
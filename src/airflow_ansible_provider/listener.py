@@ -0,0 +1,118 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+Task instance listener registered by the plugin, feeds :class:`FleetTelemetry` with every
+completed AnsibleOperator task.
+
+Configured in the ``[ansible_provider]`` section: ``telemetry_enabled`` (default True),
+``telemetry_db`` (default ``<artifact_dir>/telemetry.sqlite``, empty keeps samples in memory only),
+``telemetry_windows`` (seconds, default ``300,3600,86400``) and ``telemetry_flush_interval``
+(default 60). Samples are flushed again when the process exits.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import threading
+
+from airflow.listeners import hookimpl
+
+from airflow_ansible_provider.utils.telemetry import (
+    DEFAULT_TELEMETRY_DB,
+    DEFAULT_WINDOWS,
+    FleetTelemetry,
+    task_sample,
+)
+
+log = logging.getLogger(__name__)
+
+_telemetry: FleetTelemetry | None = None
+_disabled = False
+_lock = threading.Lock()
+
+
+def get_telemetry() -> FleetTelemetry | None:
+    """The process wide aggregator, ``None`` when disabled"""
+    global _telemetry, _disabled  # pylint: disable=global-statement
+    with _lock:
+        if _telemetry is not None or _disabled:
+            return _telemetry
+        from airflow.configuration import conf  # pylint: disable=import-outside-toplevel
+
+        from airflow_ansible_provider.hooks.ansible import (  # pylint: disable=import-outside-toplevel
+            ANSIBLE_ARTIFACT_DIR,
+        )
+
+        if not conf.getboolean("ansible_provider", "telemetry_enabled", fallback=True):
+            _disabled = True
+            return None
+        artifact_dir = conf.get(
+            "ansible_provider",
+            "artifact_dir",
+            fallback=conf.get(
+                "ansible_provider", "artifact_retention_dir", fallback=ANSIBLE_ARTIFACT_DIR
+            ),
+        )
+        path = conf.get(
+            "ansible_provider",
+            "telemetry_db",
+            fallback=os.path.join(artifact_dir, DEFAULT_TELEMETRY_DB),
+        )
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        windows = conf.get("ansible_provider", "telemetry_windows", fallback="")
+        _telemetry = FleetTelemetry(
+            path or None,
+            windows=tuple(int(w) for w in windows.split(",") if w.strip()) or DEFAULT_WINDOWS,
+            flush_interval=conf.getfloat(
+                "ansible_provider", "telemetry_flush_interval", fallback=60
+            ),
+        )
+        atexit.register(_telemetry.flush)
+        return _telemetry
+
+
+def _record(task_instance, success: bool) -> None:
+    task = getattr(task_instance, "task", None)
+    # set by AnsibleOperator.execute, other operators and cached results have none
+    ansible_return = getattr(task, "_last_return", None)
+    if not ansible_return or ansible_return.get("cached"):
+        return
+    try:
+        telemetry = get_telemetry()
+        if telemetry is None:
+            return
+        timer = task._get_timer()  # pylint: disable=protected-access
+        telemetry.add(task_sample(task.dag_id, ansible_return, timer.timings, success))
+    except Exception as e:  # telemetry must never fail a task
+        log.warning("Failed to record fleet telemetry: %s", e)
+
+
+# hook implementations may take a subset of the spec arguments, which differ between Airflow versions
+
+
+@hookimpl
+def on_task_instance_success(previous_state, task_instance):
+    _record(task_instance, success=True)
+
+
+@hookimpl
+def on_task_instance_failed(previous_state, task_instance):
+    _record(task_instance, success=False)
@@ -16,27 +16,104 @@
 # under the License.
 from __future__ import annotations
 
-import base64
 import datetime
 import hashlib as hashlib_wrapper
 import json
 import os
 import sys
+import time
 import zipfile
 from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
+import tempfile
 from tempfile import TemporaryDirectory
 from typing import Any, Collection, Iterable, Mapping, Sequence, Tuple, Union
 
 import airflow.models.xcom_arg
-import ansible_runner
-import boto3
 from airflow.exceptions import AirflowException
-from airflow.models import Connection, Variable
+from airflow.models import Variable
 from airflow.utils.process_utils import execute_in_subprocess_with_kwargs
 from airflow_ansible_provider import IS_AIRFLOW_3_PLUS
 from airflow_ansible_provider.hooks.ansible import AnsibleHook
-from botocore.config import Config
+from airflow_ansible_provider.utils.blob_store import is_blob_ref, resolve_blob
+from airflow_ansible_provider.utils.circuit_breaker import CircuitBreaker
+from airflow_ansible_provider.utils.controller_pool import ensure_pool
+from airflow_ansible_provider.utils.event_log import SegmentedEventLog
+from airflow_ansible_provider.utils.host_fingerprint import (
+    FingerprintStore,
+    host_fingerprints,
+)
+from airflow_ansible_provider.utils.host_health import DEFAULT_HEALTH_DB, HostHealthStore
+from airflow_ansible_provider.utils.host_results import HostResultTable
+from airflow_ansible_provider.utils.inventory import (
+    host_inputs,
+    inventory_hosts,
+    resolve_inventory_hosts,
+)
+from airflow_ansible_provider.utils.outcomes import (
+    OUTCOMES_FILE,
+    format_outcomes,
+    group_ci_events,
+    outcome,
+    outcome_groups,
+)
+from airflow_ansible_provider.utils.playbook_cache import (
+    PLAYBOOK_CACHE_DIR,
+    PLAYBOOK_FILE,
+    materialize_playbook,
+)
+from airflow_ansible_provider.utils.process_tree import (
+    child_pids,
+    terminate_children,
+    terminate_connections,
+)
+from airflow_ansible_provider.utils.progress import (
+    ProgressReporter,
+    ProgressTracker,
+    write_progress,
+)
+from airflow_ansible_provider.utils.result_cache import (
+    DEFAULT_MAX_ENTRIES,
+    ResultCache,
+    content_hash,
+    file_hash,
+    git_head,
+)
+from airflow_ansible_provider.utils.results import (
+    RESULT_MODE_FULL,
+    RESULT_MODE_REFERENCE,
+    RESULT_MODE_SUMMARY,
+    RESULT_MODES,
+    reference_result,
+    summarize_result,
+)
+from airflow_ansible_provider.utils.retention import (
+    IN_PROGRESS_MARKER,
+    UPLOADED_MARKER,
+    mark,
+    maybe_sweep,
+    unmark,
+)
+from airflow_ansible_provider.utils.run_index import DEFAULT_RUN_INDEX_DB, RunIndex
+from airflow_ansible_provider.utils.run_state import RunState, combine_stats
+from airflow_ansible_provider.utils.retry_state import (
+    final_host_status,
+    load_state,
+    merge_by_host,
+    merge_stats,
+    rerun_hosts,
+    save_state,
+    state_key,
+    succeeded_hosts,
+    try_host_status,
+)
+from airflow_ansible_provider.utils.s3 import get_s3_client
+from airflow_ansible_provider.utils.ssh_control import close_control_sockets
+from airflow_ansible_provider.utils.streaming import run_streamed
+from airflow_ansible_provider.utils.timing import PhaseTimer
+from airflow_ansible_provider.utils.watchdog import HostWatchdog
 
 if IS_AIRFLOW_3_PLUS:
     from airflow.providers.standard.operators.python import PythonVirtualenvOperator
@@ -47,7 +124,7 @@ if IS_AIRFLOW_3_PLUS:
 
 else:
     # 降级到 2.x
-    from airflow.lineage.decorators import prepare_lineage
+    from airflow.lineage import prepare_lineage
     from airflow.operators.python_operator import PythonVirtualenvOperator
     from airflow.utils.context import Context
 
@@ -74,6 +151,10 @@ class AnsibleOperator(PythonVirtualenvOperator):
 
     :param str playbook: The playbook (as a path relative to ``private_data_dir/project``) that will be invoked by runner when executing Ansible.
     :param str playbook_yaml: The playbook
+    :param list playbooks: Batch mode, run several playbooks (paths like ``playbook``) in order against the same
+        inventory, preparing the environment once. An item that is a list is a group of playbooks run in parallel.
+        The batch stops at the first step with a failed playbook. Per-playbook results are returned in
+        ``ansible_return["playbooks"]``, the top level holds the combined status and stats
     :param dict or list roles_path: Directory or list of directories to assign to ANSIBLE_ROLES_PATH
     :param str or dict or list inventory: Overrides the inventory directory/file (supplied at ``private_data_dir/inventory``) with
         a specific host or list of hosts. This can take the form of:
@@ -82,6 +163,7 @@ class AnsibleOperator(PythonVirtualenvOperator):
             - Native python dict supporting the YAML/json inventory structure
             - A text INI formatted string
             - A list of inventory sources, or an empty list to disable passing inventory
+            - A blob reference returned by :func:`airflow_ansible_provider.utils.blob_store.put_blob`
 
     :param int forks: Control Ansible parallel concurrency
     :param str artifact_dir: The path to the directory where artifacts should live, this defaults to 'artifacts' under the private data dir
@@ -90,7 +172,8 @@ class AnsibleOperator(PythonVirtualenvOperator):
                     (based on ``runner_mode`` selected) while executing command. It the timeout is triggered it will force cancel the
                     execution.
     :param dict extravars: Extra variables to be passed to Ansible at runtime using ``-e``. Extra vars will also be
-                read from ``env/extravars`` in ``private_data_dir``.
+                read from ``env/extravars`` in ``private_data_dir``. May also be a blob reference returned by
+                :func:`airflow_ansible_provider.utils.blob_store.put_blob`.
 
     :param str ansible_conn_id: The ansible connection
     :param list kms_keys: The list of KMS keys to be used to decrypt the ansible extra vars
@@ -101,11 +184,94 @@ class AnsibleOperator(PythonVirtualenvOperator):
     :param list tags: List of tags to run
     :param list skip_tags: List of tags to skip
     :param bool get_ci_events: Get CI events
+    :param bool group_outcomes: Group hosts by the outcome of their last task result (status, task, message with
+        host specific parts masked). ``ansible_return["outcomes"]`` lists each distinct outcome once with its hosts,
+        ``ci_events`` keeps one event per outcome, the groups are logged and saved as ``outcomes.json`` in the
+        artifact bundle. See :mod:`airflow_ansible_provider.utils.outcomes`
+    :param bool emit_timing_spans: Open an OpenTelemetry span for every timed phase, in addition to the
+        timer metrics which are always emitted. The breakdown is returned in ``ansible_return["timings"]``
+    :param int latency_top_n: Number of slowest hosts, tasks and host results reported in
+        ``ansible_return["latency"]``, 0 only reports the per-task statistics
+    :param str blob_store_dir: Local directory where inventory and extravars blob references are resolved and
+        cached, defaults to ``blobs`` under the artifact directory. Blobs missing there are fetched with ``s3_conn_id``
+    :param dict artifact_retention: Sweep the artifact directory after the run, e.g.
+        ``{"max_age_days": 7, "max_bytes": 10 * 2**30, "max_count": 1000, "interval": 3600}``. Accepts the arguments of
+        :func:`airflow_ansible_provider.utils.retention.sweep_artifacts`; ``interval`` (default 3600s) limits how
+        often a worker sweeps. The report, with the reclaimed bytes, is returned in ``ansible_return["retention"]``
+    :param bool event_log: Write every runner event to a compressed, segmented NDJSON log with a byte offset index
+        under ``<artifact_dir>/<ident>/event_log``, see :class:`airflow_ansible_provider.utils.event_log.EventLogReader`.
+        The log is included in the artifact bundle
+    :param str host_results: Write every task result (playbook, play, task, host, status, changed, duration, msg)
+        as a columnar file to ``<artifact_dir>/<ident>/`` and the artifact bundle: ``parquet`` (needs pyarrow),
+        ``csv`` (gzipped) or ``auto``. See :func:`airflow_ansible_provider.utils.host_results.read_host_results`
+    :param int progress_interval: Report live progress (hosts done/failed/unreachable, current task, ETA) at most
+        every this many seconds while the playbook runs, 0 disables it. Errors of tasks with ``ignore_errors``
+        do not count as failures, and a failure only counts once the host skipped a whole task after it, so hosts
+        rescued by a ``block/rescue`` are not failed. ``playbook_on_stats`` gives the final status of each host
+    :param bool progress_xcom: Also push each progress report to XCom with key ``progress``
+    :param float max_fail_percentage: Cancel the run once more than this percentage of the hosts that reported
+        a result have failed. Ignored errors do not count, a failure counts once the host skipped the next task
+    :param float max_unreachable_percentage: Cancel the run once more than this percentage of the hosts that
+        reported a result are unreachable
+    :param int breaker_min_hosts: Number of hosts that must have reported before the two thresholds above apply
+    :param bool retry_failed_hosts_only: Persist the outcome of every host after each try and, when the task is
+        retried, only run the hosts that did not succeed. A host succeeds when it is ok in the stats of a run that
+        went to its end, so hosts cut off by a cancel, timeout or kill run again and ignored or rescued errors do
+        not fail it. The results of the tries are merged into one ``ansible_return`` (see
+        ``ansible_return["retry"]``). In this mode the task fails when any host did not succeed, so that Airflow
+        retries it
+    :param int result_cache_ttl: Cache successful results for this many seconds, keyed by a hash of the playbook
+        content, git commit of the project, inventory, extravars, tags and venv/collections. A run with the same
+        inputs within the TTL returns the cached ``ansible_return`` with ``cached=True`` without starting
+        ansible-runner. ``None`` disables the cache
+    :param str result_cache_dir: Directory of the result cache, defaults to ``result_cache`` under the artifact directory
+    :param int result_cache_max_entries: Number of results kept in the cache, least recently used are evicted first
+    :param bool result_cache_refresh: Drop the cached result of this run and execute the playbook again
+    :param bool converge_changed_hosts: For idempotent playbooks: fingerprint the inputs of every host (host and
+        group vars, playbook content, git commit, extravars, tags) and only run the hosts whose fingerprint differs
+        from the last successful run of this task. Requires a dict inventory. When no host changed ansible-runner
+        is not started. The counts are returned in ``ansible_return["convergence"]``
+    :param int host_fingerprint_ttl: Also rerun hosts whose last successful run is older than this many seconds,
+        to correct drift. ``None`` keeps fingerprints forever
+    :param dict host_health: Track unreachable hosts across runs and DAGs in a shared SQLite store and exclude hosts
+        that were unreachable in consecutive runs, with an exponential backoff; once it expires the host is tried
+        again. E.g. ``{"threshold": 2, "base_backoff": 600, "max_backoff": 86400}``, plus ``path`` (default
+        ``<artifact_dir>/host_health.sqlite``) and ``exclude`` (default True, False only reports). Excluded hosts are
+        listed in ``ansible_return["host_health"]``. Inventory scripts and plugins only record, their hosts are not
+        known before the run
+    :param dict run_index: Record every run and its task results in a local SQLite index shared by all tasks using
+        the same file, queryable with :class:`airflow_ansible_provider.utils.run_index.RunIndex` (host history, last
+        failure, failure trend, slowest tasks). ``{}`` enables it, options: ``path`` (default
+        ``<artifact_dir>/run_index.sqlite``), ``batch_size``, ``detail_days`` (task results older than this are
+        compacted into daily per-host counters, default 30), ``retention_days`` (default 365) and ``interval``
+        (seconds between two compactions, default 3600)
+    :param dict controller_pool: Run ansible-playbook through a worker-local warm controller, see
+        :mod:`airflow_ansible_provider.utils.controller_pool`. ``{}`` enables it with the defaults, or pass
+        ``max_jobs`` (recycle the controller after this many jobs), ``idle_timeout`` and ``preload`` (extra
+        modules to import once). The estimated startup saving is returned in ``ansible_return["controller_pool"]``
+    :param list executor_command: Offload the run to a separate executor: the job is packaged with ansible-runner's
+        ``transmit`` and piped to this command, which must run ``ansible-runner worker``, e.g.
+        ``["ansible-runner", "worker"]`` or ``["ssh", "controller-1", "ansible-runner", "worker"]``. Events are
+        consumed here with ``process``, see :mod:`airflow_ansible_provider.utils.streaming`
+    :param str executor_binary: ansible-playbook on the executor, defaults to ``ansible-playbook``
+    :param dict host_watchdog: Per-host stall detection instead of only ``ansible_timeout``, e.g.
+        ``{"stall_timeout": 900}``. A host whose current task reports nothing for ``stall_timeout`` seconds is
+        recorded as stalled; ``ANSIBLE_TASK_TIMEOUT`` is set to the same value (unless ``task_timeout`` is
+        False or ``ansible_envvars`` sets it), so ansible fails the task and drops the host while the other hosts
+        go on. If the host is still silent ``kill_grace`` (default 60) seconds later, its ssh connections are
+        terminated. Hits are listed in ``ansible_return["watchdog"]``
+    :param float kill_grace_period: When the task is killed, seconds ``on_kill`` waits after SIGINT and again
+        after SIGTERM before sending SIGKILL to ansible-playbook, its forks and ssh children. Keep the total
+        below Airflow's ``killed_task_cleanup_time``
+    :param str result_mode: What ``execute`` returns and therefore pushes to XCom. ``full`` returns the whole
+        ``ansible_return``, ``summary`` only status, stats and counts, ``reference`` the summary plus a pointer to
+        the full result in the artifact store, see :func:`airflow_ansible_provider.utils.results.load_ansible_return`
     """
 
     operator_fields: Sequence[str] = (
         "playbook",
         "playbook_yaml",
+        "playbooks",
         "inventory",
         "roles_path",
         "extravars",
@@ -119,6 +285,7 @@ class AnsibleOperator(PythonVirtualenvOperator):
         "forks",
         "ansible_timeout",
         "ansible_vars",
+        "result_mode",
     )
     template_fields_renderers = {
         "conn_id": "ansible_default",
@@ -145,6 +312,7 @@ class AnsibleOperator(PythonVirtualenvOperator):
         python_callable: Callable,
         playbook: str = "",
         playbook_yaml: str = "",
+        playbooks: list[str | list[str]] | None = None,
         git_repo_conn_id: str = "ansible_default",
         s3_conn_id: str = "",
         path: str = "",
@@ -156,6 +324,7 @@ class AnsibleOperator(PythonVirtualenvOperator):
         tags: Union[list, None] = None,
         skip_tags: Union[list, None] = None,
         get_ci_events: bool = False,
+        group_outcomes: bool = False,
         forks: int = 10,
         ansible_timeout: Union[int, None] = None,
         git_extra: Union[dict, None] = None,
@@ -169,6 +338,32 @@ class AnsibleOperator(PythonVirtualenvOperator):
         requirements: None | Iterable[str] | str = None,
         venv_cache_path: None | os.PathLike[str] = None,
         galaxy_collections: list[str] | None = None,
+        emit_timing_spans: bool = False,
+        latency_top_n: int = 10,
+        result_mode: str = RESULT_MODE_FULL,
+        blob_store_dir: str | None = None,
+        artifact_retention: dict | None = None,
+        event_log: bool = False,
+        host_results: str | None = None,
+        progress_interval: int = 30,
+        progress_xcom: bool = False,
+        max_fail_percentage: float | None = None,
+        max_unreachable_percentage: float | None = None,
+        breaker_min_hosts: int = 1,
+        retry_failed_hosts_only: bool = False,
+        result_cache_ttl: int | None = None,
+        result_cache_dir: str | None = None,
+        result_cache_max_entries: int = DEFAULT_MAX_ENTRIES,
+        result_cache_refresh: bool = False,
+        converge_changed_hosts: bool = False,
+        host_fingerprint_ttl: int | None = None,
+        host_health: dict | None = None,
+        run_index: dict | None = None,
+        controller_pool: dict | None = None,
+        executor_command: list[str] | None = None,
+        executor_binary: str | None = None,
+        host_watchdog: dict | None = None,
+        kill_grace_period: float = 10,
         op_args: Collection[Any] | None = None,
         op_kwargs: Mapping[str, Any] | None = None,
         **kwargs,
@@ -188,6 +383,7 @@ class AnsibleOperator(PythonVirtualenvOperator):
         )
         self.playbook = playbook
         self.playbook_yaml = playbook_yaml
+        self.playbooks = playbooks
         self.path = path
         self.inventory = inventory
         self.s3_conn_id = s3_conn_id
@@ -196,6 +392,7 @@ class AnsibleOperator(PythonVirtualenvOperator):
         self.tags = tags
         self.skip_tags = skip_tags
         self.get_ci_events = get_ci_events
+        self.group_outcomes = group_outcomes
         self.forks = forks
         self.ansible_timeout = ansible_timeout
         self.git_extra = git_extra
@@ -210,41 +407,409 @@ class AnsibleOperator(PythonVirtualenvOperator):
         self.op_args = op_args or ()
         self.op_kwargs = op_kwargs or {}
         self.galaxy_collections = galaxy_collections
+        self.emit_timing_spans = emit_timing_spans
+        if latency_top_n < 0:
+            raise AirflowException(f"latency_top_n must be 0 or more, got {latency_top_n}")
+        self.latency_top_n = latency_top_n
+        self.result_mode = result_mode
+        self._check_result_mode()
+        self.blob_store_dir = blob_store_dir
+        self.artifact_retention = artifact_retention
+        self.event_log = event_log
+        self.host_results = host_results
+        self.progress_interval = progress_interval
+        self.progress_xcom = progress_xcom
+        self.max_fail_percentage = max_fail_percentage
+        self.max_unreachable_percentage = max_unreachable_percentage
+        self.breaker_min_hosts = breaker_min_hosts
+        self.retry_failed_hosts_only = retry_failed_hosts_only
+        self.result_cache_ttl = result_cache_ttl
+        self.result_cache_dir = result_cache_dir
+        self.result_cache_max_entries = result_cache_max_entries
+        self.result_cache_refresh = result_cache_refresh
+        self.converge_changed_hosts = converge_changed_hosts
+        self.host_fingerprint_ttl = host_fingerprint_ttl
+        self.host_health = host_health
+        self.run_index = run_index
+        self.controller_pool = controller_pool
+        self.executor_command = executor_command
+        self.executor_binary = executor_binary
+        self.host_watchdog = host_watchdog
+        self.kill_grace_period = kill_grace_period
 
         self.ci_events = {}
         self.last_event = {}
-        self._runner_ident = None
+        self._runner_idents = []
         self._context = None
         self._tmp_dir = None
         self._env_dir = None
         self._bin_path = None
         self._collections_paths = []
+        self._timer = None
+        self._run = None
+        self._control_path_dir = None
+        self._kill_requested = False
+        self._child_baseline = None
+        self._watchdog = None
+        self._host_results = None
+        self._outcomes = None
+        self._run_index = None
+        self._run_started = None
+        # read by the plugin's telemetry listener once the task completed
+        self._last_return = None
+        self._progress = ProgressTracker()
+        self._breaker = CircuitBreaker()
+        self._limit_hosts = None
+        self._retry_state = None
+        self._result_cache_key = None
+        self._cached_result = None
+        self._fingerprints = None
+        self._convergence = None
+        self._exclude_hosts = set()
+        self._unreachable_errors = {}
+        self._health_report = None
         self.log.debug("playbook: %s", self.playbook)
         self.log.debug("playbook type: %s", type(self.playbook))
 
         self._ansible_hook = AnsibleHook(conn_id=git_repo_conn_id)
-        self.extravars["ansible_user"] = self._ansible_hook.username
-        self.extravars["ansible_port"] = self._ansible_hook.port
-        self.extravars["ansible_connection"] = "ssh"
+        if isinstance(self.extravars, dict):
+            self._set_connection_extravars()
         self.project_dir = project_dir or self._ansible_hook.ansible_playbook_directory
         self.artifact_dir = (
             artifact_dir or self._ansible_hook.ansible_artifact_directory
         )
-        if self.playbook_yaml:
-            self._tmp_playbook = TemporaryDirectory(prefix="temp-playbook-")
 
-    def event_handler(self, data):
+    def _set_connection_extravars(self):
+        self.extravars["ansible_user"] = self._ansible_hook.username
+        self.extravars["ansible_port"] = self._ansible_hook.port
+        self.extravars["ansible_connection"] = "ssh"
+
+    def _resolve_blob_refs(self):
+        """Replace inventory/extravars blob references with their content"""
+        cache_dir = self.blob_store_dir or os.path.join(self.artifact_dir, "blobs")
+        if is_blob_ref(self.inventory):
+            self.log.info("Resolving inventory %s", self.inventory)
+            self.inventory = resolve_blob(self.inventory, cache_dir, self.s3_conn_id)
+        if is_blob_ref(self.extravars):
+            self.log.info("Resolving extravars %s", self.extravars)
+            self.extravars = resolve_blob(self.extravars, cache_dir, self.s3_conn_id)
+            self._set_connection_extravars()
+
+    def event_handler(self, data, run: RunState | None = None):
         """event handler"""
+        start = time.perf_counter()
+        try:
+            self._handle_event(data, run or self._run)
+        finally:
+            self._get_timer().add("event_handler", time.perf_counter() - start)
+        # Tell ansible-runner not to write one job_events file per event,
+        # the event log keeps them when it is enabled
+        return False
+
+    def _handle_event(self, data, run: RunState):
         if self.get_ci_events and data.get("event_data", {}).get("host"):
-            self.ci_events[data["event_data"]["host"]] = data
-        self.last_event = data
-        self.log.info("event: %s", self.last_event)
-        if not self._runner_ident and data.get("runner_ident"):
-            # 执行过程中先获取到 runner_ident，便于日志即时观察输出
-            self._context["ti"].xcom_push(
-                key="runner_id", value=data.get("runner_ident")
+            run.ci_events[data["event_data"]["host"]] = data
+        run.last_event = data
+        run.latency.add(data)
+        run.progress.add(data)
+        if run.progress is not self._progress:
+            # batch mode: the operator's tracker covers all playbooks, for the breaker and retries
+            self._progress.add(data)
+        if self._watchdog is not None:
+            self._watchdog.add(data)
+        if self._host_results is not None:
+            self._host_results.add(data, run.playbook)
+        if self._run_index is not None:
+            try:
+                self._run_index.add(data)
+            except Exception as e:
+                self.log.warning("Failed to index results, Error: %s", e)
+        if self._outcomes is not None:
+            host_outcome = outcome(data)
+            if host_outcome is not None:
+                self._outcomes[data["event_data"]["host"]] = host_outcome
+        if self.host_health is not None and data.get("event") == "runner_on_unreachable":
+            event_data = data.get("event_data") or {}
+            self._unreachable_errors[event_data.get("host")] = (
+                event_data.get("res") or {}
+            ).get("msg")
+        if not self._breaker.tripped and self._breaker.check(self._progress):
+            self.log.error(
+                "Circuit breaker tripped, canceling the run: %s", self._breaker.reason
+            )
+        if data.get("event") == "playbook_on_stats":
+            # job_events are not written, so Runner.stats cannot find this event later
+            run.set_stats(data)
+        self.log.info("event: %s", data)
+        if not run.runner_ident and data.get("runner_ident"):
+            if not self._runner_idents:
+                # 执行过程中先获取到 runner_ident，便于日志即时观察输出
+                self._context["ti"].xcom_push(
+                    key="runner_id", value=data.get("runner_ident")
+                )
+            run.runner_ident = data.get("runner_ident")
+            self._runner_idents.append(run.runner_ident)
+            # protect the run from retention sweeps until execute() is done
+            mark(os.path.join(self.artifact_dir, run.runner_ident), IN_PROGRESS_MARKER)
+            if self.event_log:
+                run.event_log = SegmentedEventLog(
+                    os.path.join(self.artifact_dir, run.runner_ident, "event_log")
+                )
+        if run.event_log is not None:
+            run.event_log.write(data)
+
+    def _cancel_callback(self) -> bool:
+        """Polled by ansible-runner, returning True cancels the run"""
+        return self._kill_requested or self._breaker.tripped
+
+    def _stop_stalled_host(self, host: str, addresses: set[str]) -> str:
+        """Called by the watchdog for a host silent past its grace period, returns the action taken"""
+        if self.executor_command:
+            # the connections live on the executor
+            return "no_action"
+        host_vars = ((host_inputs(self.inventory) or {}).get(host) or {}).get("vars") or {}
+        if host_vars.get("ansible_host"):
+            addresses = addresses | {str(host_vars["ansible_host"])}
+        stopped = terminate_connections(addresses, exclude=self._child_baseline or ())
+        self.log.warning("Host %s stalled, terminated %s connections", host, stopped)
+        return "connection_killed" if stopped else "no_connection"
+
+    def _report_progress(self, progress: dict):
+        """Publish a progress snapshot, called from the progress reporter thread"""
+        self.log.info(
+            "progress: %s/%s hosts done, %s failed, %s unreachable, task %s (#%s), task eta: %ss",
+            progress["hosts_done"],
+            progress["total_hosts"] if progress["total_hosts"] is not None else "?",
+            progress["hosts_failed"],
+            progress["hosts_unreachable"],
+            progress["current_task"],
+            progress["tasks_started"],
+            progress["task_eta"],
+        )
+        if self._runner_idents:
+            # read by the provider API for runs still in progress
+            write_progress(
+                os.path.join(self.artifact_dir, self._runner_idents[-1]),
+                {
+                    **progress,
+                    "dag_id": self.dag_id,
+                    "task_id": self.task_id,
+                    "run_id": self._context["run_id"],
+                },
+            )
+        if self.progress_xcom:
+            self._context["ti"].xcom_push(key="progress", value=progress)
+
+    def _retry_state_key(self, context: Context) -> str:
+        ti = context["ti"]
+        return state_key(
+            self.dag_id, context["run_id"], self.task_id, getattr(ti, "map_index", -1)
+        )
+
+    def _load_retry_state(self, context: Context):
+        """Narrow the run to the hosts that did not succeed in the previous try"""
+        try_number = getattr(context["ti"], "try_number", 1) or 1
+        if try_number <= 1:
+            return
+        state = load_state(
+            self.artifact_dir, self._retry_state_key(context), self.s3_conn_id
+        )
+        if not state:
+            self.log.info("No state from a previous try, running all hosts")
+            return
+        succeeded = succeeded_hosts(state)
+        universe = inventory_hosts(self.inventory)
+        if universe is not None:
+            # also rerun the hosts that never reported, e.g. after a cancel
+            rerun = universe - succeeded
+            if not rerun:
+                self.log.info("Previous try had no failed host, running all hosts")
+                return
+            self._limit_hosts = rerun
+        elif succeeded:
+            # the inventory is not a dict, leave the succeeded hosts out instead
+            self._exclude_hosts |= succeeded
+        self.log.info(
+            "Try %s: rerunning %s hosts, keeping %s succeeded hosts of try %s",
+            try_number,
+            len(rerun) if universe is not None else "all other",
+            len(succeeded),
+            state.get("try_number"),
+        )
+        self._retry_state = state
+
+    def _merge_retry_state(self, context: Context):
+        """Merge this try with the previous ones and persist the result for the next try"""
+        ansible_return = context["ansible_return"]
+        previous = self._retry_state or {}
+        rerun = rerun_hosts(previous)
+        hosts = merge_by_host(
+            previous.get("hosts"),
+            try_host_status(ansible_return, self._progress.host_status),
+            rerun,
+        )
+        ansible_return["stats"] = merge_stats(
+            previous.get("stats"), ansible_return["stats"], rerun
+        )
+        if self.get_ci_events:
+            ansible_return["ci_events"] = merge_by_host(
+                previous.get("ci_events"), ansible_return["ci_events"], rerun
+            )
+        try_number = getattr(context["ti"], "try_number", 1) or 1
+        pending = sorted(h for h, status in hosts.items() if status not in ("ok", "skipped"))
+        ansible_return["retry"] = {
+            "try_number": try_number,
+            "rerun_hosts": (
+                len(self._limit_hosts if self._limit_hosts is not None else rerun)
+                if self._retry_state
+                else None
+            ),
+            "previous_succeeded": len(succeeded_hosts(previous)) if previous else 0,
+            "pending_hosts": pending,
+            "host_status": hosts,
+        }
+        state = {
+            "try_number": try_number,
+            "hosts": hosts,
+            "stats": ansible_return["stats"],
+        }
+        if self.get_ci_events:
+            state["ci_events"] = ansible_return["ci_events"]
+        save_state(
+            self.artifact_dir, self._retry_state_key(context), state, self.s3_conn_id
+        )
+
+    def _select_changed_hosts(self):
+        """Narrow the run to the hosts whose fingerprint changed since their last successful run"""
+        fingerprints = host_fingerprints(self.inventory, self._run_inputs())
+        if fingerprints is None:
+            self.log.warning("converge_changed_hosts needs a dict inventory, running all hosts")
+            return
+        changed = FingerprintStore(self.artifact_dir, self.dag_id, self.task_id).changed(
+            fingerprints, self.host_fingerprint_ttl
+        )
+        self.log.info(
+            "%s of %s hosts changed since their last successful run",
+            len(changed),
+            len(fingerprints),
+        )
+        self._fingerprints = fingerprints
+        self._convergence = {
+            "hosts": len(fingerprints),
+            "changed": len(changed),
+            "unchanged": len(fingerprints) - len(changed),
+            "converged": 0,
+        }
+        self._limit_hosts = (
+            changed if self._limit_hosts is None else self._limit_hosts & changed
+        )
+
+    def _record_converged_hosts(self, context: Context):
+        """Store the fingerprints of the hosts that succeeded in this run"""
+        # only a run that went to its end converged its hosts, ignored and rescued errors included
+        converged = {
+            host: self._fingerprints[host]
+            for host, status in final_host_status(context["ansible_return"]).items()
+            if status == "ok" and host in self._fingerprints
+        }
+        FingerprintStore(self.artifact_dir, self.dag_id, self.task_id).update(converged)
+        self._convergence["converged"] = len(converged)
+        context["ansible_return"]["convergence"] = self._convergence
+
+    def _get_health_store(self) -> HostHealthStore:
+        options = dict(self.host_health or {})
+        options.pop("exclude", None)
+        path = options.pop("path", None) or os.path.join(self.artifact_dir, DEFAULT_HEALTH_DB)
+        return HostHealthStore(path, **options)
+
+    def _exclude_unhealthy_hosts(self):
+        """Leave out the hosts that the health store currently excludes"""
+        universe = (
+            self._limit_hosts
+            if self._limit_hosts is not None
+            else resolve_inventory_hosts(self.inventory)
+        )
+        exclude = self.host_health.get("exclude", True)
+        if universe is None:
+            # the store is shared, without the hosts of this inventory it would list other DAGs' hosts
+            self.log.warning(
+                "Cannot list the hosts of inventory %s, not excluding unhealthy hosts",
+                self.inventory,
+            )
+            self._health_report = {"excluded": {}, "exclude": False}
+            return
+        excluded = self._get_health_store().excluded(universe)
+        self._health_report = {"excluded": excluded, "exclude": exclude}
+        if not excluded:
+            return
+        self.log.warning(
+            "%s %s hosts unreachable in previous runs: %s",
+            "Excluding" if exclude else "Not excluding",
+            len(excluded),
+            ", ".join(sorted(excluded)[:20]),
+        )
+        if not exclude:
+            return
+        self._limit_hosts = universe - set(excluded)
+
+    def _record_host_health(self, context: Context):
+        """Feed the outcome of every host of this run to the health store"""
+        reachable = [
+            host
+            for host, status in self._progress.host_status.items()
+            if status != "unreachable"
+        ]
+        unreachable = {
+            host: self._unreachable_errors.get(host)
+            for host, status in self._progress.host_status.items()
+            if status == "unreachable"
+        }
+        self._health_report["recorded"] = self._get_health_store().record(
+            reachable, unreachable
+        )
+        context["ansible_return"]["host_health"] = self._health_report
+
+    def _skipped_return(self, reason: str) -> dict:
+        """``ansible_return`` of a run that had nothing to do"""
+        return {
+            "canceled": False,
+            "errored": False,
+            "rc": 0,
+            "stats": None,
+            "status": "successful",
+            "timed_out": False,
+            "cached": False,
+            "skipped": reason,
+            "ident": None,
+            "playbook": self.playbook,
+            "last_event": {},
+            "ci_events": {},
+            "progress": self._progress.snapshot(),
+            "timings": self._get_timer().as_dict(),
+        }
+
+    def _limit_file(self) -> str | None:
+        """Write the host limit to a file, large host lists do not fit on a command line"""
+        if self._limit_hosts is None and not self._exclude_hosts:
+            return None
+        if self._limit_hosts is not None:
+            patterns = sorted(self._limit_hosts)
+        else:
+            patterns = ["all"] + sorted(f"!{host}" for host in self._exclude_hosts)
+        fd, path = tempfile.mkstemp(
+            prefix="limit-", suffix=".txt", dir=self._private_data_dir()
+        )
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write("\n".join(patterns) + "\n")
+        return path
+
+    def _get_timer(self) -> PhaseTimer:
+        if self._timer is None:
+            self._timer = PhaseTimer(
+                tags={"dag_id": self.dag_id, "task_id": self.task_id},
+                emit_spans=self.emit_timing_spans,
             )
-            self._runner_ident = data.get("runner_ident")
+        return self._timer
 
     def _calculate_cache_hash(self) -> Tuple[str, str]:
         """
@@ -269,47 +834,55 @@ class AnsibleOperator(PythonVirtualenvOperator):
         return requirements_hash[:8], hash_text
 
     def _install_galaxy_packages(self):
-        if self.venv_cache_path:
-            self._env_dir = self._ensure_venv_cache_exists(Path(self.venv_cache_path))
-        else:
-            self._tmp_dir = TemporaryDirectory(prefix="venv-")
-            self._env_dir = Path(self._tmp_dir.name)
-            self._prepare_venv(self._env_dir)
-        self._bin_path = self._env_dir / "bin"
+        timer = self._get_timer()
+        with timer.span("venv"):
+            if self.venv_cache_path:
+                self._env_dir = self._ensure_venv_cache_exists(Path(self.venv_cache_path))
+            else:
+                self._tmp_dir = TemporaryDirectory(prefix="venv-")
+                self._env_dir = Path(self._tmp_dir.name)
+                self._prepare_venv(self._env_dir)
+            self._bin_path = self._env_dir / "bin"
         if self.galaxy_collections:
-            ansible_galaxy_binary = self._bin_path / "ansible-galaxy"
-            if not (
-                ansible_galaxy_binary.exists()
-                and ansible_galaxy_binary.is_file()
-                and os.access(ansible_galaxy_binary, os.X_OK)
-            ):
-                ansible_galaxy_binary = "/home/airflow/.local/bin/ansible-galaxy"
-            for galaxy_pkg in self.galaxy_collections or []:
-                execute_in_subprocess_with_kwargs(
-                    cmd=[
-                        str(ansible_galaxy_binary),
-                        "collection",
-                        "install",
-                        f"{galaxy_pkg}",
-                        "--collections-path",
-                        str(self._env_dir / ".ansible" / "collections"),
-                    ],
-                    env=(
-                        {
-                            "HTTPS_PROXY": Variable.get("ANSIBLE_GALAXY_PROXY", ""),
-                            "PYTHONPATH": ":".join(sys.path),
-                            "HOME": self._env_dir,
-                        }
-                        if self._env_dir
-                        else None
-                    ),
+            with timer.span("galaxy_install"):
+                ansible_galaxy_binary = self._bin_path / "ansible-galaxy"
+                if not (
+                    ansible_galaxy_binary.exists()
+                    and ansible_galaxy_binary.is_file()
+                    and os.access(ansible_galaxy_binary, os.X_OK)
+                ):
+                    ansible_galaxy_binary = "/home/airflow/.local/bin/ansible-galaxy"
+                for galaxy_pkg in self.galaxy_collections or []:
+                    execute_in_subprocess_with_kwargs(
+                        cmd=[
+                            str(ansible_galaxy_binary),
+                            "collection",
+                            "install",
+                            f"{galaxy_pkg}",
+                            "--collections-path",
+                            str(self._env_dir / ".ansible" / "collections"),
+                        ],
+                        env=(
+                            {
+                                "HTTPS_PROXY": Variable.get("ANSIBLE_GALAXY_PROXY", ""),
+                                "PYTHONPATH": ":".join(sys.path),
+                                "HOME": self._env_dir,
+                            }
+                            if self._env_dir
+                            else None
+                        ),
+                    )
+                self._collections_paths.append(
+                    str(self._env_dir / ".ansible" / "collections")
                 )
-            self._collections_paths.append(
-                str(self._env_dir / ".ansible" / "collections")
-            )
 
     @prepare_lineage
     def pre_execute(self, context: Context):
+        self._timer = None
+        with self._get_timer().span("pre_execute"):
+            self._pre_execute(context)
+
+    def _pre_execute(self, context: Context):
         if isinstance(self.ansible_vars, airflow.models.xcom_arg.PlainXComArg):
             self.ansible_vars = self.ansible_vars.resolve(context)
         if self.ansible_vars:
@@ -320,6 +893,10 @@ class AnsibleOperator(PythonVirtualenvOperator):
             value = getattr(self, attr)
             if isinstance(value, airflow.models.xcom_arg.PlainXComArg):
                 setattr(self, attr, value.resolve(context))
+        # ansible_vars and XComs may override it
+        self._check_result_mode()
+        with self._get_timer().span("resolve_blobs"):
+            self._resolve_blob_refs()
 
         # for t in self.kms_keys or []:
         #     pwdKey, pwdValue = get_secret(token=t)
@@ -331,12 +908,13 @@ class AnsibleOperator(PythonVirtualenvOperator):
             self.path,
             self.playbook,
         )
-        if self._tmp_playbook:
-            self.project_dir = self._tmp_playbook.name
-            self.playbook = os.path.join(self.project_dir, "playbook.yml")
-            with open(self.playbook, "w", encoding="utf-8") as f:
-                playbook_data = base64.b64decode(self.playbook_yaml).decode("utf-8")
-                f.write(playbook_data)
+        if self.playbook_yaml:
+            # written once per content and reused, not per parse or per run
+            self.project_dir = materialize_playbook(
+                self.playbook_yaml,
+                os.path.join(self._private_data_dir(), PLAYBOOK_CACHE_DIR),
+            )
+            self.playbook = os.path.join(self.project_dir, PLAYBOOK_FILE)
         else:
             self.log.info(
                 "project_dir: %s, project path: %s, playbook: %s",
@@ -353,6 +931,79 @@ class AnsibleOperator(PythonVirtualenvOperator):
             if not os.path.exists(self.artifact_dir):
                 os.makedirs(self.artifact_dir)
 
+        if isinstance(self.inventory, dict):
+            with self._get_timer().span("inventory"):
+                self._prepare_inventory()
+        # tip: this will default inventory was a str for path, cannot pass it as ini
+        if isinstance(self.inventory, str):
+            self.inventory = os.path.join(self.project_dir, self.path, self.inventory)
+        self._cached_result = None
+        if self.result_cache_ttl is not None:
+            with self._get_timer().span("result_cache"):
+                self._lookup_result_cache()
+        # 处理 galaxy_collections
+        if self.galaxy_collections is not None and self._cached_result is None:
+            self._install_galaxy_packages()
+
+    def _check_result_mode(self):
+        if self.result_mode not in RESULT_MODES:
+            raise AirflowException(
+                f"result_mode must be one of {RESULT_MODES}, got {self.result_mode!r}"
+            )
+
+    def _get_result_cache(self) -> ResultCache:
+        return ResultCache(
+            self.result_cache_dir or os.path.join(self.artifact_dir, "result_cache"),
+            max_entries=self.result_cache_max_entries,
+        )
+
+    def _run_inputs(self) -> dict:
+        """Inputs that define what the playbook does, apart from the inventory"""
+        project_dir = os.path.join(self.project_dir, self.path)
+
+        def _playbook(playbook: str) -> str:
+            return file_hash(os.path.join(project_dir, playbook)) or playbook
+
+        return {
+            "playbook": _playbook(self.playbook),
+            "playbooks": [
+                [_playbook(p) for p in step]
+                if isinstance(step, (list, tuple))
+                else _playbook(step)
+                for step in self.playbooks or []
+            ],
+            "git": git_head(self.project_dir),
+            "path": self.path,
+            "extravars": self.extravars,
+            "tags": self.tags,
+            "skip_tags": self.skip_tags,
+            "roles_path": self.roles_path,
+            "venv": self._calculate_cache_hash()[0],
+            "requirements": self.requirements,
+        }
+
+    def _lookup_result_cache(self):
+        """Hash the inputs of the run and look up a cached result for them"""
+        inventory = self.inventory
+        if isinstance(inventory, str) and os.path.isfile(inventory):
+            inventory = {"file": file_hash(inventory)}
+        self._result_cache_key = content_hash(
+            dict(self._run_inputs(), inventory=inventory)
+        )
+        cache = self._get_result_cache()
+        if self.result_cache_refresh:
+            cache.invalidate(self._result_cache_key)
+            return
+        self._cached_result = cache.get(self._result_cache_key)
+        if self._cached_result is not None:
+            self.log.info(
+                "Result cache hit %s, created at %s",
+                self._result_cache_key,
+                datetime.datetime.fromtimestamp(self._cached_result["created"]),
+            )
+
+    def _prepare_inventory(self):
+        """Apply the Variable driven ssh arguments and become settings to a dict inventory"""
         # 处理 ansible inventory数据
         if isinstance(
             self.inventory, dict
@@ -435,19 +1086,146 @@ class AnsibleOperator(PythonVirtualenvOperator):
                     self.inventory["all"]["vars"][
                         "ansible_become_flags"
                     ] = self.become_flags
-        # tip: this will default inventory was a str for path, cannot pass it as ini
-        if isinstance(self.inventory, str):
-            self.inventory = os.path.join(self.project_dir, self.path, self.inventory)
-        # 处理 galaxy_collections
-        if self.galaxy_collections is not None:
-            self._install_galaxy_packages()
 
     def execute(self, context: Context):
+        self._last_return = None
+        if self._cached_result is not None:
+            return self._execute_cached(context)
+        try:
+            with self._get_timer().span("execute"):
+                result = self._execute(context)
+        finally:
+            self._last_return = context.get("ansible_return")
+            for ident in self._runner_idents:
+                unmark(os.path.join(self.artifact_dir, ident), IN_PROGRESS_MARKER)
+        self._get_timer().emit("event_handler")
+        context["ansible_return"]["timings"] = self._get_timer().as_dict()
+        retry = context["ansible_return"].get("retry")
+        if retry and (retry["pending_hosts"] or result["status"] != "successful"):
+            # fail so Airflow retries, the next try only runs the pending hosts
+            raise AirflowException(
+                f"Ansible run {result['status']}, {len(retry['pending_hosts'])} hosts did not succeed: "
+                f"{', '.join(retry['pending_hosts'][:20])}"
+            )
+        # a run limited to some hosts or skipped did not run the whole inventory the key stands for
+        if (
+            self.result_cache_ttl is not None
+            and self._result_cache_key
+            and result["status"] == "successful"
+            and not context["ansible_return"].get("skipped")
+            and self._limit_hosts is None
+            and not self._exclude_hosts
+        ):
+            try:
+                self._get_result_cache().put(
+                    self._result_cache_key,
+                    context["ansible_return"],
+                    self.result_cache_ttl,
+                    metadata={
+                        "s3_key": context.get("s3_key"),
+                        "s3_path_url": context.get("s3_path_url"),
+                    },
+                )
+            except Exception as e:
+                self.log.warning("Failed to store result in cache, Error: %s", e)
+        return self._shape_result(context, result)
+
+    def _execute_cached(self, context: Context):
+        """Return the cached result without starting ansible-runner"""
+        ansible_return = dict(self._cached_result["ansible_return"])
+        ansible_return["cached"] = True
+        ansible_return["cache"] = {
+            "key": self._result_cache_key,
+            "created": self._cached_result["created"],
+            "expires": self._cached_result["expires"],
+        }
+        ansible_return["timings"] = self._get_timer().as_dict()
+        context["ansible_return"] = ansible_return
+        for k, v in self._cached_result.get("metadata", {}).items():
+            if v is not None:
+                context[k] = v
+        if context.get("s3_path_url"):
+            context["ti"].xcom_push(key="s3_path_url", value=context["s3_path_url"])
+        return self._shape_result(context, ansible_return)
+
+    def _shape_result(self, context: Context, ansible_return: dict) -> dict:
+        """Apply ``result_mode`` to the value returned to XCom"""
+        if self.result_mode == RESULT_MODE_SUMMARY or (
+            self.result_mode == RESULT_MODE_REFERENCE and not ansible_return.get("ident")
+        ):
+            # a run without ident has no artifacts to point to
+            return summarize_result(ansible_return)
+        if self.result_mode == RESULT_MODE_REFERENCE:
+            path = os.path.join(
+                self.artifact_dir, f"{ansible_return['ident']}", "ansible_return.json"
+            )
+            # save_on_s3 already wrote it, rewrite to include the final timings
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(ansible_return, f, indent=4)
+            return reference_result(
+                ansible_return,
+                path,
+                s3_conn_id=self.s3_conn_id if context.get("s3_key") else None,
+                s3_key=context.get("s3_key"),
+                s3_url=context.get("s3_path_url"),
+            )
+        return ansible_return
+
+    def _execute(self, context: Context):
         self._context = context
+        self._run = None
+        self._watchdog = None
+        self._host_results = HostResultTable() if self.host_results else None
+        self._outcomes = {} if self.group_outcomes else None
+        self._run_index = self._get_run_index() if self.run_index is not None else None
+        self._limit_hosts = None
+        self._retry_state = None
+        self._fingerprints = None
+        self._convergence = None
+        self._exclude_hosts = set()
+        if self.retry_failed_hosts_only:
+            self._load_retry_state(context)
+        self._unreachable_errors = {}
+        self._health_report = None
+        if self.converge_changed_hosts:
+            with self._get_timer().span("fingerprint"):
+                self._select_changed_hosts()
+        if self.host_health is not None:
+            with self._get_timer().span("host_health"):
+                self._exclude_unhealthy_hosts()
+        if self._limit_hosts == set():
+            self.log.info("No host left to run, skipping the run")
+            context["ansible_return"] = self._skipped_return("no host left to run")
+            if self._convergence is not None:
+                context["ansible_return"]["convergence"] = self._convergence
+            if self._health_report is not None:
+                context["ansible_return"]["host_health"] = self._health_report
+            return context["ansible_return"]
+        hosts = self._limit_hosts or inventory_hosts(self.inventory)
+        self._progress = ProgressTracker(total_hosts=len(hosts) if hosts else None)
+        self._breaker = CircuitBreaker(
+            max_fail_percentage=self.max_fail_percentage,
+            max_unreachable_percentage=self.max_unreachable_percentage,
+            min_hosts=self.breaker_min_hosts,
+        )
+        reporter = None
+        if self.progress_interval:
+            reporter = ProgressReporter(
+                self._progress, self.progress_interval, self._report_progress
+            )
+            reporter.start()
+        if self.host_watchdog is not None:
+            self._watchdog = HostWatchdog(
+                stall_timeout=self.host_watchdog.get("stall_timeout", 900),
+                kill_grace=self.host_watchdog.get("kill_grace", 60),
+                on_stall=self._stop_stalled_host,
+            )
+            self._watchdog.start()
         self.log.info(
             "playbook: %s, roles_path: %s, project_dir: %s, inventory: %s, project_dir: %s, extravars: %s, tags: %s, "
             "skip_tags: %s",
-            self.playbook,
+            self.playbooks or self.playbook,
             self.roles_path,
             self.project_dir,
             self.inventory,
@@ -456,6 +1234,7 @@ class AnsibleOperator(PythonVirtualenvOperator):
             self.tags,
             self.skip_tags,
         )
+        ansible_binary = "ansible-playbook"
         if self._bin_path is not None:
             ansible_binary = self._bin_path / "ansible-playbook"
             if not (
@@ -464,29 +1243,180 @@ class AnsibleOperator(PythonVirtualenvOperator):
                 and os.access(ansible_binary, os.X_OK)
             ):
                 ansible_binary = "/home/airflow/.local/bin/ansible-playbook"
-        r = ansible_runner.run(
-            binary=ansible_binary,
-            cmdline=self.playbook,  # fix: ansible_runner.run ExecutionMode.RAW for binary is set
-            envvars={"ANSIBLE_COLLECTIONS_PATH": ":".join(self._collections_paths)},
-            ssh_key=self._ansible_hook.pkey,
-            passwords=[self._ansible_hook.password],
-            quiet=True,
-            roles_path=self.roles_path,
-            tags=",".join(self.tags) if self.tags else None,
-            skip_tags=",".join(self.skip_tags) if self.skip_tags else None,
-            artifact_dir=self.artifact_dir,
-            project_dir=os.path.join(self.project_dir, self.path),
-            playbook=self.playbook,
-            extravars=self.extravars,
-            forks=self.forks,
-            timeout=self.ansible_timeout,
-            inventory=self.inventory,
-            event_handler=self.event_handler,
-            # status_handler=my_status_handler, # Disable printing to prevent sensitive information leakage, also unnecessary
-            # artifacts_handler=my_artifacts_handler, # No need to print
-            # cancel_callback=my_cancel_callback,
-            # finished_callback=finish_callback,  # No need to print
+        pool_status = None
+        if self.executor_command:
+            ansible_binary = self.executor_binary or "ansible-playbook"
+        elif self.controller_pool is not None:
+            with self._get_timer().span("controller_pool"):
+                pooled = ensure_pool(
+                    ansible_binary,
+                    pool_dir=os.path.join(self._private_data_dir(), "controller_pool"),
+                    **self.controller_pool,
+                )
+            if pooled is None:
+                self.log.warning("Controller pool did not start, running ansible-playbook directly")
+            else:
+                ansible_binary, pool_status = pooled
+        # on_kill stops every child started from here on, not the controller pool
+        self._child_baseline = child_pids()
+        self._run_started = time.time()
+        # ssh masters of this task only, closed after the run or by on_kill; a batch reuses them across playbooks
+        self._control_path_dir = tempfile.mkdtemp(prefix="cp-", dir=self._private_data_dir())
+        try:
+            with self._get_timer().span("ansible_runner"):
+                if self.playbooks:
+                    context["ansible_return"] = self._run_batch(ansible_binary)
+                else:
+                    self._run = RunState(self.playbook, self.latency_top_n, self._progress)
+                    self.ci_events = self._run.ci_events
+                    r = self._run_ansible(ansible_binary, self._run)
+                    self.last_event = self._run.last_event
+                    context["ansible_return"] = self._runner_return(r, self._run)
+        finally:
+            # failures of hosts cut off by a cancel or timeout are final
+            self._progress.settle()
+            if reporter is not None:
+                reporter.stop()
+            if self._watchdog is not None:
+                self._watchdog.stop()
+            control_path_dir, self._control_path_dir = self._control_path_dir, None
+            close_control_sockets(control_path_dir)
+        if pool_status is not None:
+            runs = len(context["ansible_return"].get("playbooks") or [None])
+            context["ansible_return"]["controller_pool"] = {
+                "zygote_pid": pool_status["pid"],
+                "zygote_jobs": pool_status["jobs"] + runs,
+                "max_jobs": pool_status["max_jobs"],
+                "preload_seconds": pool_status["preload_seconds"],
+                # imports each job did not have to do
+                "estimated_saving_seconds": round(pool_status["preload_seconds"] * runs, 3),
+            }
+        context["ansible_return"].update(
+            {
+                "progress": self._progress.snapshot(),
+                "circuit_breaker": self._breaker.as_dict(),
+                "watchdog": self._watchdog.report() if self._watchdog is not None else None,
+                # phases finished so far, completed by execute() once save_on_s3 is done
+                "timings": self._get_timer().as_dict(),
+            }
+        )
+        if self.retry_failed_hosts_only:
+            self._merge_retry_state(context)
+        if self._fingerprints is not None:
+            self._record_converged_hosts(context)
+        if self._health_report is not None:
+            try:
+                self._record_host_health(context)
+            except Exception as e:
+                self.log.warning("Failed to update host health, Error: %s", e)
+        if self._outcomes is not None:
+            self._apply_outcome_groups(context)
+        if self._host_results is not None:
+            try:
+                with self._get_timer().span("host_results"):
+                    export = self._host_results.write(
+                        os.path.join(self.artifact_dir, context["ansible_return"]["ident"]),
+                        self.host_results,
+                    )
+                context["ansible_return"]["host_results"] = {
+                    "file": os.path.basename(export["path"]),
+                    "format": export["format"],
+                    "rows": export["rows"],
+                }
+            except Exception as e:
+                self.log.warning("Failed to write host results, Error: %s", e)
+        try:
+            with self._get_timer().span("save_on_s3"):
+                self.save_on_s3(context)
+            self.log.info("Saved on s3: %s", context.get("s3_path_url"))
+        except Exception as e:
+            self.log.warning("Failed to save on s3, Error: %s", e)
+        if self._run_index is not None:
+            try:
+                with self._get_timer().span("run_index"):
+                    self._record_run_index(context)
+            except Exception as e:
+                self.log.warning("Failed to update the run index, Error: %s", e)
+        if self.artifact_retention:
+            retention = dict(self.artifact_retention)
+            try:
+                with self._get_timer().span("retention"):
+                    context["ansible_return"]["retention"] = maybe_sweep(
+                        self.artifact_dir, retention.pop("interval", 3600), **retention
+                    )
+            except Exception as e:
+                self.log.warning("Failed to sweep artifacts, Error: %s", e)
+        return context["ansible_return"]
+
+    def _get_run_index(self) -> RunIndex:
+        options = self.run_index or {}
+        return RunIndex(
+            options.get("path") or os.path.join(self.artifact_dir, DEFAULT_RUN_INDEX_DB),
+            batch_size=options.get("batch_size", 1000),
+        )
+
+    def _record_run_index(self, context: Context):
+        """Insert the remaining task results and one summary row per ansible-runner run"""
+        self._run_index.flush()
+        ansible_return = context["ansible_return"]
+        finished = time.time()
+        for run_result in ansible_return.get("playbooks") or [ansible_return]:
+            stats = run_result.get("stats") or {}
+            self._run_index.record_run(
+                {
+                    "ident": run_result["ident"],
+                    "dag_id": self.dag_id,
+                    "task_id": self.task_id,
+                    "run_id": context["run_id"],
+                    "try_number": getattr(context["ti"], "try_number", None),
+                    "playbook": run_result["playbook"],
+                    "status": run_result["status"],
+                    "rc": run_result["rc"],
+                    "started": self._run_started,
+                    "finished": finished,
+                    "hosts": len(stats.get("processed") or {}),
+                    "failed": len(stats.get("failures") or {}),
+                    "unreachable": len(stats.get("dark") or {}),
+                    "changed": len(stats.get("changed") or {}),
+                    "s3_path_url": context.get("s3_path_url"),
+                }
+            )
+        options = dict(self.run_index or {})
+        maintenance = self._run_index.maintain(
+            detail_days=options.get("detail_days", 30),
+            retention_days=options.get("retention_days", 365),
+            interval=options.get("interval", 3600),
         )
+        ansible_return["run_index"] = {
+            "path": self._run_index.path,
+            "maintenance": maintenance,
+        }
+
+    def _apply_outcome_groups(self, context: Context):
+        """Replace the per-host results by one entry per distinct outcome, once nothing needs them per host"""
+        ansible_return = context["ansible_return"]
+        groups = outcome_groups(self._outcomes)
+        ansible_return["outcomes"] = groups
+        if self.get_ci_events:
+            ansible_return["ci_events"] = group_ci_events(ansible_return["ci_events"])
+            for run_result in ansible_return.get("playbooks") or []:
+                run_result["ci_events"] = group_ci_events(run_result["ci_events"])
+            ansible_return["ci_events_grouped"] = True
+        self.log.info("%s hosts in %s distinct outcomes", len(self._outcomes), len(groups))
+        for line in format_outcomes(groups):
+            self.log.info("outcome: %s", line)
+        try:
+            with open(
+                os.path.join(self.artifact_dir, ansible_return["ident"], OUTCOMES_FILE),
+                "w",
+                encoding="utf-8",
+            ) as f:
+                json.dump(groups, f)
+        except OSError as e:
+            self.log.warning("Failed to write %s, Error: %s", OUTCOMES_FILE, e)
+
+    def _runner_return(self, r, run: RunState) -> dict:
+        """``ansible_return`` of one ansible-runner run"""
         self.log.info(
             "status: %s, artifact_dir: %s, command: %s, inventory: %s, playbook: %s, private_data_dir: %s, "
             "project_dir: %s, ci_events: %s",
@@ -497,9 +1427,9 @@ class AnsibleOperator(PythonVirtualenvOperator):
             r.config.playbook,
             r.config.private_data_dir,
             r.config.project_dir,
-            self.ci_events,
+            run.ci_events,
         )
-        context["ansible_return"] = {
+        return {
             "canceled": r.canceled,
             "directory_isolation_cleanup": r.directory_isolation_cleanup,
             "directory_isolation_path": r.directory_isolation_path,
@@ -510,9 +1440,10 @@ class AnsibleOperator(PythonVirtualenvOperator):
             "rc": r.rc,
             "remove_partials": r.remove_partials,
             "runner_mode": r.runner_mode,
-            "stats": r.stats,
+            "stats": r.stats or run.stats,
             "status": r.status,
             "timed_out": r.timed_out,
+            "cached": False,
             # config
             "artifact_dir": r.config.artifact_dir,
             "command": r.config.command,
@@ -525,15 +1456,141 @@ class AnsibleOperator(PythonVirtualenvOperator):
             "private_data_dir": r.config.private_data_dir,
             "project_dir": r.config.project_dir,
             # event
-            "last_event": self.last_event,
+            "last_event": run.last_event,
+            "ci_events": run.ci_events,
+            "latency": run.latency.summary(),
+        }
+
+    def _run_batch(self, ansible_binary) -> dict:
+        """Run ``playbooks`` step by step, the playbooks of a list step in parallel"""
+        self.ci_events = {}
+        return self._combine_batch(self._run_batch_steps(ansible_binary))
+
+    def _run_batch_steps(self, ansible_binary) -> list[dict]:
+        results = []
+        for step in self.playbooks:
+            group = list(step) if isinstance(step, (list, tuple)) else [step]
+            runs = [RunState(playbook, self.latency_top_n) for playbook in group]
+            self.log.info("Running playbooks: %s", ", ".join(group))
+            if len(runs) == 1:
+                runners = [self._run_ansible(ansible_binary, runs[0])]
+            else:
+                with ThreadPoolExecutor(
+                    max_workers=len(runs), thread_name_prefix="ansible-batch"
+                ) as executor:
+                    runners = list(
+                        executor.map(partial(self._run_ansible, ansible_binary), runs)
+                    )
+            step_results = [self._runner_return(r, run) for r, run in zip(runners, runs)]
+            for result, run in zip(step_results, runs):
+                run.progress.settle()
+                result["progress"] = run.progress.snapshot()
+            results.extend(step_results)
+            if self._kill_requested:
+                break
+            if any(result["status"] != "successful" for result in step_results):
+                self.log.error("Playbook failed, not running the rest of the batch")
+                break
+        return results
+
+    def _combine_batch(self, results: list[dict]) -> dict:
+        """Top level ``ansible_return`` of a batch"""
+        for run_result in results:
+            self.ci_events.update(run_result["ci_events"])
+        failed = next((r for r in results if r["status"] != "successful"), None)
+        head = failed or results[-1]
+        return {
+            "canceled": any(r["canceled"] for r in results),
+            "errored": any(r["errored"] for r in results),
+            "rc": head["rc"],
+            "stats": combine_stats([r["stats"] for r in results]),
+            "status": head["status"],
+            "timed_out": any(r["timed_out"] for r in results),
+            "cached": False,
+            "artifact_dir": self.artifact_dir,
+            "ident": results[0]["ident"],
+            "inventory": results[0]["inventory"],
+            "playbook": [r["playbook"] for r in results],
+            "private_data_dir": results[0]["private_data_dir"],
+            "project_dir": results[0]["project_dir"],
+            "last_event": head["last_event"],
             "ci_events": self.ci_events,
+            "latency": None,
+            "playbooks": results,
+            "skipped_playbooks": [
+                playbook
+                for step in self.playbooks
+                for playbook in (step if isinstance(step, (list, tuple)) else [step])
+            ][len(results):],
         }
+
+    def _private_data_dir(self) -> str:
+        os.makedirs(ANSIBLE_PRIVATE_DATA_DIR, exist_ok=True)
+        return ANSIBLE_PRIVATE_DATA_DIR
+
+    def _run_ansible(self, ansible_binary, run: RunState):
+        limit_file = self._limit_file()
         try:
-            self.save_on_s3(context)
-            self.log.info("Saved on s3: %s", context.get("s3_path_url"))
-        except Exception as e:
-            self.log.warning("Failed to save on s3, Error: %s", e)
-        return context["ansible_return"]
+            return self._run_ansible_runner(
+                ansible_binary, run, f"@{limit_file}" if limit_file else None
+            )
+        finally:
+            run.close()
+            if limit_file:
+                os.remove(limit_file)
+
+    def _envvars(self) -> dict:
+        envvars = dict(self.ansible_envvars)
+        envvars["ANSIBLE_COLLECTIONS_PATH"] = ":".join(self._collections_paths)
+        if self.host_watchdog is not None and self.host_watchdog.get("task_timeout", True):
+            envvars.setdefault(
+                "ANSIBLE_TASK_TIMEOUT", str(int(self.host_watchdog.get("stall_timeout", 900)))
+            )
+        if self._control_path_dir is not None:
+            envvars.setdefault("ANSIBLE_SSH_CONTROL_PATH_DIR", self._control_path_dir)
+        if self._control_path_dir is not None and self.playbooks:
+            # keep the connections open between the playbooks of the batch
+            envvars.setdefault(
+                "ANSIBLE_SSH_ARGS", "-C -o ControlMaster=auto -o ControlPersist=300s"
+            )
+        return envvars
+
+    def _run_ansible_runner(self, ansible_binary, run: RunState, limit):
+        runner_kwargs = dict(
+            binary=ansible_binary,
+            cmdline=run.playbook,  # fix: ansible_runner.run ExecutionMode.RAW for binary is set
+            envvars=self._envvars(),
+            ssh_key=self._ansible_hook.pkey,
+            passwords=[self._ansible_hook.password],
+            quiet=True,
+            roles_path=self.roles_path,
+            tags=",".join(self.tags) if self.tags else None,
+            skip_tags=",".join(self.skip_tags) if self.skip_tags else None,
+            artifact_dir=self.artifact_dir,
+            project_dir=os.path.join(self.project_dir, self.path),
+            playbook=run.playbook,
+            extravars=self.extravars,
+            forks=self.forks,
+            timeout=self.ansible_timeout,
+            inventory=self.inventory,
+            limit=limit,
+            event_handler=partial(self.event_handler, run=run),
+            # status_handler=my_status_handler, # Disable printing to prevent sensitive information leakage, also unnecessary
+            # artifacts_handler=my_artifacts_handler, # No need to print
+            cancel_callback=self._cancel_callback,
+            # finished_callback=finish_callback,  # No need to print
+        )
+        if self.executor_command:
+            return run_streamed(
+                self.executor_command,
+                runner_kwargs,
+                event_handler=runner_kwargs["event_handler"],
+                cancel_callback=self._cancel_callback,
+                work_dir=self._private_data_dir(),
+            )
+        import ansible_runner  # pylint: disable=import-outside-toplevel
+
+        return ansible_runner.run(**runner_kwargs)
 
     def save_on_s3(self, context):
         # make sure zip dir exists
@@ -554,11 +1611,16 @@ class AnsibleOperator(PythonVirtualenvOperator):
             f"{context['ansible_return']['ident']}",
             "ansible_return.json",
         )
+        latency_path = os.path.join(
+            self.artifact_dir, f"{context['ansible_return']['ident']}", "latency.json"
+        )
         # 将参数写入文件
         with open(params_file_path, "w", encoding="utf-8") as f:
             json.dump(params_file_content, f, indent=4)
         with open(ansible_return_path, "w", encoding="utf-8") as f:
             json.dump(context["ansible_return"], f, indent=4)
+        with open(latency_path, "w", encoding="utf-8") as f:
+            json.dump(context["ansible_return"]["latency"], f, indent=4)
 
         ansible_inventory_file = context["ansible_return"]["inventory"]
         ansible_stdout_file = os.path.join(
@@ -584,36 +1646,70 @@ class AnsibleOperator(PythonVirtualenvOperator):
         with zipfile.ZipFile(zip_file, "w") as z:
             z.write(params_file_path, arcname=os.path.basename(params_file_path))
             z.write(ansible_return_path, arcname=os.path.basename(ansible_return_path))
-            z.write(
-                ansible_inventory_file, arcname=os.path.basename(ansible_inventory_file)
-            )
+            z.write(latency_path, arcname=os.path.basename(latency_path))
+            if ansible_inventory_file and os.path.isfile(ansible_inventory_file):
+                z.write(
+                    ansible_inventory_file,
+                    arcname=os.path.basename(ansible_inventory_file),
+                )
             z.write(ansible_stdout_file, arcname=os.path.basename(ansible_stdout_file))
             z.write(ansible_stderr_file, arcname=os.path.basename(ansible_stderr_file))
             z.write(ansible_rc_file, arcname=os.path.basename(ansible_rc_file))
             z.write(ansible_status_file, arcname=os.path.basename(ansible_status_file))
+            outcomes_path = os.path.join(
+                self.artifact_dir, f"{context['ansible_return']['ident']}", OUTCOMES_FILE
+            )
+            if os.path.isfile(outcomes_path):
+                z.write(outcomes_path, arcname=OUTCOMES_FILE)
+            host_results = context["ansible_return"].get("host_results")
+            if host_results:
+                z.write(
+                    os.path.join(
+                        self.artifact_dir,
+                        f"{context['ansible_return']['ident']}",
+                        host_results["file"],
+                    ),
+                    arcname=host_results["file"],
+                )
+            event_log_dir = os.path.join(
+                self.artifact_dir, f"{context['ansible_return']['ident']}", "event_log"
+            )
+            if os.path.isdir(event_log_dir):
+                for name in sorted(os.listdir(event_log_dir)):
+                    z.write(
+                        os.path.join(event_log_dir, name),
+                        arcname=os.path.join("event_log", name),
+                    )
+            # batch mode: the other playbooks of the batch, one directory per ident
+            for run_result in context["ansible_return"].get("playbooks", [])[1:]:
+                run_dir = os.path.join(self.artifact_dir, run_result["ident"])
+                names = ["stdout", "stderr", "rc", "status"]
+                if os.path.isdir(os.path.join(run_dir, "event_log")):
+                    names.extend(
+                        os.path.join("event_log", name)
+                        for name in sorted(os.listdir(os.path.join(run_dir, "event_log")))
+                    )
+                for name in names:
+                    path = os.path.join(run_dir, name)
+                    if os.path.isfile(path):
+                        z.write(path, arcname=os.path.join(run_result["ident"], name))
             # z.write(ansible_command_file, arcname=os.path.basename(ansible_command_file))
 
         self.log.info("Zipped artifact path: %s", zip_file)
         # Upload the zip file to s3
         if self.s3_conn_id is None or self.s3_conn_id == "":
             raise AirflowException("s3_conn_id is not set, skip saving on s3")
-        c = Connection.get_connection_from_secrets(conn_id=self.s3_conn_id)
-        extra = json.loads(c.extra)
+        s3, extra = get_s3_client(self.s3_conn_id)
         s3_url = extra.get("url")
-        s3 = boto3.client(
-            "s3",
-            aws_access_key_id=c.login,
-            aws_secret_access_key=c.password,
-            endpoint_url=c.host,
-            config=Config(
-                s3={"addressing_style": extra.get("addressing_style", "path")}
-            ),  # idc: path, oss or aws: virtual
-            verify=False,
-        )
         zip_key = os.path.relpath(zip_file, self.artifact_dir)
         with open(zip_file, "rb") as f:
             s3.upload_fileobj(f, extra.get("bucket_name"), zip_key)
+        context["s3_key"] = zip_key
         context["s3_path_url"] = f"{s3_url}/{zip_key}"
+        # the local copies may now be reclaimed by the retention sweep
+        for ident in self._runner_idents or [context["ansible_return"]["ident"]]:
+            mark(os.path.join(self.artifact_dir, ident), UPLOADED_MARKER)
+        mark(zip_file, UPLOADED_MARKER)
         context["ti"].xcom_push(key="s3_path_url", value=context["s3_path_url"])
         self.log.info("Uploaded artifact to s3: %s", context["s3_path_url"])
 
@@ -634,5 +1730,22 @@ class AnsibleOperator(PythonVirtualenvOperator):
         Any use of the threading, subprocess or multiprocessing module within an
         operator needs to be cleaned up, or it will leave ghost processes behind.
         """
-        if self._tmp_playbook:
-            self._tmp_playbook.cleanup()
+        # stops the other batch playbooks and the streaming executor through cancel_callback
+        self._kill_requested = True
+        if self._child_baseline is not None:
+            report = terminate_children(
+                exclude=self._child_baseline, grace_period=self.kill_grace_period
+            )
+            self.log.warning(
+                "Stopped %s ansible processes with %s",
+                report["processes"],
+                ", ".join(report["signals"]) or "no signal",
+            )
+        control_path_dir = self._control_path_dir
+        if control_path_dir:
+            self.log.info(
+                "Closed %s ssh control masters", close_control_sockets(control_path_dir)
+            )
+        if self._tmp_dir is not None:
+            self._tmp_dir.cleanup()
+            self._tmp_dir = None
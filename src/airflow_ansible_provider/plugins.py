@@ -16,11 +16,52 @@
 # under the License.
 from __future__ import annotations
 
+import functools
+import os
+
 # 导入版本检测
-from airflow_ansible_provider import IS_AIRFLOW_3_PLUS
+from airflow_ansible_provider import IS_AIRFLOW_3_PLUS, listener
 from airflow.plugins_manager import AirflowPlugin
 
 
+@functools.lru_cache(maxsize=None)
+def _fastapi_apps() -> list[dict]:
+    # 只读 API, 仅 Airflow 3 的 API server 支持 fastapi_apps
+    # 只在 API server 读取 fastapi_apps 时构建, scheduler/worker 加载插件时不导入 fastapi
+    # [ansible_provider]
+    # api_enabled = True
+    # artifact_dir = /tmp/ansible/
+    # run_index_path = /tmp/ansible/run_index.sqlite
+    # api_cache_ttl = 2
+    if not IS_AIRFLOW_3_PLUS:
+        return []
+    from airflow.configuration import conf
+
+    if not conf.getboolean("ansible_provider", "api_enabled", fallback=True):
+        return []
+    from airflow_ansible_provider.api import create_app
+    from airflow_ansible_provider.hooks.ansible import ANSIBLE_ARTIFACT_DIR
+    from airflow_ansible_provider.utils.run_index import DEFAULT_RUN_INDEX_DB
+
+    artifact_dir = conf.get(
+        "ansible_provider",
+        "artifact_dir",
+        fallback=conf.get(
+            "ansible_provider", "artifact_retention_dir", fallback=ANSIBLE_ARTIFACT_DIR
+        ),
+    )
+    app = create_app(
+        artifact_dir,
+        conf.get(
+            "ansible_provider",
+            "run_index_path",
+            fallback=os.path.join(artifact_dir, DEFAULT_RUN_INDEX_DB),
+        ),
+        cache_ttl=conf.getfloat("ansible_provider", "api_cache_ttl", fallback=2.0),
+    )
+    return [{"app": app, "url_prefix": "/ansible", "name": "Ansible Provider API"}]
+
+
 class AirflowAnsiblePlugin(AirflowPlugin):
     name = "AirflowAnsiblePlugin"
 
@@ -47,7 +88,9 @@ class AirflowAnsiblePlugin(AirflowPlugin):
     macros = []
 
     # A list of dictionaries containing FastAPI app objects and some metadata
-    fastapi_apps = []
+    @property
+    def fastapi_apps(self):
+        return _fastapi_apps()
 
     # A list of dictionaries containing FastAPI middleware factory objects and some metadata
     fastapi_root_middlewares = []
@@ -64,8 +107,40 @@ class AirflowAnsiblePlugin(AirflowPlugin):
     #   to protect against extra parameters injected into the on_load(...)
     #   function in future changes
     def on_load(self, *args, **kwargs):
-        # ... perform Plugin boot actions
-        pass
+        # 按需启动 artifact 目录的周期清理
+        # [ansible_provider]
+        # artifact_retention_interval = 3600
+        # artifact_retention_dir = /tmp/ansible/
+        # artifact_retention_max_age_days = 7
+        # artifact_retention_max_bytes = 10737418240
+        # artifact_retention_max_count = 1000
+        from airflow.configuration import conf
+
+        interval = conf.getint(
+            "ansible_provider", "artifact_retention_interval", fallback=0
+        )
+        if interval <= 0:
+            return
+        from airflow_ansible_provider.utils.retention import start_periodic_sweep
+
+        quotas = {}
+        for key, getter in (
+            ("max_age_days", conf.getfloat),
+            ("max_bytes", conf.getint),
+            ("max_count", conf.getint),
+        ):
+            value = getter(
+                "ansible_provider", f"artifact_retention_{key}", fallback=None
+            )
+            if value is not None:
+                quotas[key] = value
+        start_periodic_sweep(
+            conf.get(
+                "ansible_provider", "artifact_retention_dir", fallback="/tmp/ansible/"
+            ),
+            interval,
+            **quotas,
+        )
 
     # A list of global operator extra links that can redirect users to
     # external systems. These extra links will be available on the
@@ -87,4 +162,4 @@ class AirflowAnsiblePlugin(AirflowPlugin):
     # A list of Listeners that plugin provides. Listeners can register to
     # listen to particular events that happen in Airflow, like
     # TaskInstance state changes. Listeners are python modules.
-    listeners = []
+    listeners = [listener]
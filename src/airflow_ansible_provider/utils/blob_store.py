@@ -0,0 +1,135 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+Content-addressed store for large inventories and extravars.
+
+Payloads are stored once as gzip compressed canonical JSON, keyed by the sha256 of that JSON.
+Only the short reference ``ansible-blob:sha256:<hex>`` travels through XCom; workers resolve it
+from their local cache or, when an S3 connection is given, from the artifact bucket.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any
+
+from airflow.exceptions import AirflowException
+
+BLOB_REF_PREFIX = "ansible-blob:sha256:"
+BLOB_S3_PREFIX = "blobs"
+DEFAULT_BLOB_DIR = "/tmp/ansible/blobs"
+
+
+def is_blob_ref(value: Any) -> bool:
+    """Whether ``value`` is a blob reference"""
+    return isinstance(value, str) and value.startswith(BLOB_REF_PREFIX)
+
+
+def _canonical(payload: Any) -> bytes:
+    return json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def _blob_path(store_dir: str, digest: str) -> str:
+    return os.path.join(store_dir, digest[:2], f"{digest}.json.gz")
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def put_blob(
+    payload: Any, store_dir: str | None = None, s3_conn_id: str | None = None
+) -> str:
+    """
+    Store ``payload`` and return its reference, writing nothing if the content is already stored.
+
+    :param payload: JSON serializable inventory or extravars
+    :param store_dir: Local store directory, shared by the workers or used as their cache
+    :param s3_conn_id: Also upload the blob to the artifact bucket of this connection
+    """
+    raw = _canonical(payload)
+    digest = hashlib.sha256(raw).hexdigest()
+    path = _blob_path(store_dir or DEFAULT_BLOB_DIR, digest)
+    data = None
+    if not os.path.exists(path):
+        data = gzip.compress(raw, mtime=0)
+        _atomic_write(path, data)
+    if s3_conn_id:
+        from airflow_ansible_provider.utils.s3 import (  # pylint: disable=import-outside-toplevel
+            get_s3_client,
+        )
+
+        s3, extra = get_s3_client(s3_conn_id)
+        key = f"{BLOB_S3_PREFIX}/{digest}.json.gz"
+        try:
+            s3.head_object(Bucket=extra.get("bucket_name"), Key=key)
+        except Exception:  # pylint: disable=broad-except
+            if data is None:
+                with open(path, "rb") as f:
+                    data = f.read()
+            s3.put_object(Bucket=extra.get("bucket_name"), Key=key, Body=data)
+    return f"{BLOB_REF_PREFIX}{digest}"
+
+
+def resolve_blob(
+    ref: str, cache_dir: str | None = None, s3_conn_id: str | None = None
+) -> Any:
+    """
+    Load the payload of a blob reference, caching it on this worker by hash.
+
+    :param ref: Reference returned by :func:`put_blob`
+    :param cache_dir: Local store/cache directory
+    :param s3_conn_id: Fetch blobs missing from the cache from the bucket of this connection
+    """
+    if not is_blob_ref(ref):
+        raise AirflowException(f"{ref!r} is not a blob reference")
+    digest = ref[len(BLOB_REF_PREFIX) :]
+    path = _blob_path(cache_dir or DEFAULT_BLOB_DIR, digest)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            data = f.read()
+    elif s3_conn_id:
+        from airflow_ansible_provider.utils.s3 import (  # pylint: disable=import-outside-toplevel
+            get_s3_client,
+        )
+
+        s3, extra = get_s3_client(s3_conn_id)
+        obj = s3.get_object(
+            Bucket=extra.get("bucket_name"), Key=f"{BLOB_S3_PREFIX}/{digest}.json.gz"
+        )
+        data = obj["Body"].read()
+    else:
+        raise AirflowException(f"Blob {digest} is not in {path} and no s3_conn_id is set")
+    raw = gzip.decompress(data)
+    if hashlib.sha256(raw).hexdigest() != digest:
+        raise AirflowException(f"Blob {digest} is corrupted")
+    if not os.path.exists(path):
+        _atomic_write(path, data)
+    return json.loads(raw)
@@ -0,0 +1,91 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Fail-fast circuit breaker evaluated on the live host counters of a run."""
+
+from __future__ import annotations
+
+from airflow_ansible_provider.utils.progress import ProgressTracker
+
+
+class CircuitBreaker:
+    """
+    Trip once the share of failed or unreachable hosts exceeds a threshold.
+
+    The ratios are computed over the hosts that reported a result so far, and only once at least
+    ``min_hosts`` of them did, so a couple of early failures do not cancel a large run. Only final
+    failures count: ignored errors never do, and a host that fails a task counts once it skipped the
+    next one, so hosts rescued by a ``block/rescue`` do not trip the breaker.
+
+    :param max_fail_percentage: Trip when more than this percentage of hosts failed
+    :param max_unreachable_percentage: Trip when more than this percentage of hosts are unreachable
+    :param min_hosts: Minimum number of hosts with a result before the thresholds apply
+    """
+
+    def __init__(
+        self,
+        max_fail_percentage: float | None = None,
+        max_unreachable_percentage: float | None = None,
+        min_hosts: int = 1,
+    ) -> None:
+        self.max_fail_percentage = max_fail_percentage
+        self.max_unreachable_percentage = max_unreachable_percentage
+        self.min_hosts = max(min_hosts, 1)
+        self.reason: str | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return (
+            self.max_fail_percentage is not None
+            or self.max_unreachable_percentage is not None
+        )
+
+    @property
+    def tripped(self) -> bool:
+        return self.reason is not None
+
+    def check(self, tracker: ProgressTracker) -> bool:
+        """Evaluate the thresholds against ``tracker``, O(1) so it can run on every event"""
+        if self.reason is not None or not self.enabled:
+            return self.tripped
+        done = len(tracker.host_status)
+        if done < self.min_hosts:
+            return False
+        for status, threshold in (
+            ("failed", self.max_fail_percentage),
+            ("unreachable", self.max_unreachable_percentage),
+        ):
+            if threshold is None:
+                continue
+            count = tracker.status_counts[status]
+            percentage = 100.0 * count / done
+            if percentage > threshold:
+                self.reason = (
+                    f"{count}/{done} hosts {status} ({percentage:.1f}%) "
+                    f"exceeds {threshold}%"
+                )
+                return True
+        return False
+
+    def as_dict(self) -> dict:
+        return {
+            "tripped": self.tripped,
+            "reason": self.reason,
+            "max_fail_percentage": self.max_fail_percentage,
+            "max_unreachable_percentage": self.max_unreachable_percentage,
+            "min_hosts": self.min_hosts,
+        }
@@ -0,0 +1,461 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+Worker-local pool of warm ``ansible-playbook`` controllers.
+
+A zygote process started with the Python interpreter of ``ansible-playbook`` imports the
+heavy, configuration independent modules once, then forks one child per job. ansible-runner
+is given a small client script as its binary: the client hands its argv, environment, cwd and
+stdio file descriptors to the zygote over a unix socket, relays signals to the forked child
+and exits with its return code, so ansible-runner sees a normal ``ansible-playbook`` process.
+
+``ansible.constants`` and the plugin loaders are NOT preloaded: they freeze the ANSIBLE_*
+environment at import time and ansible-runner sets it per job.
+
+The zygote exits after ``max_jobs`` jobs (it is recycled by the next ``ensure_pool``) or after
+``idle_timeout`` seconds without a job. When the zygote cannot be reached, the client execs
+the real binary. This module only uses the standard library, it is run as a script by the
+zygote and loaded by file path by the client, without importing Airflow.
+"""
+
+from __future__ import annotations
+
+import array
+import fcntl
+import hashlib
+import importlib
+import json
+import os
+import selectors
+import shlex
+import shutil
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import time
+
+DEFAULT_POOL_DIR = "/tmp/ansible_runner/controller_pool"
+DEFAULT_MAX_JOBS = 200
+DEFAULT_IDLE_TIMEOUT = 900
+PRELOAD_MODULES = (
+    "json",
+    "multiprocessing",
+    "ssl",
+    "yaml",
+    "jinja2",
+    "jinja2.ext",
+    "jinja2.nativetypes",
+    "markupsafe",
+    "cryptography.hazmat.primitives.ciphers",
+    "cryptography.hazmat.primitives.hashes",
+    "cryptography.hazmat.primitives.kdf.pbkdf2",
+    "resolvelib",
+    "packaging.version",
+    "ansible.release",
+    "ansible.module_utils.six",
+    "ansible.module_utils.common.text.converters",
+    "ansible.module_utils.common.collections",
+    "ansible.module_utils.common.json",
+)
+
+_HEADER = struct.Struct("!I")
+
+CLIENT_TEMPLATE = """#!{python}
+import importlib.util
+import sys
+
+spec = importlib.util.spec_from_file_location("ansible_controller_pool", {module!r})
+pool = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(pool)
+sys.exit(pool.client_main({socket_path!r}, {binary!r}))
+"""
+
+
+def _send_message(sock: socket.socket, message: dict, fds: list[int] | None = None) -> None:
+    data = json.dumps(message).encode("utf-8")
+    payload = _HEADER.pack(len(data)) + data
+    if fds:
+        # socket.send_fds is Python 3.9+
+        sent = sock.sendmsg(
+            [payload], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array("i", fds))]
+        )
+        if sent < len(payload):
+            sock.sendall(payload[sent:])
+    else:
+        sock.sendall(payload)
+
+
+def _recv_exact(sock: socket.socket, size: int, data: bytes = b"") -> bytes:
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        data += chunk
+    return data
+
+
+def _recv_message(sock: socket.socket, max_fds: int = 0) -> tuple[dict, list[int]]:
+    fds: list[int] = []
+    if max_fds:
+        # socket.recv_fds is Python 3.9+
+        received = array.array("i")
+        data, ancdata, _, _ = sock.recvmsg(65536, socket.CMSG_SPACE(max_fds * received.itemsize))
+        for level, kind, cmsg_data in ancdata:
+            if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                received.frombytes(cmsg_data[: len(cmsg_data) - len(cmsg_data) % received.itemsize])
+        fds = list(received)
+        if not data:
+            raise ConnectionError("connection closed")
+    else:
+        data = b""
+    data = _recv_exact(sock, _HEADER.size, data)
+    (size,) = _HEADER.unpack(data[: _HEADER.size])
+    body = _recv_exact(sock, _HEADER.size + size, data)[_HEADER.size :]
+    return json.loads(body), fds
+
+
+def exit_code(status: int) -> int:
+    """Return code of a ``waitpid`` status, 128 + the signal number when killed, like a shell"""
+    # os.waitstatus_to_exitcode is Python 3.9+
+    if os.WIFSIGNALED(status):
+        return 128 + os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def interpreter_of(binary: str) -> str:
+    """Python interpreter of a console script, from its shebang"""
+    path = binary if os.path.sep in str(binary) else shutil.which(str(binary))
+    if path and os.path.isfile(path):
+        with open(path, "rb") as f:
+            first = f.readline().decode("utf-8", "replace").strip()
+        if first.startswith("#!"):
+            parts = shlex.split(first[2:])
+            if parts and os.path.basename(parts[0]) == "env" and len(parts) > 1:
+                found = shutil.which(parts[-1])
+                if found:
+                    return found
+            elif parts:
+                return parts[0]
+    return sys.executable
+
+
+# client side
+
+
+def client_main(socket_path: str, binary: str) -> int:
+    """Entry point of the client script given to ansible-runner as the binary"""
+    argv = [binary] + sys.argv[1:]
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(socket_path)
+        _send_message(
+            sock,
+            {"op": "run", "argv": argv, "env": dict(os.environ), "cwd": os.getcwd()},
+            [0, 1, 2],
+        )
+        started, _ = _recv_message(sock)
+    except Exception:  # pylint: disable=broad-except
+        # no zygote (recycled, idle timeout, not started) or any other failure before the job
+        # started: run the real binary
+        os.execvp(binary, argv)
+    pid = started["pid"]
+
+    def _forward(signum, _frame):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+        signal.signal(signum, _forward)
+    while True:
+        try:
+            finished, _ = _recv_message(sock)
+            return finished["rc"]
+        except InterruptedError:
+            continue
+        except (OSError, ValueError, ConnectionError):
+            return 255
+
+
+def request_status(socket_path: str, timeout: float = 5) -> dict | None:
+    """Status of the zygote listening on ``socket_path``, ``None`` when there is none"""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(socket_path)
+            _send_message(sock, {"op": "status"})
+            status, _ = _recv_message(sock)
+            return status
+    except (OSError, ValueError, ConnectionError):
+        return None
+
+
+def ensure_pool(
+    binary: str,
+    pool_dir: str = DEFAULT_POOL_DIR,
+    max_jobs: int = DEFAULT_MAX_JOBS,
+    idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+    preload: tuple[str, ...] | list[str] = (),
+    start_timeout: float = 60,
+) -> tuple[str, dict] | None:
+    """
+    Start the zygote of ``binary`` unless it already runs, and return the client script to use as
+    the ansible-runner binary with the zygote status, or ``None`` when the zygote did not start.
+    """
+    binary = str(binary)
+    python = interpreter_of(binary)
+    name = hashlib.sha256(f"{python}\0{binary}".encode()).hexdigest()[:16]
+    os.makedirs(pool_dir, exist_ok=True)
+    socket_path = os.path.join(pool_dir, f"{name}.sock")
+    client = os.path.join(pool_dir, f"{name}-ansible-playbook")
+    with open(os.path.join(pool_dir, f"{name}.lock"), "w", encoding="utf-8") as lock:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        status = request_status(socket_path)
+        if status is None or status.get("recycling"):
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            with open(os.path.join(pool_dir, f"{name}.log"), "ab") as log_file:
+                subprocess.Popen(  # pylint: disable=consider-using-with
+                    [
+                        python,
+                        os.path.abspath(__file__),
+                        "serve",
+                        json.dumps(
+                            {
+                                "socket_path": socket_path,
+                                "max_jobs": max_jobs,
+                                "idle_timeout": idle_timeout,
+                                "preload": list(PRELOAD_MODULES) + list(preload),
+                            }
+                        ),
+                    ],
+                    stdin=subprocess.DEVNULL,
+                    stdout=log_file,
+                    stderr=log_file,
+                    start_new_session=True,
+                    close_fds=True,
+                )
+            deadline = time.monotonic() + start_timeout
+            while status is None or status.get("recycling"):
+                if time.monotonic() > deadline:
+                    return None
+                time.sleep(0.05)
+                status = request_status(socket_path)
+        if not os.path.exists(client):
+            tmp = f"{client}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(
+                    CLIENT_TEMPLATE.format(
+                        python=sys.executable,
+                        module=os.path.abspath(__file__),
+                        socket_path=socket_path,
+                        binary=binary,
+                    )
+                )
+            os.chmod(tmp, 0o755)
+            os.replace(tmp, client)
+    return client, status
+
+
+# zygote side
+
+
+def _preload(modules: list[str]) -> dict:
+    loaded, failed = [], []
+    for module in modules:
+        try:
+            importlib.import_module(module)
+            loaded.append(module)
+        except Exception:  # pylint: disable=broad-except
+            failed.append(module)
+    return {"loaded": loaded, "failed": failed}
+
+
+def _run_child(message: dict, fds: list[int]) -> None:
+    """Body of a forked job, never returns"""
+    rc = 255
+    try:
+        os.setpgid(0, 0)
+        for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP, signal.SIGCHLD):
+            signal.signal(signum, signal.SIG_DFL)
+        for target, fd in enumerate(fds[:3]):
+            os.dup2(fd, target)
+            os.close(fd)
+        sys.stdin = open(0, "r", closefd=False)  # pylint: disable=consider-using-with
+        sys.stdout = open(1, "w", closefd=False)  # pylint: disable=consider-using-with
+        sys.stderr = open(2, "w", closefd=False)  # pylint: disable=consider-using-with
+        os.chdir(message["cwd"])
+        os.environ.clear()
+        os.environ.update(message["env"])
+        for path in reversed(os.environ.get("PYTHONPATH", "").split(os.pathsep)):
+            if path and path not in sys.path:
+                sys.path.insert(0, path)
+        sys.argv = message["argv"]
+        from ansible.cli.playbook import (  # pylint: disable=import-outside-toplevel
+            main,
+        )
+
+        try:
+            result = main()
+            rc = result if isinstance(result, int) else 0
+        except SystemExit as e:
+            rc = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException:  # pylint: disable=broad-except
+        import traceback  # pylint: disable=import-outside-toplevel
+
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(rc)  # pylint: disable=protected-access
+
+
+def serve(
+    socket_path: str,
+    max_jobs: int = DEFAULT_MAX_JOBS,
+    idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+    preload: list[str] | None = None,
+) -> None:
+    """Zygote main loop, single threaded so forking is safe"""
+    start = time.perf_counter()
+    preloaded = _preload(list(preload or PRELOAD_MODULES))
+    preload_seconds = time.perf_counter() - start
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(64)
+    selector = selectors.DefaultSelector()
+    selector.register(listener, selectors.EVENT_READ, "accept")
+    # wake the loop up as soon as a job ends
+    wakeup_r, wakeup_w = os.pipe()
+    os.set_blocking(wakeup_r, False)
+    os.set_blocking(wakeup_w, False)
+    signal.signal(signal.SIGCHLD, lambda *_: None)
+    signal.set_wakeup_fd(wakeup_w)
+    selector.register(wakeup_r, selectors.EVENT_READ, "wakeup")
+    jobs: dict[int, socket.socket] = {}
+    started = time.time()
+    total_jobs = 0
+    last_activity = time.monotonic()
+    recycling = False
+
+    def _status() -> dict:
+        return {
+            "pid": os.getpid(),
+            "started": started,
+            "jobs": total_jobs,
+            "running": len(jobs),
+            "max_jobs": max_jobs,
+            "recycling": recycling,
+            "preload_seconds": round(preload_seconds, 3),
+            "preloaded": preloaded,
+        }
+
+    def _stop_listening():
+        selector.unregister(listener)
+        listener.close()
+        try:
+            os.unlink(socket_path)
+        except FileNotFoundError:
+            pass
+
+    while True:
+        for key, _ in selector.select(timeout=1):
+            if key.data == "wakeup":
+                try:
+                    os.read(wakeup_r, 4096)
+                except BlockingIOError:
+                    pass
+                continue
+            if key.data == "accept":
+                conn, _ = listener.accept()
+                selector.register(conn, selectors.EVENT_READ, "request")
+                continue
+            conn = key.fileobj
+            pid = next((p for p, c in jobs.items() if c is conn), None)
+            if pid is not None:
+                # the client went away before its job ended, e.g. killed: stop the job
+                try:
+                    os.killpg(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+                selector.unregister(conn)
+                conn.close()
+                jobs[pid] = None
+                continue
+            selector.unregister(conn)
+            try:
+                message, fds = _recv_message(conn, max_fds=3)
+            except (OSError, ValueError, ConnectionError):
+                conn.close()
+                continue
+            if message.get("op") == "status":
+                _send_message(conn, _status())
+                conn.close()
+                continue
+            last_activity = time.monotonic()
+            pid = os.fork()
+            if pid == 0:
+                signal.set_wakeup_fd(-1)
+                os.close(wakeup_r)
+                os.close(wakeup_w)
+                listener.close()
+                conn.close()
+                _run_child(message, fds)
+            for fd in fds:
+                os.close(fd)
+            total_jobs += 1
+            jobs[pid] = conn
+            _send_message(conn, {"pid": pid})
+            selector.register(conn, selectors.EVENT_READ, "job")
+            if total_jobs >= max_jobs and not recycling:
+                recycling = True
+                _stop_listening()
+        while jobs:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            conn = jobs.pop(pid, None)
+            last_activity = time.monotonic()
+            if conn is not None:
+                try:
+                    _send_message(conn, {"rc": exit_code(status)})
+                except OSError:
+                    pass
+                selector.unregister(conn)
+                conn.close()
+        if recycling and not jobs:
+            return
+        if not jobs and time.monotonic() - last_activity > idle_timeout:
+            if not recycling:
+                _stop_listening()
+            return
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "serve":
+        serve(**json.loads(sys.argv[2]))
+    else:
+        sys.exit(f"usage: {sys.argv[0]} serve '<json options>'")
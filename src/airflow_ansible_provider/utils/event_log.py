@@ -0,0 +1,191 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+Append-only, segmented event log for ansible-runner events.
+
+Events are written as NDJSON. Every ``block_events`` events (or ``block_bytes``) the buffer is
+compressed into one gzip member and appended to the current segment file
+``events-NNNNN.ndjson.gz``; a segment is therefore a valid gzip stream and can be read with
+``zcat``. Each block gets one line in ``index.ndjson`` with its byte offset, length, sequence
+range and the hosts and tasks it contains, so readers can follow the log incrementally and
+seek to the blocks of a given host or task without decompressing the rest.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+from typing import Iterator
+
+INDEX_FILE = "index.ndjson"
+SEGMENT_FORMAT = "events-{:05d}.ndjson.gz"
+
+
+class SegmentedEventLog:
+    """
+    Writer side of the event log.
+
+    :param directory: Directory holding the segments and the index
+    :param segment_bytes: Start a new segment once the current one is larger than this
+    :param block_events: Compress and append the buffer after this many events
+    :param block_bytes: Compress and append the buffer once it is larger than this
+    :param compresslevel: gzip compression level
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = 64 * 1024 * 1024,
+        block_events: int = 256,
+        block_bytes: int = 1024 * 1024,
+        compresslevel: int = 6,
+    ) -> None:
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.block_events = block_events
+        self.block_bytes = block_bytes
+        self.compresslevel = compresslevel
+        self.seq = 0
+        self.bytes_written = 0
+        self._segment = 0
+        self._segment_size = 0
+        self._buffer: list[bytes] = []
+        self._buffer_size = 0
+        self._first_seq = 0
+        self._hosts: set[str] = set()
+        self._tasks: set[str] = set()
+        os.makedirs(directory, exist_ok=True)
+        self._index = open(  # pylint: disable=consider-using-with
+            os.path.join(directory, INDEX_FILE), "a", encoding="utf-8"
+        )
+
+    def write(self, event: dict) -> None:
+        """Append one event"""
+        line = json.dumps(event, separators=(",", ":"), default=str).encode("utf-8")
+        if not self._buffer:
+            self._first_seq = self.seq
+        self._buffer.append(line)
+        self._buffer_size += len(line) + 1
+        self.seq += 1
+        event_data = event.get("event_data") or {}
+        if event_data.get("host"):
+            self._hosts.add(event_data["host"])
+        if event_data.get("task"):
+            self._tasks.add(event_data["task"])
+        if len(self._buffer) >= self.block_events or self._buffer_size >= self.block_bytes:
+            self.flush()
+
+    def flush(self) -> None:
+        """Compress the buffered events into one block and index it"""
+        if not self._buffer:
+            return
+        if self._segment_size >= self.segment_bytes:
+            self._segment += 1
+            self._segment_size = 0
+        block = gzip.compress(
+            b"\n".join(self._buffer) + b"\n", compresslevel=self.compresslevel, mtime=0
+        )
+        segment = SEGMENT_FORMAT.format(self._segment)
+        with open(os.path.join(self.directory, segment), "ab") as f:
+            f.write(block)
+        entry = {
+            "segment": segment,
+            "offset": self._segment_size,
+            "length": len(block),
+            "first": self._first_seq,
+            "count": len(self._buffer),
+            "hosts": sorted(self._hosts),
+            "tasks": sorted(self._tasks),
+        }
+        # the index line is written after the block so readers never see a partial block
+        self._index.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._index.flush()
+        self._segment_size += len(block)
+        self.bytes_written += len(block)
+        self._buffer = []
+        self._buffer_size = 0
+        self._hosts = set()
+        self._tasks = set()
+
+    def close(self) -> None:
+        self.flush()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class EventLogReader:
+    """
+    Reader side of the event log, usable while the log is still being written.
+
+    :param directory: Directory holding the segments and the index
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self._index_offset = 0
+
+    def _read_index(self, offset: int = 0) -> tuple[list[dict], int]:
+        path = os.path.join(self.directory, INDEX_FILE)
+        if not os.path.exists(path):
+            return [], offset
+        entries = []
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):  # being written
+                    break
+                entries.append(json.loads(line))
+                offset += len(line)
+        return entries, offset
+
+    def read_block(self, entry: dict) -> list[dict]:
+        """Decompress the events of one index entry"""
+        with open(os.path.join(self.directory, entry["segment"]), "rb") as f:
+            f.seek(entry["offset"])
+            data = gzip.decompress(f.read(entry["length"]))
+        return [json.loads(line) for line in data.splitlines() if line]
+
+    def poll(self) -> list[dict]:
+        """Events appended since the previous call"""
+        entries, self._index_offset = self._read_index(self._index_offset)
+        events = []
+        for entry in entries:
+            events.extend(self.read_block(entry))
+        return events
+
+    def events(self, host: str | None = None, task: str | None = None) -> Iterator[dict]:
+        """All events, only decompressing the blocks that contain ``host`` and ``task``"""
+        entries, _ = self._read_index()
+        for entry in entries:
+            if host is not None and host not in entry["hosts"]:
+                continue
+            if task is not None and task not in entry["tasks"]:
+                continue
+            for event in self.read_block(entry):
+                event_data = event.get("event_data") or {}
+                if host is not None and event_data.get("host") != host:
+                    continue
+                if task is not None and event_data.get("task") != task:
+                    continue
+                yield event
@@ -0,0 +1,171 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Online per-host and per-task latency analytics built from ansible-runner events."""
+
+from __future__ import annotations
+
+import bisect
+import datetime
+import heapq
+
+# Upper bounds (seconds) of the per-task duration histogram buckets, the last bucket is unbounded
+HISTOGRAM_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+RESULT_EVENTS = (
+    "runner_on_ok",
+    "runner_on_failed",
+    "runner_on_unreachable",
+    "runner_on_skipped",
+)
+OTHER_TASKS = "(other tasks)"
+
+
+def _parse_time(value) -> float | None:
+    if not value:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class _TaskStats:
+    __slots__ = ("name", "count", "total", "max", "first_start", "last_end", "buckets")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.first_start: float | None = None
+        self.last_end: float | None = None
+        self.buckets = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+
+    def add(self, duration: float, end: float | None) -> None:
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        self.buckets[bisect.bisect_left(HISTOGRAM_BUCKETS, duration)] += 1
+        if end is not None:
+            self.last_end = end if self.last_end is None else max(self.last_end, end)
+
+    def as_dict(self) -> dict:
+        wall = None
+        if self.first_start is not None and self.last_end is not None:
+            wall = round(max(self.last_end - self.first_start, 0.0), 3)
+        return {
+            "task": self.name,
+            "count": self.count,
+            "total": round(self.total, 3),
+            "mean": round(self.total / self.count, 3) if self.count else 0.0,
+            "max": round(self.max, 3),
+            "wall": wall,
+            "histogram": {
+                **{
+                    f"le_{bound}": n
+                    for bound, n in zip(HISTOGRAM_BUCKETS, self.buckets)
+                },
+                "inf": self.buckets[-1],
+            },
+        }
+
+
+class LatencyAggregator:
+    """
+    Aggregate host results of a playbook run into latency statistics in bounded memory.
+
+    Per-task state is capped at ``max_tasks`` distinct tasks (later tasks are folded into one
+    bucket), the slowest host results are kept in a heap of ``top_n`` entries and per-host
+    state is a single float per host.
+
+    :param top_n: How many of the slowest hosts, tasks and host results to report, 0 reports none
+    :param max_tasks: Maximum number of distinct tasks tracked individually
+    """
+
+    def __init__(self, top_n: int = 10, max_tasks: int = 1000) -> None:
+        self.top_n = top_n
+        self.max_tasks = max_tasks
+        self.tasks: dict[str, _TaskStats] = {}
+        self.host_totals: dict[str, float] = {}
+        self.results = 0
+        self._slowest: list[tuple[float, str, str]] = []
+
+    def _task(self, uuid: str, name: str) -> _TaskStats:
+        stats = self.tasks.get(uuid)
+        if stats is None:
+            if len(self.tasks) >= self.max_tasks:
+                uuid, name = OTHER_TASKS, OTHER_TASKS
+                stats = self.tasks.get(uuid)
+            if stats is None:
+                stats = self.tasks[uuid] = _TaskStats(name)
+        return stats
+
+    def add(self, data: dict) -> None:
+        """Feed one runner event"""
+        event = data.get("event")
+        event_data = data.get("event_data") or {}
+        if event == "playbook_on_task_start":
+            stats = self._task(
+                event_data.get("task_uuid", ""), event_data.get("task", "")
+            )
+            if stats.first_start is None:
+                stats.first_start = _parse_time(data.get("created"))
+            return
+        if event not in RESULT_EVENTS or not event_data.get("host"):
+            return
+        host = event_data["host"]
+        task = event_data.get("task", "")
+        end = _parse_time(event_data.get("end")) or _parse_time(data.get("created"))
+        duration = event_data.get("duration")
+        if duration is None:
+            start = _parse_time(event_data.get("start"))
+            duration = end - start if start is not None and end is not None else 0.0
+        duration = max(float(duration), 0.0)
+
+        self.results += 1
+        self._task(event_data.get("task_uuid", ""), task).add(duration, end)
+        self.host_totals[host] = self.host_totals.get(host, 0.0) + duration
+        if self.top_n <= 0:
+            return
+        item = (duration, host, task)
+        if len(self._slowest) < self.top_n:
+            heapq.heappush(self._slowest, item)
+        elif item > self._slowest[0]:
+            heapq.heapreplace(self._slowest, item)
+
+    def summary(self) -> dict:
+        """JSON serializable latency report"""
+        slowest_hosts = heapq.nlargest(
+            self.top_n, self.host_totals.items(), key=lambda kv: kv[1]
+        )
+        tasks = [t.as_dict() for t in self.tasks.values()]
+        return {
+            "results": self.results,
+            "hosts": len(self.host_totals),
+            "tasks": tasks,
+            "slowest_tasks": sorted(tasks, key=lambda t: t["max"], reverse=True)[
+                : self.top_n
+            ],
+            "slowest_hosts": [
+                {"host": host, "total": round(total, 3)}
+                for host, total in slowest_hosts
+            ],
+            "slowest_results": [
+                {"host": host, "task": task, "duration": round(duration, 3)}
+                for duration, host, task in sorted(self._slowest, reverse=True)
+            ],
+        }
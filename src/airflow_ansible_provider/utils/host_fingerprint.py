@@ -0,0 +1,97 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Per-host input fingerprints, so converging runs only target the hosts whose inputs changed."""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import time
+from urllib.parse import quote
+
+from airflow_ansible_provider.utils.inventory import host_inputs
+from airflow_ansible_provider.utils.result_cache import content_hash
+
+FINGERPRINT_DIR = "host_fingerprints"
+
+
+def host_fingerprints(inventory: dict, run_inputs: dict) -> dict[str, str] | None:
+    """Fingerprint of every host: its vars, the vars of its groups and the inputs shared by all hosts"""
+    inputs = host_inputs(inventory)
+    if inputs is None:
+        return None
+    common = content_hash(run_inputs)
+    return {
+        host: content_hash({"run": common, "host": host_input})
+        for host, host_input in inputs.items()
+    }
+
+
+class FingerprintStore:
+    """
+    Last successful fingerprint of every host, one JSON file per DAG task.
+
+    :param artifact_dir: The artifact directory, the store lives in ``host_fingerprints/`` under it
+    :param dag_id: DAG of the task
+    :param task_id: The task
+    """
+
+    def __init__(self, artifact_dir: str, dag_id: str, task_id: str) -> None:
+        self.path = os.path.join(
+            artifact_dir,
+            FINGERPRINT_DIR,
+            f"{quote(dag_id, safe='')}.{quote(task_id, safe='')}.json",
+        )
+
+    def load(self) -> dict[str, dict]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def changed(
+        self, fingerprints: dict[str, str], ttl: float | None = None
+    ) -> set[str]:
+        """Hosts whose fingerprint differs from the stored one or is older than ``ttl`` seconds"""
+        stored = self.load()
+        now = time.time()
+        return {
+            host
+            for host, fingerprint in fingerprints.items()
+            if host not in stored
+            or stored[host]["fingerprint"] != fingerprint
+            or (ttl is not None and stored[host]["at"] + ttl < now)
+        }
+
+    def update(self, fingerprints: dict[str, str]) -> None:
+        """Record ``fingerprints`` as converged, keeping the other hosts"""
+        if not fingerprints:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        now = time.time()
+        # concurrent runs of the same task must not lose each other's hosts
+        with open(self.path + ".lock", "w", encoding="utf-8") as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            stored = self.load()
+            for host, fingerprint in fingerprints.items():
+                stored[host] = {"fingerprint": fingerprint, "at": now}
+            with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(stored, f)
+            os.replace(self.path + ".tmp", self.path)
@@ -0,0 +1,145 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+Cross-run health of hosts, shared by every DAG that uses the same store.
+
+A host that is unreachable ``threshold`` times in a row is excluded for ``base_backoff``
+seconds, doubled on every further unreachable run up to ``max_backoff``. Once the backoff
+expires the host is targeted again, which is the re-check: reachable restores it, unreachable
+excludes it for longer.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import time
+from typing import Iterable
+
+DEFAULT_HEALTH_DB = "host_health.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS host_health (
+    host TEXT PRIMARY KEY,
+    failures INTEGER NOT NULL DEFAULT 0,
+    last_unreachable REAL,
+    last_reachable REAL,
+    excluded_until REAL,
+    last_error TEXT
+)
+"""
+
+
+class HostHealthStore:
+    """
+    SQLite store of unreachable counts and exclusion windows.
+
+    :param path: The database file
+    :param threshold: Consecutive unreachable runs before a host is excluded
+    :param base_backoff: Seconds of the first exclusion
+    :param max_backoff: Upper bound of the exclusion
+    """
+
+    def __init__(
+        self,
+        path: str,
+        threshold: int = 2,
+        base_backoff: float = 600,
+        max_backoff: float = 86400,
+    ) -> None:
+        self.path = path
+        self.threshold = max(threshold, 1)
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(SCHEMA)
+        return conn
+
+    def backoff(self, failures: int) -> float | None:
+        """Exclusion after ``failures`` consecutive unreachable runs, ``None`` below the threshold"""
+        if failures < self.threshold:
+            return None
+        return min(self.base_backoff * 2 ** (failures - self.threshold), self.max_backoff)
+
+    def excluded(self, hosts: Iterable[str] | None = None) -> dict[str, dict]:
+        """Hosts currently excluded, among ``hosts`` or all of them"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT host, failures, excluded_until, last_error FROM host_health "
+                "WHERE excluded_until > ?",
+                (now,),
+            ).fetchall()
+        finally:
+            conn.close()
+        wanted = set(hosts) if hosts is not None else None
+        return {
+            host: {
+                "failures": failures,
+                "excluded_until": excluded_until,
+                "last_error": last_error,
+            }
+            for host, failures, excluded_until, last_error in rows
+            if wanted is None or host in wanted
+        }
+
+    def record(
+        self, reachable: Iterable[str], unreachable: dict[str, str | None]
+    ) -> dict:
+        """Update the store with the outcome of one run, in one transaction"""
+        now = time.time()
+        reachable = list(reachable)
+        conn = self._connect()
+        try:
+            with conn:
+                unhealthy = {
+                    row[0]
+                    for row in conn.execute("SELECT host FROM host_health WHERE failures > 0")
+                }
+                restored = len(unhealthy.intersection(reachable))
+                conn.executemany(
+                    "INSERT INTO host_health (host, failures, last_reachable) VALUES (?, 0, ?) "
+                    "ON CONFLICT(host) DO UPDATE SET failures = 0, last_reachable = excluded.last_reachable, "
+                    "excluded_until = NULL",
+                    [(host, now) for host in reachable],
+                )
+                for host, error in unreachable.items():
+                    row = conn.execute(
+                        "SELECT failures FROM host_health WHERE host = ?", (host,)
+                    ).fetchone()
+                    failures = (row[0] if row else 0) + 1
+                    backoff = self.backoff(failures)
+                    conn.execute(
+                        "INSERT OR REPLACE INTO host_health "
+                        "(host, failures, last_unreachable, last_reachable, excluded_until, last_error) "
+                        "VALUES (?, ?, ?, (SELECT last_reachable FROM host_health WHERE host = ?), ?, ?)",
+                        (
+                            host,
+                            failures,
+                            now,
+                            host,
+                            now + backoff if backoff is not None else None,
+                            (error or "")[:1000],
+                        ),
+                    )
+        finally:
+            conn.close()
+        return {"reachable": len(reachable), "unreachable": len(unreachable), "restored": restored}
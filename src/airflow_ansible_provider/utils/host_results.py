@@ -0,0 +1,165 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+Per-host, per-task outcomes as a columnar file, so reporting jobs do not parse ``ansible_return.json``.
+
+One row per task result. Written as Parquet when pyarrow is installed, otherwise as a gzipped
+CSV with the same columns.
+"""
+
+from __future__ import annotations
+
+import csv
+import gzip
+import logging
+import os
+import threading
+
+from airflow_ansible_provider.utils.progress import result_status
+
+HOST_RESULTS_FILE = "host_results"
+COLUMNS = (
+    "playbook",
+    "play",
+    "task",
+    "task_action",
+    "host",
+    "status",
+    "changed",
+    "duration",
+    "msg",
+)
+MAX_MSG_LENGTH = 1024
+
+log = logging.getLogger(__name__)
+
+
+class HostResultTable:
+    """Task results kept as one list per column"""
+
+    def __init__(self) -> None:
+        self.columns: dict[str, list] = {column: [] for column in COLUMNS}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.columns["host"])
+
+    def add(self, data: dict, playbook: str | None = None) -> None:
+        """Feed one runner event, only task results are kept"""
+        status = result_status(data)
+        event_data = data.get("event_data") or {}
+        if status is None or not event_data.get("host"):
+            return
+        res = event_data.get("res") if isinstance(event_data.get("res"), dict) else {}
+        msg = res.get("msg")
+        duration = event_data.get("duration")
+        row = (
+            playbook,
+            event_data.get("play"),
+            event_data.get("task"),
+            event_data.get("task_action"),
+            event_data["host"],
+            status,
+            bool(res.get("changed")),
+            float(duration) if isinstance(duration, (int, float)) else None,
+            str(msg)[:MAX_MSG_LENGTH] if msg is not None else None,
+        )
+        with self._lock:
+            for column, value in zip(COLUMNS, row):
+                self.columns[column].append(value)
+
+    def write(self, directory: str, fmt: str = "auto") -> dict:
+        """
+        Write the table to ``directory``, returns the path, format and number of rows.
+
+        :param fmt: ``parquet``, ``csv`` or ``auto`` (Parquet when pyarrow is available)
+        """
+        if fmt not in ("auto", "parquet", "csv"):
+            raise ValueError(f"Unsupported host results format: {fmt}")
+        os.makedirs(directory, exist_ok=True)
+        if fmt in ("auto", "parquet"):
+            try:
+                return self._write_parquet(directory)
+            except ImportError:
+                if fmt == "parquet":
+                    raise
+                log.info("pyarrow is not installed, writing host results as csv")
+        return self._write_csv(directory)
+
+    def _write_parquet(self, directory: str) -> dict:
+        import pyarrow as pa  # pylint: disable=import-outside-toplevel
+        import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+
+        schema = pa.schema(
+            [
+                ("playbook", pa.string()),
+                ("play", pa.string()),
+                ("task", pa.string()),
+                ("task_action", pa.string()),
+                ("host", pa.string()),
+                ("status", pa.string()),
+                ("changed", pa.bool_()),
+                ("duration", pa.float64()),
+                ("msg", pa.string()),
+            ]
+        )
+        path = os.path.join(directory, f"{HOST_RESULTS_FILE}.parquet")
+        with self._lock:
+            table = pa.table(self.columns, schema=schema)
+        # dictionary encoding makes the repeated task/status/message values nearly free
+        pq.write_table(table, path, compression="zstd", use_dictionary=True)
+        return {"path": path, "format": "parquet", "rows": table.num_rows}
+
+    def _write_csv(self, directory: str) -> dict:
+        path = os.path.join(directory, f"{HOST_RESULTS_FILE}.csv.gz")
+        with self._lock:
+            rows = list(zip(*(self.columns[column] for column in COLUMNS)))
+        with gzip.open(path, "wt", encoding="utf-8", newline="", compresslevel=6) as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            writer.writerows(rows)
+        return {"path": path, "format": "csv", "rows": len(rows)}
+
+
+def read_host_results(path: str, columns: list[str] | None = None) -> dict[str, list]:
+    """Read a host results file back as ``{column: values}``, only ``columns`` when given"""
+    columns = list(columns or COLUMNS)
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+
+        return pq.read_table(path, columns=columns).to_pydict()
+    result: dict[str, list] = {column: [] for column in columns}
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        indexes = [header.index(column) for column in columns]
+        for row in reader:
+            for column, index in zip(columns, indexes):
+                result[column].append(_csv_value(column, row[index]))
+    return result
+
+
+def _csv_value(column: str, value: str):
+    """A CSV cell with the type of the Parquet column, empty cells were ``None``"""
+    if value == "":
+        return None
+    if column == "changed":
+        return value == "True"
+    if column == "duration":
+        return float(value)
+    return value
@@ -0,0 +1,206 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Helpers for dict inventories, in both the YAML and the JSON script layout, and inventory files."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import string
+from typing import Iterator
+
+# files and directories ansible's inventory manager skips in an inventory directory
+IGNORED_SUFFIXES = ("~", ".orig", ".cfg", ".retry", ".pyc", ".pyo", ".ini.sample")
+IGNORED_DIRS = ("group_vars", "host_vars")
+HOST_RANGE_RE = re.compile(r"^(.*?)\[([0-9a-z]+):([0-9a-z]+)(?::([0-9]+))?\](.*)$")
+
+log = logging.getLogger(__name__)
+
+
+def _iter_groups(inventory: dict) -> Iterator[tuple[str, dict]]:
+    stack = [
+        (name, group)
+        for name, group in inventory.items()
+        if name != "_meta" and isinstance(group, dict)
+    ]
+    while stack:
+        name, group = stack.pop()
+        yield name, group
+        children = group.get("children")
+        if isinstance(children, dict):
+            stack.extend(
+                (child, data)
+                for child, data in children.items()
+                if isinstance(data, dict)
+            )
+
+
+def inventory_hosts(inventory) -> set[str] | None:
+    """All host names of a dict inventory, ``None`` when the inventory is not a dict"""
+    if not isinstance(inventory, dict):
+        return None
+    hosts: set[str] = set()
+    for _, group in _iter_groups(inventory):
+        group_hosts = group.get("hosts")
+        if isinstance(group_hosts, (dict, list)):
+            hosts.update(group_hosts)
+    hosts.update((inventory.get("_meta") or {}).get("hostvars") or {})
+    return hosts
+
+
+def host_inputs(inventory) -> dict[str, dict] | None:
+    """
+    Variables that apply to each host of a dict inventory, ``None`` when the inventory is not a dict.
+
+    Returns ``{host: {"vars": host vars, "groups": {group: group vars}}}`` with every group the host
+    belongs to, directly or through ``children``. The ``all`` group applies to every host. This does
+    not resolve Ansible's variable precedence, it only collects the inputs.
+    """
+    if not isinstance(inventory, dict):
+        return None
+    direct: dict[str, set[str]] = {}
+    children: dict[str, set[str]] = {}
+    group_vars: dict[str, dict] = {}
+    hostvars: dict[str, dict] = {}
+    for name, group in _iter_groups(inventory):
+        group_hosts = group.get("hosts")
+        if isinstance(group_hosts, dict):
+            direct.setdefault(name, set()).update(group_hosts)
+            for host, host_vars in group_hosts.items():
+                if isinstance(host_vars, dict):
+                    hostvars.setdefault(host, {}).update(host_vars)
+        elif isinstance(group_hosts, list):
+            direct.setdefault(name, set()).update(group_hosts)
+        group_children = group.get("children")
+        if isinstance(group_children, (dict, list)):
+            children.setdefault(name, set()).update(group_children)
+        if isinstance(group.get("vars"), dict):
+            group_vars.setdefault(name, {}).update(group["vars"])
+    for host, host_vars in ((inventory.get("_meta") or {}).get("hostvars") or {}).items():
+        hostvars.setdefault(host, {}).update(host_vars or {})
+
+    members: dict[str, set[str]] = {}
+
+    def _members(name: str, seen: frozenset) -> set[str]:
+        if name in members:
+            return members[name]
+        hosts = set(direct.get(name, ()))
+        for child in children.get(name, ()):
+            if child not in seen:
+                hosts |= _members(child, seen | {child})
+        members[name] = hosts
+        return hosts
+
+    inputs = {
+        host: {"vars": hostvars.get(host, {}), "groups": {}}
+        for host in inventory_hosts(inventory)
+    }
+    for name in set(direct) | set(children) | set(group_vars):
+        hosts = set(inputs) if name == "all" else _members(name, frozenset((name,)))
+        for host in hosts:
+            inputs[host]["groups"][name] = group_vars.get(name, {})
+    return inputs
+
+
+def expand_host_range(pattern: str) -> list[str]:
+    """Hosts of an INI host pattern with ``[01:10]`` or ``[a:f]`` ranges, optionally with a stride"""
+    match = HOST_RANGE_RE.match(pattern)
+    if match is None:
+        return [pattern]
+    head, start, end, stride, tail = match.groups()
+    step = int(stride or 1)
+    if start.isdigit() and end.isdigit():
+        width = len(start) if start.startswith("0") else 0
+        items = [str(i).zfill(width) for i in range(int(start), int(end) + 1, step)]
+    elif len(start) == 1 and len(end) == 1:
+        letters = string.ascii_lowercase
+        items = list(letters[letters.index(start) : letters.index(end) + 1 : step])
+    else:
+        raise ValueError(f"Invalid host range {pattern}")
+    return [host for item in items for host in expand_host_range(f"{head}{item}{tail}")]
+
+
+def _ini_hosts(path: str) -> set[str]:
+    hosts: set[str] = set()
+    section = ""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line[0] in "#;":
+                continue
+            if line.startswith("[") and line.endswith("]"):
+                section = line[1:-1]
+                continue
+            # :vars and :children sections hold variables and group names
+            if ":" in section:
+                continue
+            host = line.split()[0]
+            # ``host:port``, but not an IPv6 address
+            if host.count(":") == 1 and host.rpartition(":")[2].isdigit():
+                host = host.rpartition(":")[0]
+            hosts.update(expand_host_range(host))
+    return hosts
+
+
+def file_inventory_hosts(path: str) -> set[str] | None:
+    """
+    All host names of an inventory file or directory, ``None`` when they cannot be listed.
+
+    YAML, JSON and INI files are read; inventory scripts and plugin configurations are not run,
+    for them and for unreadable files the host list is unknown.
+    """
+    if os.path.isdir(path):
+        hosts: set[str] = set()
+        for name in sorted(os.listdir(path)):
+            if name.startswith(".") or name.endswith(IGNORED_SUFFIXES) or name in IGNORED_DIRS:
+                continue
+            file_hosts = file_inventory_hosts(os.path.join(path, name))
+            if file_hosts is None:
+                return None
+            hosts |= file_hosts
+        return hosts
+    if not os.path.isfile(path) or os.access(path, os.X_OK):
+        return None
+    try:
+        if path.endswith((".yml", ".yaml", ".json")):
+            with open(path, "r", encoding="utf-8") as f:
+                if path.endswith(".json"):
+                    data = json.load(f)
+                else:
+                    import yaml  # pylint: disable=import-outside-toplevel
+
+                    data = yaml.safe_load(f)
+            # a plugin configuration, e.g. ``plugin: aws_ec2``, is not a host list
+            if not isinstance(data, dict) or "plugin" in data:
+                return None
+            return inventory_hosts(data)
+        return _ini_hosts(path)
+    except Exception as e:  # unreadable file, invalid JSON, YAML or host range
+        log.warning("Cannot list the hosts of inventory %s: %s", path, e)
+        return None
+
+
+def resolve_inventory_hosts(inventory) -> set[str] | None:
+    """Host names of a dict inventory or of an inventory file path, ``None`` when unknown"""
+    if isinstance(inventory, dict):
+        return inventory_hosts(inventory)
+    if isinstance(inventory, str):
+        return file_inventory_hosts(inventory)
+    return None
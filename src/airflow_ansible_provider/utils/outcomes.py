@@ -0,0 +1,133 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+Group hosts by the outcome of their last task result.
+
+The signature of an outcome is the status, the task, its action and a hash of the message with
+the host name, addresses and numbers masked, so "Connection to 10.0.0.7 timed out after 30s" on
+one host matches the same failure on another. Results shrink from one entry per host to one per
+distinct outcome.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+
+from airflow_ansible_provider.utils.progress import result_status
+
+OUTCOMES_FILE = "outcomes.json"
+MAX_MSG_LENGTH = 1024
+# most severe first when listing groups
+STATUS_ORDER = {"unreachable": 0, "failed": 1, "ignored": 2, "changed": 3, "ok": 4, "skipped": 5}
+
+_IPV4 = re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b")
+_HEX = re.compile(r"\b[0-9a-f]{8,}\b", re.IGNORECASE)
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+
+def outcome(data: dict) -> dict | None:
+    """Outcome of a task result event, ``None`` for the other events"""
+    status = result_status(data)
+    event_data = data.get("event_data") or {}
+    if status is None or not event_data.get("host"):
+        return None
+    res = event_data.get("res") if isinstance(event_data.get("res"), dict) else {}
+    if status == "ok" and res.get("changed"):
+        status = "changed"
+    msg = res.get("msg")
+    if msg is None and status in ("failed", "ignored"):
+        # command modules fail with rc and stderr rather than msg
+        msg = res.get("stderr") or None
+    return {
+        "status": status,
+        "task": event_data.get("task"),
+        "task_action": event_data.get("task_action"),
+        "msg": str(msg)[:MAX_MSG_LENGTH] if msg is not None else None,
+    }
+
+
+def normalize_message(msg: str | None, host: str) -> str:
+    """Mask what differs from host to host in an otherwise identical message"""
+    if not msg:
+        return ""
+    msg = msg.replace(host, "<host>")
+    msg = _IPV4.sub("<ip>", msg)
+    msg = _HEX.sub("<hex>", msg)
+    return _NUMBER.sub("<n>", msg)
+
+
+def signature(host: str, host_outcome: dict) -> str:
+    """Short hash identifying the outcome of a host"""
+    key = "\0".join(
+        (
+            host_outcome["status"],
+            host_outcome["task"] or "",
+            host_outcome["task_action"] or "",
+            normalize_message(host_outcome["msg"], host),
+        )
+    )
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]  # nosec B324 - not a security hash
+
+
+def outcome_groups(outcomes: dict[str, dict]) -> list[dict]:
+    """
+    One entry per distinct outcome with its hosts, most severe and most frequent first.
+
+    :param outcomes: The last :func:`outcome` of every host
+    """
+    groups: dict[str, dict] = {}
+    for host, host_outcome in outcomes.items():
+        sig = signature(host, host_outcome)
+        group = groups.get(sig)
+        if group is None:
+            # the message of the first host is kept as the example
+            group = groups[sig] = {"signature": sig, **host_outcome, "count": 0, "hosts": []}
+        group["count"] += 1
+        group["hosts"].append(host)
+    for group in groups.values():
+        group["hosts"].sort()
+    return sorted(
+        groups.values(),
+        key=lambda g: (STATUS_ORDER.get(g["status"], len(STATUS_ORDER)), -g["count"]),
+    )
+
+
+def group_ci_events(ci_events: dict[str, dict]) -> dict[str, dict]:
+    """``ci_events`` stored once per distinct outcome: ``{signature: {"hosts": [...], "event": ...}}``"""
+    grouped: dict[str, dict] = {}
+    for host, data in ci_events.items():
+        host_outcome = outcome(data)
+        # hosts whose last event is not a task result keep their own entry
+        sig = signature(host, host_outcome) if host_outcome else f"host:{host}"
+        entry = grouped.setdefault(sig, {"hosts": [], "event": data})
+        entry["hosts"].append(host)
+    return grouped
+
+
+def format_outcomes(groups: list[dict], limit: int = 20) -> list[str]:
+    """Log lines for the ``limit`` first groups"""
+    lines = [
+        f"{g['count']} hosts {g['status']} on {g['task']!r}"
+        + (f": {g['msg'][:200]}" if g["msg"] else "")
+        + f" (e.g. {', '.join(g['hosts'][:3])})"
+        for g in groups[:limit]
+    ]
+    if len(groups) > limit:
+        lines.append(f"... {len(groups) - limit} more outcomes")
+    return lines
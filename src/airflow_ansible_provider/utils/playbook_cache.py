@@ -0,0 +1,99 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+Content-addressed directories for inline playbooks (``playbook_yaml``).
+
+Every playbook is written once to ``<cache_dir>/<sha256>/playbook.yml`` and reused by every run
+and task with the same content. Directories are published with an atomic rename, and using one
+refreshes its mtime so eviction drops the least recently used first.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+PLAYBOOK_CACHE_DIR = "playbooks"
+PLAYBOOK_FILE = "playbook.yml"
+DEFAULT_MAX_ENTRIES = 256
+# an entry used by a running task is at most this old, whatever the quota
+DEFAULT_MIN_AGE = 24 * 3600
+
+log = logging.getLogger(__name__)
+
+
+def materialize_playbook(
+    playbook_yaml: str,
+    cache_dir: str,
+    max_entries: int = DEFAULT_MAX_ENTRIES,
+    min_age: float = DEFAULT_MIN_AGE,
+) -> str:
+    """
+    Directory holding the base64 encoded ``playbook_yaml`` as ``playbook.yml``, written on first use.
+
+    :param playbook_yaml: The base64 encoded playbook
+    :param cache_dir: Where the playbook directories are kept
+    :param max_entries: Directories kept after writing a new one
+    :param min_age: Directories used more recently than this are never evicted
+    """
+    data = base64.b64decode(playbook_yaml)
+    project_dir = os.path.join(cache_dir, hashlib.sha256(data).hexdigest())
+    if os.path.isfile(os.path.join(project_dir, PLAYBOOK_FILE)):
+        os.utime(project_dir)
+        return project_dir
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=cache_dir)
+    with open(os.path.join(tmp_dir, PLAYBOOK_FILE), "wb") as f:
+        f.write(data)
+    os.chmod(tmp_dir, 0o755)
+    try:
+        os.rename(tmp_dir, project_dir)
+    except OSError:
+        # another task published the same playbook first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    evict(cache_dir, max_entries, min_age)
+    return project_dir
+
+
+def evict(
+    cache_dir: str, max_entries: int = DEFAULT_MAX_ENTRIES, min_age: float = DEFAULT_MIN_AGE
+) -> int:
+    """Remove the least recently used directories above ``max_entries``, returns how many"""
+    now = time.time()
+    entries = []
+    for entry in os.scandir(cache_dir):
+        try:
+            entries.append((entry.stat().st_mtime, entry.path, entry.name))
+        except FileNotFoundError:
+            continue
+    entries.sort(reverse=True)
+    removed = 0
+    for mtime, path, name in entries[max_entries:]:
+        if now - mtime < min_age:
+            continue
+        if name.startswith(".tmp-") or os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    if removed:
+        log.info("Evicted %s cached playbooks from %s", removed, cache_dir)
+    return removed
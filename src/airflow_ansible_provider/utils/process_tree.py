@@ -0,0 +1,165 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+Stop the processes started by a run: ansible-playbook, its forks and their ssh children.
+
+ansible-runner only signals the process it spawned. ansible-playbook runs in its own process
+group (pexpect gives it a new session), so the group and the descendants are collected again
+before every signal: forks that were reparented after their parent died are still found.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import signal
+import time
+from typing import Iterable
+
+import psutil
+
+log = logging.getLogger(__name__)
+
+ESCALATION = (signal.SIGINT, signal.SIGTERM, signal.SIGKILL)
+
+
+def child_pids() -> set[int]:
+    """Direct children of this process"""
+    return {p.pid for p in psutil.Process().children()}
+
+
+def _alive(proc: psutil.Process) -> bool:
+    try:
+        return proc.is_running() and proc.status() != psutil.STATUS_ZOMBIE
+    except psutil.NoSuchProcess:
+        return False
+
+
+def _wait(procs: list[psutil.Process], timeout: float) -> list[psutil.Process]:
+    """Wait until the processes are gone or zombies, return the ones still running"""
+    deadline = time.monotonic() + timeout
+    alive = [proc for proc in procs if _alive(proc)]
+    while alive and time.monotonic() < deadline:
+        time.sleep(0.1)
+        alive = [proc for proc in alive if _alive(proc)]
+    return alive
+
+
+def _collect(roots: list[psutil.Process], pgids: set[int]) -> dict[int, psutil.Process]:
+    """The roots, their descendants and every process left in their process groups"""
+    procs: dict[int, psutil.Process] = {}
+    for root in roots:
+        if not _alive(root):
+            continue
+        procs[root.pid] = root
+        try:
+            procs.update((p.pid, p) for p in root.children(recursive=True))
+        except psutil.NoSuchProcess:
+            pass
+    if pgids:
+        own = os.getpgid(0)
+        for proc in psutil.process_iter():
+            try:
+                pgid = os.getpgid(proc.pid)
+            except OSError:
+                continue
+            if pgid in pgids and pgid != own:
+                procs.setdefault(proc.pid, proc)
+    procs.pop(os.getpid(), None)
+    return {pid: proc for pid, proc in procs.items() if _alive(proc)}
+
+
+def terminate_children(
+    exclude: Iterable[int] = (), grace_period: float = 10, kill_timeout: float = 5
+) -> dict:
+    """
+    Stop the children of this process and everything they started.
+
+    Every process gets SIGINT, so ansible-playbook can stop cleanly, then SIGTERM and finally
+    SIGKILL, each after ``grace_period`` seconds without the processes exiting.
+
+    :param exclude: Children to leave running, e.g. the ones that existed before the run
+    :param grace_period: Seconds to wait after SIGINT and after SIGTERM
+    :param kill_timeout: Seconds to wait for the processes to disappear after SIGKILL
+    """
+    exclude = set(exclude)
+    roots = [p for p in psutil.Process().children() if p.pid not in exclude]
+    pgids = set()
+    for root in roots:
+        try:
+            pgids.add(os.getpgid(root.pid))
+        except OSError:
+            pass
+    report: dict = {"processes": 0, "signals": [], "remaining": []}
+    seen: set[int] = set()
+    for signum in ESCALATION:
+        procs = _collect(roots, pgids)
+        if not procs:
+            break
+        seen.update(procs)
+        report["signals"].append(signal.Signals(signum).name)
+        for proc in procs.values():
+            try:
+                proc.send_signal(signum)
+            except psutil.NoSuchProcess:
+                pass
+        # zombies count as gone, their parent is being stopped as well
+        if not _wait(
+            list(procs.values()),
+            kill_timeout if signum == signal.SIGKILL else grace_period,
+        ):
+            break
+    report["processes"] = len(seen)
+    report["remaining"] = sorted(_collect(roots, pgids))
+    if report["remaining"]:
+        log.error("Processes still running after SIGKILL: %s", report["remaining"])
+    return report
+
+
+def terminate_connections(addresses: set[str], exclude: Iterable[int] = ()) -> int:
+    """
+    SIGTERM the ssh, scp and sftp processes started by the run for one of ``addresses``.
+
+    The worker waiting on them gets an error and ansible marks the host unreachable.
+
+    :param addresses: Host names and addresses of the host
+    :param exclude: Children of this process that are not part of the run
+    """
+    exclude = set(exclude)
+    targets = set(addresses) | {f"[{address}]" for address in addresses}
+    stopped = 0
+    for root in psutil.Process().children():
+        if root.pid in exclude:
+            continue
+        try:
+            procs = root.children(recursive=True)
+        except psutil.NoSuchProcess:
+            continue
+        for proc in procs:
+            try:
+                cmdline = proc.cmdline()
+                if not cmdline or os.path.basename(cmdline[0]) not in ("ssh", "scp", "sftp"):
+                    continue
+                if any(
+                    arg in targets or arg.rpartition("@")[2] in targets for arg in cmdline[1:]
+                ):
+                    proc.terminate()
+                    stopped += 1
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+    return stopped
@@ -0,0 +1,257 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Live progress counters for a running playbook."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable
+
+PROGRESS_FILE = "progress.json"
+
+# a host keeps its worst outcome
+HOST_STATUS_RANK = {"skipped": 0, "ok": 1, "failed": 2, "unreachable": 3}
+RESULT_STATUS = {
+    "runner_on_ok": "ok",
+    "runner_on_skipped": "skipped",
+    "runner_on_failed": "failed",
+    "runner_on_unreachable": "unreachable",
+}
+# failures a host can come back from: rescued, ignore_unreachable
+RECOVERABLE = ("failed", "unreachable")
+
+log = logging.getLogger(__name__)
+
+
+def result_status(data: dict) -> str | None:
+    """Status of a task result event, ``ignored`` for failures of tasks with ``ignore_errors``"""
+    status = RESULT_STATUS.get(data.get("event"))
+    if status == "failed" and (data.get("event_data") or {}).get("ignore_errors"):
+        return "ignored"
+    return status
+
+
+def stats_verdicts(stats: dict) -> dict[str, str]:
+    """
+    Final status of every host processed by a playbook, from its ``playbook_on_stats`` data.
+
+    Ansible does not count rescued and ignored errors as failures in these stats.
+    """
+    failures = stats.get("failures") or {}
+    dark = stats.get("dark") or {}
+    return {
+        host: "unreachable" if host in dark else "failed" if host in failures else "ok"
+        for host in stats.get("processed") or {}
+    }
+
+
+class ProgressTracker:
+    """
+    Host and task counters fed from the runner event callback.
+
+    ``add`` only touches in-memory counters; readers take consistent copies with ``snapshot``.
+
+    A failed task is not final: errors of tasks with ``ignore_errors`` count as ok, and a host that
+    reports another result after failing was rescued (or has ``ignore_unreachable``). A failure only
+    counts once the host stayed silent for a whole task after it, and ``playbook_on_stats`` gives
+    the final status of every host it processed.
+
+    :param total_hosts: Number of hosts in the inventory, when known, used for the ETA
+    """
+
+    def __init__(self, total_hosts: int | None = None) -> None:
+        self.total_hosts = total_hosts
+        self.host_status: dict[str, str] = {}
+        self.status_counts = {status: 0 for status in HOST_STATUS_RANK}
+        self.current_task: str | None = None
+        self.tasks_started = 0
+        self.task_results = 0
+        self.version = 0
+        # host -> (failed or unreachable, task number of the failure)
+        self._unsettled: dict[str, tuple[str, int]] = {}
+        self._verdicts: dict[str, str] = {}
+        self._task_started = time.monotonic()
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _set(self, host: str, status: str) -> None:
+        previous = self.host_status.get(host)
+        if previous == status:
+            return
+        self.host_status[host] = status
+        self.status_counts[status] += 1
+        if previous is not None:
+            self.status_counts[previous] -= 1
+
+    def _settle(self, before_task: int) -> None:
+        for host, (status, task) in list(self._unsettled.items()):
+            if task < before_task:
+                del self._unsettled[host]
+                self._set(host, status)
+
+    def add(self, data: dict) -> None:
+        """Feed one runner event"""
+        event = data.get("event")
+        if event == "playbook_on_task_start":
+            with self._lock:
+                self.current_task = (data.get("event_data") or {}).get("task")
+                self.tasks_started += 1
+                self.task_results = 0
+                self._task_started = time.monotonic()
+                # the host did not run the task that followed its failure
+                self._settle(self.tasks_started - 1)
+                self.version += 1
+            return
+        if event == "playbook_on_stats":
+            self.add_stats(data.get("event_data") or {})
+            return
+        status = result_status(data)
+        host = (data.get("event_data") or {}).get("host")
+        if status is None or not host:
+            return
+        if status == "ignored":
+            status = "ok"
+        with self._lock:
+            self.task_results += 1
+            self.version += 1
+            if status in RECOVERABLE:
+                self._unsettled[host] = (status, self.tasks_started)
+                return
+            self._unsettled.pop(host, None)
+            # a host never gets better than the verdict of a previous playbook of a batch
+            verdict = self._verdicts.get(host)
+            if verdict is not None and HOST_STATUS_RANK[verdict] > HOST_STATUS_RANK[status]:
+                status = verdict
+            previous = self.host_status.get(host)
+            if (
+                previous is None
+                or previous in RECOVERABLE
+                or HOST_STATUS_RANK[status] > HOST_STATUS_RANK[previous]
+            ):
+                # a failed host that still runs tasks recovered
+                self._set(host, status)
+
+    def add_stats(self, stats: dict) -> None:
+        """Take the final status of the hosts of a ``playbook_on_stats`` event, the worst across playbooks"""
+        with self._lock:
+            for host, status in stats_verdicts(stats).items():
+                previous = self._verdicts.get(host)
+                if previous is None or HOST_STATUS_RANK[status] > HOST_STATUS_RANK[previous]:
+                    self._verdicts[host] = status
+                self._unsettled.pop(host, None)
+                self._set(host, self._verdicts[host])
+            self.version += 1
+
+    def settle(self) -> None:
+        """Count the failures still pending as final, once the run is over"""
+        with self._lock:
+            if self._unsettled:
+                self._settle(self.tasks_started + 1)
+                self.version += 1
+
+    def snapshot(self) -> dict:
+        """Consistent copy of the counters with the ETA of the current task"""
+        now = time.monotonic()
+        with self._lock:
+            counts = dict(self.status_counts)
+            snap = {
+                "version": self.version,
+                "hosts_done": len(self.host_status),
+                "hosts_ok": counts["ok"] + counts["skipped"],
+                "hosts_failed": counts["failed"],
+                "hosts_unreachable": counts["unreachable"],
+                "hosts_unsettled": len(self._unsettled),
+                "total_hosts": self.total_hosts,
+                "current_task": self.current_task,
+                "tasks_started": self.tasks_started,
+                "task_results": self.task_results,
+                "elapsed": round(now - self._started, 1),
+                "task_eta": None,
+            }
+            task_elapsed = now - self._task_started
+        if self.total_hosts and snap["task_results"] and task_elapsed > 0:
+            # failed and unreachable hosts leave the play
+            active = self.total_hosts - snap["hosts_failed"] - snap["hosts_unreachable"]
+            remaining = max(active - snap["task_results"], 0)
+            snap["task_eta"] = round(
+                remaining / (snap["task_results"] / task_elapsed), 1
+            )
+        return snap
+
+
+class ProgressReporter:
+    """
+    Publish tracker snapshots from a background thread, at most once every ``interval`` seconds.
+
+    :param tracker: The tracker to read
+    :param interval: Seconds between two reports
+    :param callback: Called with each snapshot that changed since the previous report
+    """
+
+    def __init__(
+        self,
+        tracker: ProgressTracker,
+        interval: float,
+        callback: Callable[[dict], None],
+    ) -> None:
+        self.tracker = tracker
+        self.interval = interval
+        self.callback = callback
+        self._last_version = -1
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._loop, name="ansible-progress", daemon=True
+        )
+
+    def _report(self) -> None:
+        snap = self.tracker.snapshot()
+        if snap["version"] == self._last_version:
+            return
+        self._last_version = snap["version"]
+        try:
+            self.callback(snap)
+        except Exception as e:  # pylint: disable=broad-except
+            log.warning("Failed to report progress: %s", e)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._report()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the thread and publish the final counters"""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self._report()
+
+
+def write_progress(run_dir: str, progress: dict) -> None:
+    """Replace ``<run_dir>/progress.json`` atomically, readers never see a partial file"""
+    os.makedirs(run_dir, exist_ok=True)
+    path = os.path.join(run_dir, PROGRESS_FILE)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({**progress, "updated": time.time()}, f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,121 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+Small in-process cache of serialized JSON responses, with their ETag, and opaque pagination cursors.
+
+Each entry lives ``ttl`` seconds, so dashboards polling the same page every few seconds hit the
+artifact directory and the run index once per ``ttl`` whatever the number of viewers. Clients
+sending the ETag back with ``If-None-Match`` get a 304 without a body.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+
+class InvalidCursor(ValueError):
+    """The cursor was not produced by :func:`encode_cursor`"""
+
+
+def encode_cursor(position: list | tuple) -> str:
+    """Opaque cursor for the position of the last item of a page"""
+    raw = json.dumps(list(position), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    """Position encoded by :func:`encode_cursor`, raises :class:`InvalidCursor`"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(raw)
+    except (binascii.Error, ValueError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+    if not isinstance(position, list):
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}")
+    return position
+
+
+def etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest() + '"'  # nosec B324 - not a security hash
+
+
+def etag_matches(if_none_match: str | None, tag: str) -> bool:
+    """Whether an ``If-None-Match`` header matches ``tag``, weak comparison"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == tag:
+            return True
+    return False
+
+
+class ResponseCache:
+    """
+    Serialized responses by key, least recently used evicted above ``max_entries``.
+
+    :param ttl: Seconds a response is served from the cache
+    :param max_entries: Responses kept
+    """
+
+    def __init__(self, ttl: float = 2.0, max_entries: int = 1024) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, bytes, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key: str, build: Callable[[], object]) -> tuple[bytes, str]:
+        """Body and ETag of ``key``, ``build`` returns the JSON-serializable value on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], entry[2]
+            self.misses += 1
+        body = json.dumps(build(), separators=(",", ":"), default=str).encode("utf-8")
+        tag = etag(body)
+        if self.ttl > 0:
+            with self._lock:
+                self._entries[key] = (now + self.ttl, body, tag)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return body, tag
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,190 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+Run-level cache of ``ansible_return``, keyed by a content hash of everything that defines a run.
+
+Entries are ``<key>.json`` files holding the creation and expiry time and the result. Reads
+refresh the file mtime, so pruning to ``max_entries`` / ``max_bytes`` evicts the least
+recently used entries first.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import time
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+log = logging.getLogger(__name__)
+
+
+def content_hash(value) -> str:
+    """sha256 of a JSON serializable value, independent of dict ordering"""
+    data = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def file_hash(path: str) -> str | None:
+    """sha256 of a file's content, ``None`` when it does not exist"""
+    if not path or not os.path.isfile(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def git_head(path: str) -> str | None:
+    """Commit checked out in the git work tree at ``path``, read without running git"""
+    git_dir = os.path.join(path, ".git")
+    head_file = os.path.join(git_dir, "HEAD")
+    if not os.path.isfile(head_file):
+        return None
+    with open(head_file, "r", encoding="utf-8") as f:
+        head = f.read().strip()
+    if not head.startswith("ref: "):
+        return head
+    ref = head[5:]
+    ref_file = os.path.join(git_dir, ref)
+    if os.path.isfile(ref_file):
+        with open(ref_file, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    packed = os.path.join(git_dir, "packed-refs")
+    if os.path.isfile(packed):
+        with open(packed, "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 2 and parts[1] == ref:
+                    return parts[0]
+    return None
+
+
+class ResultCache:
+    """
+    Size bounded local store of successful results.
+
+    :param directory: Directory holding the entries
+    :param max_entries: Keep at most this many entries
+    :param max_bytes: Keep at most this many bytes of entries
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> dict | None:
+        """The cached result of ``key``, ``None`` when missing or expired"""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            log.warning("Dropping unreadable result cache entry %s: %s", path, e)
+            self.invalidate(key)
+            return None
+        if entry.get("expires") is not None and entry["expires"] < time.time():
+            self.invalidate(key)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def put(
+        self,
+        key: str,
+        ansible_return: dict,
+        ttl: float | None,
+        metadata: dict | None = None,
+    ) -> None:
+        """Store ``ansible_return`` for ``ttl`` seconds, forever when ``ttl`` is None"""
+        os.makedirs(self.directory, exist_ok=True)
+        now = time.time()
+        entry = {
+            "key": key,
+            "created": now,
+            "expires": now + ttl if ttl is not None else None,
+            "metadata": metadata or {},
+            "ansible_return": ansible_return,
+        }
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f, default=str)
+        os.replace(tmp, path)
+        self.prune()
+
+    def invalidate(self, key: str | None = None) -> int:
+        """Remove the entry of ``key``, or every entry when ``key`` is None"""
+        if key is not None:
+            paths = [self._path(key)]
+        elif os.path.isdir(self.directory):
+            paths = [
+                os.path.join(self.directory, name)
+                for name in os.listdir(self.directory)
+                if name.endswith(".json")
+            ]
+        else:
+            paths = []
+        removed = 0
+        for path in paths:
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def prune(self) -> int:
+        """Drop the least recently used entries above the quotas, expired ones go on read"""
+        if not os.path.isdir(self.directory):
+            return 0
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name[: -len(".json")]))
+        entries.sort(reverse=True)
+        removed = 0
+        total = 0
+        for i, (_, size, key) in enumerate(entries):
+            total += size
+            if i >= self.max_entries or total > self.max_bytes:
+                removed += self.invalidate(key)
+        return removed
@@ -0,0 +1,131 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Shape ``ansible_return`` for XCom and load it back from the artifact store."""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+import zipfile
+
+from airflow.exceptions import AirflowException
+
+RESULT_MODE_SUMMARY = "summary"
+RESULT_MODE_FULL = "full"
+RESULT_MODE_REFERENCE = "reference"
+RESULT_MODES = (RESULT_MODE_SUMMARY, RESULT_MODE_FULL, RESULT_MODE_REFERENCE)
+
+SUMMARY_KEYS = (
+    "status",
+    "rc",
+    "canceled",
+    "errored",
+    "timed_out",
+    "ident",
+    "playbook",
+    "stats",
+    "timings",
+    "cached",
+    "host_results",
+)
+
+
+def result_counts(ansible_return: dict) -> dict:
+    """Number of hosts per stats category plus event counters"""
+    counts = {
+        k: len(v)
+        for k, v in (ansible_return.get("stats") or {}).items()
+        if isinstance(v, dict)
+    }
+    ci_events = ansible_return.get("ci_events") or {}
+    if ansible_return.get("ci_events_grouped"):
+        counts["ci_events"] = sum(len(entry["hosts"]) for entry in ci_events.values())
+    else:
+        counts["ci_events"] = len(ci_events)
+    if ansible_return.get("outcomes") is not None:
+        counts["outcomes"] = len(ansible_return["outcomes"])
+    latency = ansible_return.get("latency") or {}
+    counts["hosts"] = latency.get("hosts", 0)
+    counts["results"] = latency.get("results", 0)
+    return counts
+
+
+def summarize_result(ansible_return: dict) -> dict:
+    """Small summary of ``ansible_return``: status, stats and counts only"""
+    summary = {k: ansible_return.get(k) for k in SUMMARY_KEYS}
+    summary["counts"] = result_counts(ansible_return)
+    summary["result_mode"] = RESULT_MODE_SUMMARY
+    return summary
+
+
+def reference_result(
+    ansible_return: dict,
+    path: str,
+    s3_conn_id: str | None = None,
+    s3_key: str | None = None,
+    s3_url: str | None = None,
+) -> dict:
+    """Summary of ``ansible_return`` plus a pointer to where the full result is stored"""
+    reference = summarize_result(ansible_return)
+    reference.update(
+        {
+            "result_mode": RESULT_MODE_REFERENCE,
+            "path": path,
+            "s3_conn_id": s3_conn_id or None,
+            "s3_key": s3_key,
+            "s3_url": s3_url,
+        }
+    )
+    return reference
+
+
+def load_ansible_return(result: dict, s3_conn_id: str | None = None) -> dict:
+    """
+    Return the full ``ansible_return`` for a result pushed by AnsibleOperator.
+
+    Results in ``full`` mode are returned as is. For ``reference`` results the local artifact
+    file is read when it is still present on this worker, otherwise the artifact zip is fetched
+    from S3. ``summary`` results cannot be expanded.
+
+    :param result: The XCom value returned by AnsibleOperator
+    :param s3_conn_id: Overrides the S3 connection recorded in the reference
+    """
+    mode = result.get("result_mode", RESULT_MODE_FULL)
+    if mode == RESULT_MODE_FULL:
+        return result
+    if mode != RESULT_MODE_REFERENCE:
+        raise AirflowException(f"Cannot load the full result from a {mode} result")
+    path = result.get("path")
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    s3_conn_id = s3_conn_id or result.get("s3_conn_id")
+    if not (s3_conn_id and result.get("s3_key")):
+        raise AirflowException(
+            f"{path} is not available locally and the result was not uploaded to s3"
+        )
+    from airflow_ansible_provider.utils.s3 import (  # pylint: disable=import-outside-toplevel
+        get_s3_client,
+    )
+
+    s3, extra = get_s3_client(s3_conn_id)
+    buf = io.BytesIO()
+    s3.download_fileobj(extra.get("bucket_name"), result["s3_key"], buf)
+    with zipfile.ZipFile(buf) as z:
+        return json.loads(z.read("ansible_return.json"))
@@ -0,0 +1,254 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+Retention for the artifact directory.
+
+The artifact directory holds one ``<ident>/`` directory per ansible-runner run and the zipped
+bundles under ``<YYYY-MM-DD>/<run_id>/ansible-<ident>.zip``. AnsibleOperator marks a run as
+in progress with ``<ident>/.in_progress`` and as uploaded with ``<ident>/.uploaded`` and
+``<zip>.uploaded``; the sweep never deletes in-progress runs and, unless told otherwise, only
+deletes what was uploaded.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+
+IN_PROGRESS_MARKER = ".in_progress"
+UPLOADED_MARKER = ".uploaded"
+LOCK_FILE = ".retention.lock"
+LAST_SWEEP_FILE = ".last_sweep"
+
+IDENT_RE = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+log = logging.getLogger(__name__)
+
+_sweeper: threading.Thread | None = None
+
+
+def mark(path: str, marker: str) -> None:
+    """Create ``marker`` in directory ``path`` (or next to file ``path``)"""
+    target = (
+        os.path.join(path, marker) if os.path.isdir(path) else f"{path}{marker}"
+    )
+    try:
+        with open(target, "w", encoding="utf-8") as f:
+            f.write(str(time.time()))
+    except OSError as e:
+        log.warning("Failed to create %s: %s", target, e)
+
+
+def unmark(path: str, marker: str) -> None:
+    """Remove ``marker`` from directory ``path``"""
+    try:
+        os.unlink(os.path.join(path, marker))
+    except FileNotFoundError:
+        pass
+
+
+def _tree_size(path: str) -> tuple[int, float]:
+    """Total size and newest mtime below ``path``"""
+    if os.path.isfile(path):
+        st = os.stat(path)
+        return st.st_size, st.st_mtime
+    size, mtime = 0, os.stat(path).st_mtime
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                st = os.stat(os.path.join(root, name))
+            except FileNotFoundError:
+                continue
+            size += st.st_size
+            mtime = max(mtime, st.st_mtime)
+    return size, mtime
+
+
+def _entries(artifact_dir: str) -> list[dict]:
+    entries = []
+    with os.scandir(artifact_dir) as it:
+        for d in it:
+            if d.is_dir() and IDENT_RE.match(d.name):
+                size, mtime = _tree_size(d.path)
+                entries.append(
+                    {
+                        "path": d.path,
+                        "run": True,
+                        "size": size,
+                        "mtime": mtime,
+                        "in_progress": os.path.exists(
+                            os.path.join(d.path, IN_PROGRESS_MARKER)
+                        ),
+                        "uploaded": os.path.exists(
+                            os.path.join(d.path, UPLOADED_MARKER)
+                        ),
+                    }
+                )
+            elif d.is_dir() and DATE_RE.match(d.name):
+                for root, _, files in os.walk(d.path):
+                    for name in files:
+                        if not name.endswith(".zip"):
+                            continue
+                        path = os.path.join(root, name)
+                        size, mtime = _tree_size(path)
+                        entries.append(
+                            {
+                                "path": path,
+                                "run": False,
+                                "size": size,
+                                "mtime": mtime,
+                                "in_progress": False,
+                                "uploaded": os.path.exists(path + UPLOADED_MARKER),
+                            }
+                        )
+    return entries
+
+
+def _remove(entry: dict) -> None:
+    if entry["run"]:
+        shutil.rmtree(entry["path"], ignore_errors=True)
+    else:
+        for path in (entry["path"], entry["path"] + UPLOADED_MARKER):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        # drop the emptied <run_id> and <date> directories
+        parent = os.path.dirname(entry["path"])
+        for _ in range(2):
+            try:
+                os.rmdir(parent)
+            except OSError:
+                break
+            parent = os.path.dirname(parent)
+
+
+def sweep_artifacts(
+    artifact_dir: str,
+    max_age_days: float | None = None,
+    max_bytes: int | None = None,
+    max_count: int | None = None,
+    require_upload: bool = True,
+    grace_seconds: float = 3600,
+    dry_run: bool = False,
+) -> dict:
+    """
+    Delete old artifacts until the age, size and count quotas are met.
+
+    Oldest entries go first. Runs marked in progress, or modified within ``grace_seconds``, are
+    never deleted, and neither is anything not marked as uploaded when ``require_upload`` is set.
+
+    :param artifact_dir: The artifact directory to sweep
+    :param max_age_days: Delete entries older than this
+    :param max_bytes: Delete the oldest entries while the directory is larger than this
+    :param max_count: Keep at most this many run directories
+    :param require_upload: Only delete entries that were uploaded to S3
+    :param grace_seconds: Treat entries modified more recently than this as in progress
+    :param dry_run: Only report what would be deleted
+    :return: Counters including ``reclaimed_bytes``
+    """
+    report = {
+        "removed": 0,
+        "reclaimed_bytes": 0,
+        "skipped_in_progress": 0,
+        "skipped_not_uploaded": 0,
+        "remaining_bytes": 0,
+        "dry_run": dry_run,
+    }
+    if not os.path.isdir(artifact_dir):
+        return report
+    with open(os.path.join(artifact_dir, LOCK_FILE), "w", encoding="utf-8") as lock:
+        try:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            log.info("Another retention sweep is running on %s", artifact_dir)
+            return report
+
+        now = time.time()
+        entries = sorted(_entries(artifact_dir), key=lambda e: e["mtime"])
+        total = sum(e["size"] for e in entries)
+        runs = sum(1 for e in entries if e["run"])
+
+        def eligible(entry: dict) -> bool:
+            if entry["in_progress"] or now - entry["mtime"] < grace_seconds:
+                report["skipped_in_progress"] += 1
+                return False
+            if require_upload and not entry["uploaded"]:
+                report["skipped_not_uploaded"] += 1
+                return False
+            return True
+
+        for entry in entries:
+            expired = (
+                max_age_days is not None
+                and now - entry["mtime"] > max_age_days * 86400
+            )
+            over_size = max_bytes is not None and total > max_bytes
+            over_count = max_count is not None and entry["run"] and runs > max_count
+            if not (expired or over_size or over_count) or not eligible(entry):
+                continue
+            if not dry_run:
+                _remove(entry)
+            report["removed"] += 1
+            report["reclaimed_bytes"] += entry["size"]
+            total -= entry["size"]
+            runs -= 1 if entry["run"] else 0
+        report["remaining_bytes"] = total
+        if not dry_run:
+            with open(
+                os.path.join(artifact_dir, LAST_SWEEP_FILE), "w", encoding="utf-8"
+            ) as f:
+                f.write(str(now))
+    log.info("Swept %s: %s", artifact_dir, report)
+    return report
+
+
+def maybe_sweep(artifact_dir: str, interval: float = 3600, **quotas) -> dict | None:
+    """Run :func:`sweep_artifacts` if the last sweep of ``artifact_dir`` is older than ``interval``"""
+    try:
+        last = os.stat(os.path.join(artifact_dir, LAST_SWEEP_FILE)).st_mtime
+    except FileNotFoundError:
+        last = 0
+    if time.time() - last < interval:
+        return None
+    return sweep_artifacts(artifact_dir, **quotas)
+
+
+def start_periodic_sweep(artifact_dir: str, interval: float, **quotas) -> threading.Thread:
+    """Sweep ``artifact_dir`` every ``interval`` seconds from a daemon thread, once per process"""
+    global _sweeper  # pylint: disable=global-statement
+    if _sweeper is not None and _sweeper.is_alive():
+        return _sweeper
+
+    def loop():
+        while True:
+            try:
+                maybe_sweep(artifact_dir, interval, **quotas)
+            except Exception as e:  # pylint: disable=broad-except
+                log.warning("Artifact retention sweep failed: %s", e)
+            time.sleep(interval)
+
+    _sweeper = threading.Thread(target=loop, name="ansible-artifact-retention", daemon=True)
+    _sweeper.start()
+    return _sweeper
@@ -0,0 +1,147 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Per-host outcome of previous tries, so a retry only runs the hosts that did not succeed."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from urllib.parse import quote
+
+from airflow_ansible_provider.utils.progress import stats_verdicts
+
+SUCCEEDED = ("ok", "skipped")
+# ansible-runner statuses of a run that went to the end of its playbook
+FINISHED = ("successful", "failed")
+RETRY_STATE_DIR = "retry_state"
+
+log = logging.getLogger(__name__)
+
+
+def state_key(dag_id: str, run_id: str, task_id: str, map_index: int = -1) -> str:
+    """Relative path of the state of one task instance"""
+    name = task_id if map_index is None or map_index < 0 else f"{task_id}.{map_index}"
+    return "/".join(
+        (RETRY_STATE_DIR, quote(dag_id, safe=""), quote(run_id, safe=""), f"{quote(name, safe='')}.json")
+    )
+
+
+def load_state(artifact_dir: str, key: str, s3_conn_id: str | None = None) -> dict | None:
+    """Load the state saved by the previous try, from the artifact dir or S3"""
+    path = os.path.join(artifact_dir, key)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    if not s3_conn_id:
+        return None
+    from airflow_ansible_provider.utils.s3 import (  # pylint: disable=import-outside-toplevel
+        get_s3_client,
+    )
+
+    try:
+        s3, extra = get_s3_client(s3_conn_id)
+        obj = s3.get_object(Bucket=extra.get("bucket_name"), Key=key)
+        return json.loads(obj["Body"].read())
+    except Exception as e:  # pylint: disable=broad-except
+        log.info("No retry state %s on s3: %s", key, e)
+        return None
+
+
+def save_state(artifact_dir: str, key: str, state: dict, s3_conn_id: str | None = None) -> None:
+    """Persist the state of this try locally and, when configured, on S3"""
+    path = os.path.join(artifact_dir, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = json.dumps(state)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+    if s3_conn_id:
+        from airflow_ansible_provider.utils.s3 import (  # pylint: disable=import-outside-toplevel
+            get_s3_client,
+        )
+
+        try:
+            s3, extra = get_s3_client(s3_conn_id)
+            s3.put_object(Bucket=extra.get("bucket_name"), Key=key, Body=data.encode())
+        except Exception as e:  # pylint: disable=broad-except
+            log.warning("Failed to save retry state %s on s3: %s", key, e)
+
+
+def succeeded_hosts(state: dict) -> set[str]:
+    return {h for h, status in state.get("hosts", {}).items() if status in SUCCEEDED}
+
+
+def run_finished(ansible_return: dict) -> bool:
+    """Whether every playbook of the run went to its end, not canceled, timed out or left out of a batch"""
+    runs = ansible_return.get("playbooks") or [ansible_return]
+    return (
+        not ansible_return.get("canceled")
+        and not ansible_return.get("timed_out")
+        and not ansible_return.get("skipped_playbooks")
+        and all(run.get("status") in FINISHED for run in runs)
+    )
+
+
+def final_host_status(ansible_return: dict) -> dict[str, str]:
+    """Status of the hosts in the stats of a finished run, empty when the run did not finish"""
+    if not run_finished(ansible_return):
+        return {}
+    return stats_verdicts(ansible_return.get("stats") or {})
+
+
+def try_host_status(ansible_return: dict, host_status: dict[str, str]) -> dict[str, str]:
+    """
+    Status of every host that reported in this try.
+
+    A host only succeeds with an ``ok`` in the stats of a finished run: one that passed its first tasks
+    before a cancel, timeout or kill is ``incomplete``, and ignored or rescued errors do not fail it.
+
+    :param host_status: The live status of the hosts, see :class:`ProgressTracker`
+    """
+    hosts = {
+        host: status if status in ("failed", "unreachable") else "incomplete"
+        for host, status in host_status.items()
+    }
+    hosts.update(final_host_status(ansible_return))
+    return hosts
+
+
+def rerun_hosts(state: dict | None) -> set[str]:
+    """Hosts of the previous tries whose entries this try replaces: all but the succeeded ones"""
+    if not state:
+        return set()
+    return set(state.get("hosts", {})) - succeeded_hosts(state)
+
+
+def merge_by_host(previous: dict | None, current: dict | None, rerun: set[str]) -> dict:
+    """Keep the previous entries of hosts that were not rerun, take the current ones for the others"""
+    merged = {h: v for h, v in (previous or {}).items() if h not in rerun}
+    merged.update(current or {})
+    return merged
+
+
+def merge_stats(previous: dict | None, current: dict | None, rerun: set[str]) -> dict | None:
+    """Merge ansible stats (``{category: {host: count}}``) across tries"""
+    if not previous:
+        return current
+    categories = set(previous) | set(current or {})
+    return {
+        k: merge_by_host(previous.get(k), (current or {}).get(k), rerun)
+        for k in categories
+    }
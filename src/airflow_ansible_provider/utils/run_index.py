@@ -0,0 +1,384 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+Local SQLite index of runs and task results, to answer "when did host X last fail" without
+downloading artifact bundles.
+
+Task results are inserted in batches while the playbook runs, the run summary when it ends.
+``maintain`` compacts results older than ``detail_days`` into per host and day counters and
+drops everything older than ``retention_days``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from airflow_ansible_provider.utils.outcomes import outcome
+
+DEFAULT_RUN_INDEX_DB = "run_index.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    ident TEXT PRIMARY KEY,
+    dag_id TEXT,
+    task_id TEXT,
+    run_id TEXT,
+    try_number INTEGER,
+    playbook TEXT,
+    status TEXT,
+    rc INTEGER,
+    started REAL,
+    finished REAL,
+    hosts INTEGER,
+    failed INTEGER,
+    unreachable INTEGER,
+    changed INTEGER,
+    s3_path_url TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_finished ON runs (finished);
+CREATE INDEX IF NOT EXISTS runs_dag ON runs (dag_id, task_id, finished);
+CREATE TABLE IF NOT EXISTS results (
+    ident TEXT NOT NULL,
+    host TEXT NOT NULL,
+    task TEXT,
+    task_action TEXT,
+    status TEXT NOT NULL,
+    duration REAL,
+    msg TEXT,
+    at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_host ON results (host, at);
+CREATE INDEX IF NOT EXISTS results_ident ON results (ident);
+CREATE INDEX IF NOT EXISTS results_at ON results (at);
+CREATE TABLE IF NOT EXISTS host_daily (
+    host TEXT NOT NULL,
+    day TEXT NOT NULL,
+    status TEXT NOT NULL,
+    results INTEGER NOT NULL,
+    last_at REAL NOT NULL,
+    PRIMARY KEY (host, day, status)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value REAL
+);
+"""
+
+# a JSON array parameter, any number of DAGs without hitting the limit of SQL parameters
+_DAG_IDS_FILTER = "{column} IN (SELECT value FROM json_each(?))"
+
+log = logging.getLogger(__name__)
+
+
+class RunIndex:
+    """
+    SQLite store of runs and task results, shared by every task that uses the same file.
+
+    :param path: The database file
+    :param batch_size: Results buffered before they are inserted
+    """
+
+    def __init__(self, path: str, batch_size: int = 1000) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        self._buffer: list[tuple] = []
+        self._lock = threading.Lock()
+        self._schema_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if not self._schema_ready:
+            conn.executescript(SCHEMA)
+            self._schema_ready = True
+        return conn
+
+    # writing
+
+    def add(self, data: dict) -> None:
+        """Feed one runner event, task results are buffered and inserted in batches"""
+        host_outcome = outcome(data)
+        if host_outcome is None:
+            return
+        event_data = data["event_data"]
+        duration = event_data.get("duration")
+        row = (
+            data.get("runner_ident"),
+            event_data["host"],
+            host_outcome["task"],
+            host_outcome["task_action"],
+            host_outcome["status"],
+            float(duration) if isinstance(duration, (int, float)) else None,
+            host_outcome["msg"],
+            time.time(),
+        )
+        with self._lock:
+            self._buffer.append(row)
+            if len(self._buffer) < self.batch_size:
+                return
+            rows, self._buffer = self._buffer, []
+        self._insert(rows)
+
+    def flush(self) -> None:
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if rows:
+            self._insert(rows)
+
+    def _insert(self, rows: list[tuple]) -> None:
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO results (ident, host, task, task_action, status, duration, msg, at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+        finally:
+            conn.close()
+
+    def record_run(self, run: dict) -> None:
+        """Insert or replace the summary of one run, ``run`` holds the columns of ``runs``"""
+        columns = (
+            "ident",
+            "dag_id",
+            "task_id",
+            "run_id",
+            "try_number",
+            "playbook",
+            "status",
+            "rc",
+            "started",
+            "finished",
+            "hosts",
+            "failed",
+            "unreachable",
+            "changed",
+            "s3_path_url",
+        )
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    f"INSERT OR REPLACE INTO runs ({', '.join(columns)}) "
+                    f"VALUES ({', '.join('?' for _ in columns)})",
+                    tuple(run.get(column) for column in columns),
+                )
+        finally:
+            conn.close()
+
+    # maintenance
+
+    def maintain(
+        self,
+        detail_days: float = 30,
+        retention_days: float = 365,
+        interval: float = 3600,
+        force: bool = False,
+    ) -> dict | None:
+        """
+        Compact and expire the index, at most once every ``interval`` seconds.
+
+        :param detail_days: Task results older than this are folded into ``host_daily`` counters
+        :param retention_days: Runs and counters older than this are deleted
+        :param interval: Seconds between two maintenances by any task
+        :param force: Ignore ``interval``
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute("SELECT value FROM meta WHERE key = 'maintained'").fetchone()
+                if not force and row and row[0] + interval > now:
+                    return None
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('maintained', ?)", (now,)
+                )
+                detail_cutoff = now - detail_days * 86400
+                retention_cutoff = now - retention_days * 86400
+                conn.execute(
+                    "INSERT INTO host_daily (host, day, status, results, last_at) "
+                    "SELECT host, date(at, 'unixepoch'), status, count(*), max(at) FROM results "
+                    "WHERE at < ? GROUP BY host, date(at, 'unixepoch'), status "
+                    "ON CONFLICT(host, day, status) DO UPDATE SET "
+                    "results = results + excluded.results, last_at = max(last_at, excluded.last_at)",
+                    (detail_cutoff,),
+                )
+                compacted = conn.execute(
+                    "DELETE FROM results WHERE at < ?", (detail_cutoff,)
+                ).rowcount
+                expired_runs = conn.execute(
+                    "DELETE FROM runs WHERE finished < ?", (retention_cutoff,)
+                ).rowcount
+                conn.execute("DELETE FROM host_daily WHERE last_at < ?", (retention_cutoff,))
+            if compacted or expired_runs:
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                conn.execute("VACUUM")
+        finally:
+            conn.close()
+        log.info("Run index: compacted %s results, expired %s runs", compacted, expired_runs)
+        return {"compacted_results": compacted, "expired_runs": expired_runs}
+
+    # queries
+
+    def _query(self, sql: str, params: tuple = ()) -> list[dict]:
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        try:
+            return [dict(row) for row in conn.execute(sql, params)]
+        finally:
+            conn.close()
+
+    def host_history(
+        self,
+        host: str,
+        limit: int = 50,
+        before: tuple[float, int] | None = None,
+        dag_ids: set[str] | None = None,
+    ) -> list[dict]:
+        """
+        Latest results of ``host``, newest first, with the DAG task and run they belong to.
+
+        :param before: ``(at, id)`` of the last result of the previous page
+        :param dag_ids: Only the results of runs of these DAGs
+        """
+        filters, params = ["r.host = ?"], [host]
+        if before:
+            filters.append("(r.at < ? OR (r.at = ? AND r.rowid < ?))")
+            params.extend((before[0], before[0], before[1]))
+        if dag_ids is not None:
+            filters.append(_DAG_IDS_FILTER.format(column="runs.dag_id"))
+            params.append(json.dumps(sorted(dag_ids)))
+        return self._query(
+            "SELECT r.rowid AS id, r.at, r.status, r.task, r.msg, r.duration, r.ident, "
+            "runs.dag_id, runs.task_id, runs.run_id, runs.playbook, runs.s3_path_url "
+            "FROM results r LEFT JOIN runs ON runs.ident = r.ident "
+            f"WHERE {' AND '.join(filters)} ORDER BY r.at DESC, r.rowid DESC LIMIT ?",
+            (*params, limit),
+        )
+
+    def run_results(self, ident: str, limit: int = 500, after: int | None = None) -> list[dict]:
+        """
+        Task results of one run in the order they were received.
+
+        :param after: ``id`` of the last result of the previous page
+        """
+        return self._query(
+            "SELECT rowid AS id, host, task, task_action, status, duration, msg, at FROM results "
+            "WHERE ident = ? AND rowid > ? ORDER BY rowid LIMIT ?",
+            (ident, after if after is not None else 0, limit),
+        )
+
+    def last_failure(self, host: str, dag_ids: set[str] | None = None) -> dict | None:
+        """
+        Most recent failed or unreachable result of ``host``, compacted days included.
+
+        :param dag_ids: Only the results of runs of these DAGs, compacted days have no DAG and are left out
+        """
+        dag_filter = ""
+        params: tuple = (host,)
+        if dag_ids is not None:
+            dag_filter = " AND " + _DAG_IDS_FILTER.format(column="runs.dag_id")
+            params = (host, json.dumps(sorted(dag_ids)))
+        rows = self._query(
+            "SELECT r.at, r.status, r.task, r.msg, r.ident, runs.dag_id, runs.task_id, runs.run_id "
+            "FROM results r LEFT JOIN runs ON runs.ident = r.ident "
+            f"WHERE r.host = ? AND r.status IN ('failed', 'unreachable'){dag_filter} "
+            "ORDER BY r.at DESC LIMIT 1",
+            params,
+        )
+        if rows:
+            return rows[0]
+        if dag_ids is not None:
+            return None
+        rows = self._query(
+            "SELECT last_at AS at, status, day FROM host_daily "
+            "WHERE host = ? AND status IN ('failed', 'unreachable') ORDER BY last_at DESC LIMIT 1",
+            (host,),
+        )
+        return rows[0] if rows else None
+
+    def failure_trend(self, days: int = 30, dag_id: str | None = None) -> list[dict]:
+        """Failed and unreachable hosts per day over the last ``days`` days"""
+        since = time.time() - days * 86400
+        dag_filter = " AND runs.dag_id = ?" if dag_id else ""
+        params: tuple = (since, dag_id) if dag_id else (since,)
+        return self._query(
+            "SELECT date(r.at, 'unixepoch') AS day, "
+            "count(DISTINCT CASE WHEN r.status = 'failed' THEN r.host END) AS failed_hosts, "
+            "count(DISTINCT CASE WHEN r.status = 'unreachable' THEN r.host END) AS unreachable_hosts, "
+            "count(DISTINCT r.host) AS hosts "
+            "FROM results r LEFT JOIN runs ON runs.ident = r.ident "
+            f"WHERE r.at >= ?{dag_filter} GROUP BY day ORDER BY day",
+            params,
+        )
+
+    def slowest_tasks(
+        self, limit: int = 20, days: int = 7, dag_id: str | None = None
+    ) -> list[dict]:
+        """Tasks with the highest mean duration over the last ``days`` days"""
+        since = time.time() - days * 86400
+        dag_filter = " AND runs.dag_id = ?" if dag_id else ""
+        params: tuple = (since, dag_id, limit) if dag_id else (since, limit)
+        return self._query(
+            "SELECT r.task, r.task_action, count(*) AS results, avg(r.duration) AS mean_duration, "
+            "max(r.duration) AS max_duration, count(DISTINCT r.ident) AS runs "
+            "FROM results r LEFT JOIN runs ON runs.ident = r.ident "
+            f"WHERE r.at >= ? AND r.duration IS NOT NULL{dag_filter} "
+            "GROUP BY r.task, r.task_action ORDER BY mean_duration DESC LIMIT ?",
+            params,
+        )
+
+    def runs(
+        self,
+        dag_id: str | None = None,
+        limit: int = 50,
+        before: tuple[float, str] | None = None,
+        dag_ids: set[str] | None = None,
+    ) -> list[dict]:
+        """
+        Latest run summaries, of one DAG when ``dag_id`` is given.
+
+        :param before: ``(finished, ident)`` of the last run of the previous page
+        :param dag_ids: Only the runs of these DAGs
+        """
+        filters, params = [], []
+        if dag_id:
+            filters.append("dag_id = ?")
+            params.append(dag_id)
+        if dag_ids is not None:
+            filters.append(_DAG_IDS_FILTER.format(column="dag_id"))
+            params.append(json.dumps(sorted(dag_ids)))
+        if before:
+            filters.append("(finished < ? OR (finished = ? AND ident < ?))")
+            params.extend((before[0], before[0], before[1]))
+        where = f"WHERE {' AND '.join(filters)} " if filters else ""
+        return self._query(
+            f"SELECT * FROM runs {where}ORDER BY finished DESC, ident DESC LIMIT ?",
+            (*params, limit),
+        )
+
+    def run(self, ident: str) -> dict | None:
+        """Summary of one run, ``None`` until it is recorded"""
+        rows = self._query("SELECT * FROM runs WHERE ident = ?", (ident,))
+        return rows[0] if rows else None
@@ -0,0 +1,83 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""State of one ansible-runner run, so several playbooks of a batch can run side by side."""
+
+from __future__ import annotations
+
+from airflow_ansible_provider.utils.event_log import SegmentedEventLog
+from airflow_ansible_provider.utils.event_stats import LatencyAggregator
+from airflow_ansible_provider.utils.progress import ProgressTracker
+
+STATS_KEYS = (
+    "changed",
+    "dark",
+    "failures",
+    "ignored",
+    "ok",
+    "processed",
+    "rescued",
+    "skipped",
+)
+
+
+class RunState:
+    """
+    What the event handler collects about one playbook run.
+
+    :param playbook: The playbook of the run
+    :param latency_top_n: Number of slowest hosts, tasks and results kept by the latency aggregator
+    :param progress: Tracker of this run, pass the operator's one when there is a single run
+    """
+
+    def __init__(
+        self,
+        playbook: str,
+        latency_top_n: int = 10,
+        progress: ProgressTracker | None = None,
+    ) -> None:
+        self.playbook = playbook
+        self.ci_events: dict = {}
+        self.last_event: dict = {}
+        self.runner_ident: str | None = None
+        self.latency = LatencyAggregator(top_n=latency_top_n)
+        self.progress = progress or ProgressTracker()
+        self.event_log: SegmentedEventLog | None = None
+        self.stats: dict | None = None
+
+    def set_stats(self, data: dict) -> None:
+        """Keep the stats of the playbook_on_stats event, Runner.stats needs the job_events files"""
+        self.stats = {
+            k: v for k, v in (data.get("event_data") or {}).items() if k in STATS_KEYS
+        }
+
+    def close(self) -> None:
+        if self.event_log is not None:
+            self.event_log.close()
+
+
+def combine_stats(stats: list[dict | None]) -> dict | None:
+    """Add up the per-host stats of several playbooks, like ansible does for several plays"""
+    combined: dict[str, dict[str, int]] = {}
+    for item in stats:
+        for category, hosts in (item or {}).items():
+            if not isinstance(hosts, dict):
+                continue
+            target = combined.setdefault(category, {})
+            for host, count in hosts.items():
+                target[host] = target.get(host, 0) + count
+    return combined or None
@@ -0,0 +1,56 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""S3 client for the artifact store connection."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Tuple
+
+from airflow.exceptions import AirflowException
+from airflow.models import Connection
+
+
+def get_s3_client(s3_conn_id: str) -> Tuple[Any, dict]:
+    """
+    Build a boto3 S3 client from an Airflow connection.
+
+    The connection ``host`` is the endpoint url, ``login``/``password`` the access keys, and
+    ``extra`` carries ``bucket_name``, ``url`` (public url prefix) and ``addressing_style``.
+
+    :return: The client and the connection extra
+    """
+    # boto3 is only needed when a task runs, keep it out of DAG parsing
+    import boto3  # pylint: disable=import-outside-toplevel
+    from botocore.config import Config  # pylint: disable=import-outside-toplevel
+
+    if not s3_conn_id:
+        raise AirflowException("s3_conn_id is not set")
+    c = Connection.get_connection_from_secrets(conn_id=s3_conn_id)
+    extra = json.loads(c.extra)
+    s3 = boto3.client(
+        "s3",
+        aws_access_key_id=c.login,
+        aws_secret_access_key=c.password,
+        endpoint_url=c.host,
+        config=Config(
+            s3={"addressing_style": extra.get("addressing_style", "path")}
+        ),  # idc: path, oss or aws: virtual
+        verify=False,
+    )
+    return s3, extra
@@ -0,0 +1,57 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Helpers for the OpenSSH ControlMaster sockets that ansible keeps between runs."""
+
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import stat
+import subprocess
+
+log = logging.getLogger(__name__)
+
+
+def close_control_sockets(directory: str, remove: bool = True) -> int:
+    """Ask the ssh master of every socket in ``directory`` to exit, then remove the directory"""
+    closed = 0
+    if not os.path.isdir(directory):
+        return closed
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        try:
+            if not stat.S_ISSOCK(os.lstat(path).st_mode):
+                continue
+        except FileNotFoundError:
+            continue
+        try:
+            # the destination is required by ssh but unused with -S
+            subprocess.run(
+                ["ssh", "-S", path, "-O", "exit", "control-master"],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=5,
+                check=False,
+            )
+            closed += 1
+        except (OSError, subprocess.TimeoutExpired) as e:
+            log.warning("Failed to close ssh control socket %s: %s", path, e)
+    if remove:
+        shutil.rmtree(directory, ignore_errors=True)
+    return closed
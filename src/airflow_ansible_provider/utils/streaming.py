@@ -0,0 +1,204 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+Run a job on a separate executor with ansible-runner's streaming mode.
+
+The job is packaged locally with ``transmit`` and written to the stdin of ``executor_command``,
+which must run ``ansible-runner worker`` (``["ansible-runner", "worker"]`` locally, or behind
+``ssh``/``nc`` for another host). Its stdout is consumed locally with ``process``, which calls
+the event handler with the same events as a local run and unpacks the artifacts into the local
+artifact directory.
+
+Only the private data dir is shipped, so the project is copied into it and path arguments are
+made relative to it. Roles paths, collections and the ansible-playbook binary must exist on the
+executor.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import uuid
+from types import SimpleNamespace
+from typing import Callable
+
+log = logging.getLogger(__name__)
+
+LIMIT_FILE = ".ansible-limit"
+
+
+def _stage(private_data_dir: str, runner_kwargs: dict) -> dict:
+    """Copy the project, inventory and limit file into the private data dir"""
+    kwargs = dict(runner_kwargs)
+    project_dir = kwargs.pop("project_dir")
+    project = os.path.join(private_data_dir, "project")
+    shutil.copytree(
+        project_dir, project, symlinks=True, ignore=shutil.ignore_patterns(".git")
+    )
+    for key in ("playbook", "cmdline"):
+        value = kwargs.get(key)
+        if isinstance(value, str) and os.path.isabs(value):
+            relative = os.path.relpath(value, project_dir)
+            if not relative.startswith(os.pardir):
+                kwargs[key] = relative
+    inventory = kwargs.get("inventory")
+    if isinstance(inventory, str) and os.path.isfile(inventory):
+        os.makedirs(os.path.join(private_data_dir, "inventory"))
+        shutil.copy(inventory, os.path.join(private_data_dir, "inventory", "hosts"))
+        kwargs.pop("inventory")
+    limit = kwargs.get("limit")
+    if isinstance(limit, str) and limit.startswith("@"):
+        # ansible-playbook runs in the project dir
+        shutil.copy(limit[1:], os.path.join(project, LIMIT_FILE))
+        kwargs["limit"] = f"@{LIMIT_FILE}"
+    return kwargs
+
+
+def run_streamed(
+    executor_command: list[str],
+    runner_kwargs: dict,
+    event_handler: Callable[[dict], bool],
+    cancel_callback: Callable[[], bool],
+    work_dir: str | None = None,
+    poll_interval: float = 1,
+):
+    """
+    Run ``ansible_runner.run(**runner_kwargs)`` on the executor and return a Runner-like object.
+
+    :param executor_command: Command running ``ansible-runner worker``, fed on stdin
+    :param runner_kwargs: Arguments of a local ``ansible_runner.run``, ``artifact_dir`` and
+        ``project_dir`` included
+    :param event_handler: Called with every event, as with a local run
+    :param cancel_callback: Polled every ``poll_interval`` seconds, True stops the executor
+    :param work_dir: Where to create the temporary private data dir
+    """
+    import ansible_runner  # pylint: disable=import-outside-toplevel
+
+    ident = str(uuid.uuid4())
+    # unlike a local run, process unpacks the artifacts into artifact_dir itself
+    ident_dir = os.path.join(runner_kwargs["artifact_dir"], ident)
+    with tempfile.TemporaryDirectory(prefix="transmit-", dir=work_dir) as private_data_dir:
+        kwargs = _stage(private_data_dir, runner_kwargs)
+        kwargs.pop("artifact_dir")
+        kwargs.pop("event_handler", None)
+        kwargs.pop("cancel_callback", None)
+        kwargs.pop("quiet", None)
+        worker = subprocess.Popen(  # pylint: disable=consider-using-with
+            executor_command, stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+        errors: list[BaseException] = []
+        done = threading.Event()
+        canceled = threading.Event()
+
+        def _transmit():
+            try:
+                ansible_runner.run(
+                    private_data_dir=private_data_dir,
+                    streamer="transmit",
+                    _output=worker.stdin,
+                    ident=ident,
+                    **kwargs,
+                )
+            except BaseException as e:  # pylint: disable=broad-except
+                errors.append(e)
+            finally:
+                try:
+                    worker.stdin.close()
+                except OSError:
+                    pass
+
+        def _watch():
+            while not done.wait(poll_interval):
+                if cancel_callback():
+                    log.warning("Canceling the job on the executor")
+                    canceled.set()
+                    worker.terminate()
+                    return
+
+        transmitter = threading.Thread(target=_transmit, name="ansible-transmit", daemon=True)
+        watcher = threading.Thread(target=_watch, name="ansible-stream-cancel", daemon=True)
+        transmitter.start()
+        watcher.start()
+        try:
+            processor = ansible_runner.run(
+                private_data_dir=private_data_dir,
+                streamer="process",
+                _input=worker.stdout,
+                ident=ident,
+                artifact_dir=ident_dir,
+                event_handler=event_handler,
+                quiet=True,
+            )
+        finally:
+            done.set()
+            transmitter.join()
+            worker.stdout.close()
+            worker_rc = worker.wait()
+        if errors:
+            raise errors[0]
+        inventory = os.path.join(ident_dir, "inventory")
+        os.makedirs(ident_dir, exist_ok=True)
+        if isinstance(runner_kwargs.get("inventory"), (dict, list)):
+            with open(inventory, "w", encoding="utf-8") as f:
+                json.dump(runner_kwargs["inventory"], f)
+        elif os.path.isfile(os.path.join(private_data_dir, "inventory", "hosts")):
+            shutil.copy(os.path.join(private_data_dir, "inventory", "hosts"), inventory)
+        else:
+            inventory = None
+    status = getattr(processor, "status", None)
+    rc = getattr(processor, "rc", None)
+    if rc is None and os.path.isfile(os.path.join(ident_dir, "rc")):
+        with open(os.path.join(ident_dir, "rc"), "r", encoding="utf-8") as f:
+            rc = int(f.read().strip() or 0)
+    if canceled.is_set():
+        status = "canceled"
+    elif status in (None, "unstarted"):
+        log.error("Executor exited with %s without a final status", worker_rc)
+        status, rc = "failed", rc if rc is not None else worker_rc
+    return SimpleNamespace(
+        canceled=canceled.is_set(),
+        directory_isolation_cleanup=None,
+        directory_isolation_path=None,
+        errored=status == "error",
+        last_stdout_update=None,
+        process_isolation=None,
+        process_isolation_path_actual=None,
+        rc=rc,
+        remove_partials=None,
+        runner_mode="streaming",
+        stats=None,
+        status=status,
+        timed_out=status == "timeout",
+        config=SimpleNamespace(
+            artifact_dir=ident_dir,
+            command=executor_command,
+            cwd=None,
+            fact_cache=None,
+            fact_cache_type=None,
+            ident=ident,
+            inventory=inventory,
+            playbook=kwargs.get("playbook"),
+            private_data_dir=None,
+            project_dir=None,
+        ),
+    )
@@ -0,0 +1,267 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+Fleet telemetry: per DAG and playbook statistics of completed Ansible tasks over rolling windows.
+
+Each completed task gives one sample: duration, hosts, failed hosts and how the time splits between
+preparing the run (inventory, blobs, controller pool...), ansible-runner itself and the rest (result
+shaping, upload). Samples are kept in memory for the longest window and, when a store path is given,
+appended to a SQLite file so short-lived task processes add up. ``flush`` emits the window aggregates
+as gauges through Airflow's stats interface.
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from airflow_ansible_provider.utils.timing import STATS_PREFIX
+
+DEFAULT_TELEMETRY_DB = "telemetry.sqlite"
+DEFAULT_WINDOWS = (300, 3600, 86400)
+# phases timed by AnsibleOperator before ansible-runner starts
+PREPARE_PHASES = ("pre_execute", "fingerprint", "host_health", "controller_pool")
+EXECUTE_PHASES = ("ansible_runner",)
+SAMPLE_COLUMNS = (
+    "dag_id",
+    "playbook",
+    "finished",
+    "success",
+    "duration",
+    "prepare",
+    "execute",
+    "hosts",
+    "failed_hosts",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    dag_id TEXT NOT NULL,
+    playbook TEXT NOT NULL,
+    finished REAL NOT NULL,
+    success INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    prepare REAL NOT NULL,
+    execute REAL NOT NULL,
+    hosts INTEGER NOT NULL,
+    failed_hosts INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS samples_finished ON samples (finished);
+"""
+
+log = logging.getLogger(__name__)
+
+
+def task_sample(
+    dag_id: str, ansible_return: dict, timings: dict[str, float], success: bool
+) -> dict:
+    """Sample of one completed task from its ``ansible_return`` and phase timings"""
+    stats = ansible_return.get("stats") or {}
+    hosts = len(stats.get("processed") or {}) or (ansible_return.get("latency") or {}).get("hosts") or 0
+    failed_hosts = set(stats.get("failures") or {}) | set(stats.get("dark") or {})
+    playbook = ansible_return.get("playbook")
+    if isinstance(playbook, (list, tuple)):
+        playbook = ",".join(str(p) for p in playbook)
+    prepare = sum(timings.get(phase, 0.0) for phase in PREPARE_PHASES)
+    execute = sum(timings.get(phase, 0.0) for phase in EXECUTE_PHASES)
+    return {
+        "dag_id": dag_id,
+        "playbook": playbook or "",
+        "finished": time.time(),
+        "success": bool(success),
+        "duration": max(timings.get("pre_execute", 0.0) + timings.get("execute", 0.0), prepare + execute),
+        "prepare": prepare,
+        "execute": execute,
+        "hosts": int(hosts),
+        "failed_hosts": len(failed_hosts),
+    }
+
+
+def aggregate(samples: list[dict]) -> dict:
+    """Window statistics of ``samples``, all of one DAG and playbook"""
+    durations = sorted(s["duration"] for s in samples)
+    total_duration = sum(durations)
+    hosts = sum(s["hosts"] for s in samples)
+    execute = sum(s["execute"] for s in samples)
+    prepare = sum(s["prepare"] for s in samples)
+    return {
+        "tasks": len(samples),
+        "failed_tasks": sum(1 for s in samples if not s["success"]),
+        "duration_mean": round(total_duration / len(samples), 3) if samples else None,
+        "duration_p95": round(durations[int(len(durations) * 0.95)], 3) if samples else None,
+        "duration_max": round(durations[-1], 3) if samples else None,
+        "hosts": hosts,
+        "hosts_mean": round(hosts / len(samples), 1) if samples else None,
+        # fleet throughput of ansible-runner, not of the whole task
+        "hosts_per_second": round(hosts / execute, 3) if execute > 0 else None,
+        "failure_rate": round(sum(s["failed_hosts"] for s in samples) / hosts, 4) if hosts else None,
+        "prepare_share": round(prepare / total_duration, 3) if total_duration > 0 else None,
+        "execute_share": round(execute / total_duration, 3) if total_duration > 0 else None,
+    }
+
+
+class FleetTelemetry:
+    """
+    Rolling windows of task samples per DAG and playbook.
+
+    :param path: SQLite file shared by every process, samples are only kept in memory when None
+    :param windows: Window lengths in seconds
+    :param flush_interval: Seconds between two flushes triggered by ``add``
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        windows: tuple[int, ...] = DEFAULT_WINDOWS,
+        flush_interval: float = 60,
+    ) -> None:
+        self.path = path
+        self.windows = tuple(sorted(windows))
+        self.flush_interval = flush_interval
+        self._samples: dict[tuple[str, str], deque] = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._schema_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if not self._schema_ready:
+            conn.executescript(SCHEMA)
+            self._schema_ready = True
+        return conn
+
+    def add(self, sample: dict) -> None:
+        """Record one sample, written to the store at once, and flush when ``flush_interval`` elapsed"""
+        key = (sample["dag_id"], sample["playbook"])
+        horizon = sample["finished"] - self.windows[-1]
+        with self._lock:
+            samples = self._samples.setdefault(key, deque())
+            samples.append(sample)
+            while samples and samples[0]["finished"] < horizon:
+                samples.popleft()
+        if self.path:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute(
+                        f"INSERT INTO samples ({', '.join(SAMPLE_COLUMNS)}) "
+                        f"VALUES ({', '.join('?' for _ in SAMPLE_COLUMNS)})",
+                        tuple(sample[column] for column in SAMPLE_COLUMNS),
+                    )
+            finally:
+                conn.close()
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def _window_samples(self, since: float) -> dict[tuple[str, str], list[dict]]:
+        if self.path:
+            conn = self._connect()
+            conn.row_factory = sqlite3.Row
+            try:
+                rows = conn.execute(
+                    f"SELECT {', '.join(SAMPLE_COLUMNS)} FROM samples WHERE finished >= ?", (since,)
+                ).fetchall()
+            finally:
+                conn.close()
+            grouped: dict[tuple[str, str], list[dict]] = {}
+            for row in rows:
+                grouped.setdefault((row["dag_id"], row["playbook"]), []).append(dict(row))
+            return grouped
+        with self._lock:
+            return {
+                key: [s for s in samples if s["finished"] >= since]
+                for key, samples in self._samples.items()
+            }
+
+    def snapshot(self) -> list[dict]:
+        """Aggregates of every DAG and playbook seen in each window"""
+        now = time.time()
+        # one read of the longest window, the shorter ones are subsets
+        by_key = self._window_samples(now - self.windows[-1])
+        result = []
+        for (dag_id, playbook), samples in sorted(by_key.items()):
+            for window in self.windows:
+                in_window = [s for s in samples if s["finished"] >= now - window]
+                if in_window:
+                    result.append(
+                        {"dag_id": dag_id, "playbook": playbook, "window": window, **aggregate(in_window)}
+                    )
+        return result
+
+    def flush(self) -> list[dict]:
+        """Emit the window aggregates as gauges and expire samples older than the longest window"""
+        self._last_flush = time.monotonic()
+        try:
+            snapshot = self.snapshot()
+            if self.path:
+                conn = self._connect()
+                try:
+                    with conn:
+                        conn.execute(
+                            "DELETE FROM samples WHERE finished < ?", (time.time() - self.windows[-1],)
+                        )
+                finally:
+                    conn.close()
+        except sqlite3.Error as e:
+            log.warning("Failed to read fleet telemetry from %s: %s", self.path, e)
+            return []
+        _emit(snapshot)
+        return snapshot
+
+
+GAUGES = (
+    "tasks",
+    "failed_tasks",
+    "duration_mean",
+    "duration_p95",
+    "hosts_mean",
+    "hosts_per_second",
+    "failure_rate",
+    "prepare_share",
+    "execute_share",
+)
+
+
+def _emit(snapshot: list[dict]) -> None:
+    try:
+        from airflow.stats import Stats  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return
+    for entry in snapshot:
+        tags = {
+            "dag_id": entry["dag_id"],
+            "playbook": entry["playbook"],
+            "window": str(entry["window"]),
+        }
+        for name in GAUGES:
+            if entry[name] is None:
+                continue
+            try:
+                try:
+                    Stats.gauge(f"{STATS_PREFIX}.fleet.{name}", entry[name], tags=tags)
+                except TypeError:  # Airflow < 2.6 has no tags
+                    Stats.gauge(
+                        f"{STATS_PREFIX}.fleet.{entry['dag_id']}.{entry['window']}.{name}", entry[name]
+                    )
+            except Exception as e:  # metrics must never fail a task
+                log.debug("Failed to emit fleet gauge %s: %s", name, e)
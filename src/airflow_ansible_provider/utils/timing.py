@@ -0,0 +1,93 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Per-phase timing spans for AnsibleOperator."""
+
+from __future__ import annotations
+
+import datetime
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+
+STATS_PREFIX = "ansible_provider"
+
+log = logging.getLogger(__name__)
+
+
+class PhaseTimer:
+    """
+    Accumulate wall time per provider phase and emit it through Airflow's stats interface.
+
+    :param tags: Tags attached to every emitted metric, e.g. dag_id and task_id
+    :param emit_spans: Also open an OpenTelemetry span per phase when Airflow tracing is available
+    """
+
+    def __init__(self, tags: dict | None = None, emit_spans: bool = False) -> None:
+        self.tags = tags or {}
+        self.emit_spans = emit_spans
+        self.timings: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+
+    @contextmanager
+    def span(self, name: str):
+        """Time the enclosed block as phase ``name`` and emit it when the block exits"""
+        with ExitStack() as stack:
+            if self.emit_spans:
+                self._enter_trace_span(stack, name)
+            start = time.perf_counter()
+            try:
+                yield
+            finally:
+                self.add(name, time.perf_counter() - start)
+                self.emit(name)
+
+    def add(self, name: str, seconds: float) -> None:
+        """Accumulate ``seconds`` for phase ``name`` without emitting, for hot paths"""
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def emit(self, name: str) -> None:
+        """Emit the accumulated time of phase ``name`` as a timer metric"""
+        if name not in self.timings:
+            return
+        try:
+            from airflow.stats import Stats  # pylint: disable=import-outside-toplevel
+
+            dt = datetime.timedelta(seconds=self.timings[name])
+            try:
+                Stats.timing(f"{STATS_PREFIX}.{name}", dt, tags=self.tags)
+            except TypeError:  # Airflow < 2.6 has no tags
+                Stats.timing(f"{STATS_PREFIX}.{name}", dt)
+        except Exception as e:  # metrics must never fail a task
+            log.debug("Failed to emit timing %s: %s", name, e)
+
+    def as_dict(self) -> dict[str, float]:
+        """Timings in seconds, rounded to milliseconds"""
+        return {k: round(v, 3) for k, v in self.timings.items()}
+
+    def _enter_trace_span(self, stack: ExitStack, name: str) -> None:
+        try:
+            from airflow.traces.tracer import Trace  # pylint: disable=import-outside-toplevel
+
+            span = stack.enter_context(
+                Trace.start_span(span_name=name, component="AnsibleOperator")
+            )
+            for k, v in self.tags.items():
+                span.set_attribute(k, str(v))
+        except Exception as e:  # tracing is optional
+            log.debug("Tracing span %s is not available: %s", name, e)
@@ -0,0 +1,181 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""
+Per-host stall detection fed from the runner events.
+
+A host is stalled when its current task has not reported for ``stall_timeout`` seconds. Ansible's
+own per-task timeout (``ANSIBLE_TASK_TIMEOUT``) normally fails the task first, which drops the
+host from the rest of the playbook while the other hosts go on. When even that does not happen,
+e.g. the worker is stuck in the connection, ``on_stall`` is called ``kill_grace`` seconds later
+to break the host's connection.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Callable
+
+log = logging.getLogger(__name__)
+
+TASK_TIMEOUT_MESSAGE = "expected time frame"
+ACTIVITY_EVENTS = frozenset(
+    {
+        "runner_on_async_poll",
+        "runner_retry",
+        "runner_item_on_ok",
+        "runner_item_on_failed",
+        "runner_item_on_skipped",
+    }
+)
+RESULT_EVENTS = frozenset(
+    {
+        "runner_on_ok",
+        "runner_on_failed",
+        "runner_on_skipped",
+        "runner_on_unreachable",
+        "runner_on_async_ok",
+        "runner_on_async_failed",
+    }
+)
+
+
+class HostWatchdog:
+    """
+    Track the running task of every host and report the hosts that stop reporting.
+
+    :param stall_timeout: Seconds without an event for the current task of a host
+    :param kill_grace: Further seconds before ``on_stall`` is called for a host still silent
+    :param on_stall: Called with the host and its known addresses, returns what it did
+    :param interval: Seconds between two checks of the background thread
+    """
+
+    def __init__(
+        self,
+        stall_timeout: float,
+        kill_grace: float = 60,
+        on_stall: Callable[[str, set[str]], str] | None = None,
+        interval: float | None = None,
+    ) -> None:
+        self.stall_timeout = stall_timeout
+        self.kill_grace = kill_grace
+        self.on_stall = on_stall
+        self.interval = interval or min(max(stall_timeout / 10, 0.5), 10)
+        self.running: dict[str, dict] = {}
+        self.hits: dict[str, dict] = {}
+        self.addresses: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._loop, name="ansible-watchdog", daemon=True
+        )
+
+    def add(self, data: dict) -> None:
+        """Feed one runner event"""
+        event = data.get("event")
+        event_data = data.get("event_data") or {}
+        host = event_data.get("host")
+        if event == "playbook_on_stats":
+            with self._lock:
+                self.running.clear()
+            return
+        if not host:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if event_data.get("remote_addr"):
+                self.addresses.setdefault(host, set()).add(event_data["remote_addr"])
+            if event == "runner_on_start":
+                self.running[host] = {
+                    "task": event_data.get("task"),
+                    "started": now,
+                    "last_event": now,
+                }
+            elif event in ACTIVITY_EVENTS and host in self.running:
+                self.running[host]["last_event"] = now
+            elif event in RESULT_EVENTS:
+                self.running.pop(host, None)
+                hit = self.hits.get(host)
+                if hit is not None and hit["result"] is None:
+                    msg = str((event_data.get("res") or {}).get("msg") or "")
+                    hit["result"] = event.replace("runner_on_", "")
+                    if TASK_TIMEOUT_MESSAGE in msg:
+                        hit["action"] = "task_timeout"
+                    elif hit["action"] == "stalled":
+                        hit["action"] = "recovered"
+
+    def check(self) -> list[str]:
+        """Record the newly stalled hosts, call ``on_stall`` for the ones past the grace period"""
+        now = time.monotonic()
+        to_kill = []
+        with self._lock:
+            for host, running in self.running.items():
+                silent = now - running["last_event"]
+                if silent < self.stall_timeout:
+                    continue
+                hit = self.hits.get(host)
+                if hit is None or hit["task"] != running["task"]:
+                    log.warning(
+                        "Host %s silent for %ss on task %s",
+                        host,
+                        round(silent),
+                        running["task"],
+                    )
+                    self.hits[host] = {
+                        "task": running["task"],
+                        "silent_seconds": round(silent, 1),
+                        "action": "stalled",
+                        "result": None,
+                    }
+                    continue
+                hit["silent_seconds"] = round(silent, 1)
+                if hit["action"] == "stalled" and silent >= self.stall_timeout + self.kill_grace:
+                    to_kill.append(host)
+            addresses = {host: self.addresses.get(host, set()) | {host} for host in to_kill}
+        for host in to_kill:
+            action = "no_action"
+            if self.on_stall is not None:
+                try:
+                    action = self.on_stall(host, addresses[host])
+                except Exception as e:  # pylint: disable=broad-except
+                    log.warning("Failed to stop stalled host %s: %s", host, e)
+                    action = "kill_failed"
+            with self._lock:
+                self.hits[host]["action"] = action
+        return to_kill
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def report(self) -> dict:
+        with self._lock:
+            return {
+                "stall_timeout": self.stall_timeout,
+                "kill_grace": self.kill_grace,
+                "hosts": {host: dict(hit) for host, hit in self.hits.items()},
+            }
@@ -0,0 +1,87 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+from __future__ import annotations
+
+from airflow_ansible_provider.utils.circuit_breaker import CircuitBreaker
+from airflow_ansible_provider.utils.progress import ProgressTracker
+
+from tests.test_progress import result, stats, task_start
+
+HOSTS = [f"web{i:02d}" for i in range(10)]
+
+
+def run(events: list[dict], **thresholds) -> CircuitBreaker:
+    """Feed ``events`` and check the breaker after each one, as the operator's event handler does"""
+    tracker = ProgressTracker(total_hosts=len(HOSTS))
+    breaker = CircuitBreaker(**thresholds)
+    for data in events:
+        tracker.add(data)
+        if breaker.check(tracker):
+            break
+    return breaker
+
+
+def test_ignored_errors_do_not_trip():
+    events = [task_start("probe")]
+    events += [
+        result(host, "runner_on_failed", ignore_errors=True) if i < 8 else result(host, "runner_on_ok")
+        for i, host in enumerate(HOSTS)
+    ]
+    for task in ("install", "configure"):
+        events.append(task_start(task))
+        events += [result(host, "runner_on_ok") for host in HOSTS]
+    events.append(stats(HOSTS, ignored=HOSTS[:8]))
+    assert not run(events, max_fail_percentage=50).tripped
+
+
+def test_rescued_errors_do_not_trip():
+    # every host fails the block task and runs the rescue right after
+    events = [task_start("block task")]
+    events += [result(host, "runner_on_failed") for host in HOSTS]
+    events.append(task_start("rescue task"))
+    events += [result(host, "runner_on_ok") for host in HOSTS]
+    events.append(task_start("after the block"))
+    events += [result(host, "runner_on_ok") for host in HOSTS]
+    events.append(stats(HOSTS, rescued=HOSTS))
+    assert not run(events, max_fail_percentage=50).tripped
+
+
+def test_real_failures_trip():
+    events = [task_start("t1")]
+    events += [
+        result(host, "runner_on_failed") if i < 6 else result(host, "runner_on_ok")
+        for i, host in enumerate(HOSTS)
+    ]
+    events.append(task_start("t2"))
+    events += [result(host, "runner_on_ok") for host in HOSTS[6:]]
+    events.append(task_start("t3"))
+    breaker = run(events, max_fail_percentage=50)
+    assert breaker.tripped
+    assert breaker.reason.startswith("6/10 hosts failed")
+
+
+def test_unreachable_hosts_trip():
+    events = [task_start("gather facts")]
+    events += [
+        result(host, "runner_on_unreachable") if i < 3 else result(host, "runner_on_ok")
+        for i, host in enumerate(HOSTS)
+    ]
+    events.append(task_start("t1"))
+    events += [result(host, "runner_on_ok") for host in HOSTS[3:]]
+    events.append(task_start("t2"))
+    assert run(events, max_unreachable_percentage=20).tripped
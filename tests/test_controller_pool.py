@@ -0,0 +1,63 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+from __future__ import annotations
+
+import os
+import signal
+import socket
+
+from airflow_ansible_provider.utils.controller_pool import (
+    _recv_message,
+    _send_message,
+    exit_code,
+)
+
+
+def test_message_with_fds_round_trip():
+    parent, child = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+    read_fd, write_fd = os.pipe()
+    try:
+        message = {"op": "run", "env": {f"VAR_{i}": "x" * 100 for i in range(1000)}}
+        _send_message(parent, message, [write_fd])
+        received, fds = _recv_message(child, max_fds=3)
+        assert received == message
+        assert len(fds) == 1
+        # the received descriptor writes to the same pipe
+        os.write(fds[0], b"ok")
+        os.close(fds[0])
+        assert os.read(read_fd, 2) == b"ok"
+        _send_message(child, {"rc": 0})
+        assert _recv_message(parent) == ({"rc": 0}, [])
+    finally:
+        for fd in (read_fd, write_fd):
+            os.close(fd)
+        parent.close()
+        child.close()
+
+
+def test_exit_code():
+    pid = os.fork()
+    if pid == 0:
+        os._exit(3)
+    assert exit_code(os.waitpid(pid, 0)[1]) == 3
+    pid = os.fork()
+    if pid == 0:
+        signal.pause()
+        os._exit(0)
+    os.kill(pid, signal.SIGTERM)
+    assert exit_code(os.waitpid(pid, 0)[1]) == 128 + signal.SIGTERM
@@ -0,0 +1,54 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+from __future__ import annotations
+
+from airflow_ansible_provider.utils.event_stats import LatencyAggregator
+
+
+def result(host: str, task: str, duration: float) -> dict:
+    return {
+        "event": "runner_on_ok",
+        "event_data": {"host": host, "task": task, "task_uuid": task, "duration": duration},
+    }
+
+
+def feed(aggregator: LatencyAggregator) -> dict:
+    for i, host in enumerate(("web1", "web2", "db1")):
+        aggregator.add(result(host, "ping", 1.0 + 2 * i))
+        aggregator.add(result(host, "deploy", 10.0 - i))
+    return aggregator.summary()
+
+
+def test_slowest_results_are_bounded_by_top_n():
+    summary = feed(LatencyAggregator(top_n=2))
+    assert summary["results"] == 6
+    assert summary["slowest_results"] == [
+        {"host": "web1", "task": "deploy", "duration": 10.0},
+        {"host": "web2", "task": "deploy", "duration": 9.0},
+    ]
+    assert [h["host"] for h in summary["slowest_hosts"]] == ["db1", "web2"]
+
+
+def test_top_n_zero_reports_no_slowest_entries():
+    summary = feed(LatencyAggregator(top_n=0))
+    assert summary["results"] == 6
+    assert summary["hosts"] == 3
+    assert len(summary["tasks"]) == 2
+    assert summary["slowest_results"] == []
+    assert summary["slowest_hosts"] == []
+    assert summary["slowest_tasks"] == []
@@ -0,0 +1,85 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+from __future__ import annotations
+
+import json
+import threading
+import time
+
+from airflow_ansible_provider.utils.host_fingerprint import (
+    FingerprintStore,
+    host_fingerprints,
+)
+
+INVENTORY = {
+    "web": {"hosts": {"web1": {"port": 22}, "web2": {}}, "vars": {"role": "web"}},
+}
+RUN = {"playbook": "abc", "extravars": {"version": 1}}
+
+
+def test_fingerprint_changes_with_host_group_and_run_inputs():
+    base = host_fingerprints(INVENTORY, RUN)
+    assert set(base) == {"web1", "web2"}
+    host_var = host_fingerprints(
+        {"web": {"hosts": {"web1": {"port": 2222}, "web2": {}}, "vars": {"role": "web"}}}, RUN
+    )
+    assert host_var["web1"] != base["web1"] and host_var["web2"] == base["web2"]
+    group_var = host_fingerprints(
+        {"web": {"hosts": {"web1": {"port": 22}, "web2": {}}, "vars": {"role": "api"}}}, RUN
+    )
+    assert all(group_var[host] != base[host] for host in base)
+    run = host_fingerprints(INVENTORY, dict(RUN, extravars={"version": 2}))
+    assert all(run[host] != base[host] for host in base)
+    assert host_fingerprints("/etc/ansible/hosts", RUN) is None
+
+
+def test_changed_hosts(tmp_path):
+    store = FingerprintStore(str(tmp_path), "dag/1", "task")
+    fingerprints = host_fingerprints(INVENTORY, RUN)
+    assert store.changed(fingerprints) == {"web1", "web2"}
+    store.update({"web1": fingerprints["web1"]})
+    assert store.changed(fingerprints) == {"web2"}
+    assert store.changed(dict(fingerprints, web1="other")) == {"web1", "web2"}
+
+
+def test_ttl_reruns_old_fingerprints(tmp_path):
+    store = FingerprintStore(str(tmp_path), "dag", "task")
+    store.update({"web1": "a"})
+    assert store.changed({"web1": "a"}, ttl=3600) == set()
+    with open(store.path, "r", encoding="utf-8") as f:
+        stored = json.load(f)
+    stored["web1"]["at"] = time.time() - 7200
+    with open(store.path, "w", encoding="utf-8") as f:
+        json.dump(stored, f)
+    assert store.changed({"web1": "a"}, ttl=3600) == {"web1"}
+    assert store.changed({"web1": "a"}) == set()
+
+
+def test_concurrent_updates_keep_every_host(tmp_path):
+    def update(i: int):
+        FingerprintStore(str(tmp_path), "dag", "task").update({f"host{i}": str(i)})
+
+    threads = [threading.Thread(target=update, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stored = FingerprintStore(str(tmp_path), "dag", "task").load()
+    assert {host: entry["fingerprint"] for host, entry in stored.items()} == {
+        f"host{i}": str(i) for i in range(20)
+    }
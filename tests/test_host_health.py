@@ -0,0 +1,71 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+from __future__ import annotations
+
+import time
+
+from airflow_ansible_provider.utils.host_health import HostHealthStore
+
+
+def store(tmp_path, **options) -> HostHealthStore:
+    return HostHealthStore(str(tmp_path / "health.sqlite"), **options)
+
+
+def test_backoff_doubles_up_to_the_max(tmp_path):
+    health = store(tmp_path, threshold=2, base_backoff=600, max_backoff=3000)
+    assert health.backoff(1) is None
+    assert health.backoff(2) == 600
+    assert health.backoff(3) == 1200
+    assert health.backoff(4) == 2400
+    assert health.backoff(5) == 3000
+
+
+def test_host_is_excluded_after_threshold_runs(tmp_path):
+    health = store(tmp_path, threshold=2, base_backoff=600)
+    health.record(["web1"], {"web2": "ssh: connect timed out"})
+    assert health.excluded(["web1", "web2"]) == {}
+    before = time.time()
+    assert health.record([], {"web2": "ssh: connect timed out"}) == {
+        "reachable": 0,
+        "unreachable": 1,
+        "restored": 0,
+    }
+    excluded = health.excluded(["web1", "web2"])
+    assert list(excluded) == ["web2"]
+    assert excluded["web2"]["failures"] == 2
+    assert excluded["web2"]["last_error"] == "ssh: connect timed out"
+    assert before + 600 <= excluded["web2"]["excluded_until"] <= time.time() + 600
+    # only the hosts asked for
+    assert health.excluded(["web1"]) == {}
+
+
+def test_reachable_host_is_restored(tmp_path):
+    health = store(tmp_path, threshold=1)
+    health.record([], {"web1": None})
+    assert "web1" in health.excluded(["web1"])
+    assert health.record(["web1"], {})["restored"] == 1
+    assert health.excluded(["web1"]) == {}
+    # the count starts over
+    health.record([], {"web1": None})
+    assert health.excluded(["web1"])["web1"]["failures"] == 1
+
+
+def test_expired_exclusion_is_retried(tmp_path):
+    health = store(tmp_path, threshold=1, base_backoff=-1)
+    health.record([], {"web1": None})
+    assert health.excluded(["web1"]) == {}
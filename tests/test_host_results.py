@@ -0,0 +1,85 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+from __future__ import annotations
+
+import pytest
+
+from airflow_ansible_provider.utils.host_results import HostResultTable, read_host_results
+
+
+def table() -> HostResultTable:
+    results = HostResultTable()
+    results.add(
+        {
+            "event": "runner_on_ok",
+            "event_data": {
+                "host": "web1",
+                "play": "deploy",
+                "task": "copy",
+                "task_action": "copy",
+                "duration": 1.5,
+                "res": {"changed": True},
+            },
+        },
+        playbook="site.yml",
+    )
+    results.add(
+        {
+            "event": "runner_on_failed",
+            "event_data": {"host": "web2", "task": "copy", "res": {"msg": "denied"}},
+        },
+        playbook="site.yml",
+    )
+    # not a task result
+    results.add({"event": "playbook_on_task_start", "event_data": {"task": "copy"}})
+    return results
+
+
+EXPECTED = {
+    "playbook": ["site.yml", "site.yml"],
+    "play": ["deploy", None],
+    "task": ["copy", "copy"],
+    "task_action": ["copy", None],
+    "host": ["web1", "web2"],
+    "status": ["ok", "failed"],
+    "changed": [True, False],
+    "duration": [1.5, None],
+    "msg": [None, "denied"],
+}
+
+
+def test_csv_round_trip_keeps_the_types(tmp_path):
+    export = table().write(str(tmp_path), "csv")
+    assert export["format"] == "csv" and export["rows"] == 2
+    assert read_host_results(export["path"]) == EXPECTED
+    assert read_host_results(export["path"], ["host", "changed"]) == {
+        "host": ["web1", "web2"],
+        "changed": [True, False],
+    }
+
+
+def test_parquet_and_csv_read_the_same(tmp_path):
+    pytest.importorskip("pyarrow")
+    export = table().write(str(tmp_path), "parquet")
+    assert export["format"] == "parquet"
+    assert read_host_results(export["path"]) == EXPECTED
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        table().write(str(tmp_path), "xlsx")
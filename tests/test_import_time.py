@@ -0,0 +1,50 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+from __future__ import annotations
+
+import importlib.util
+import os
+import statistics
+
+import pytest
+
+pytest.importorskip("airflow")
+
+
+def _benchmark():
+    path = os.path.join(os.path.dirname(__file__), os.pardir, "benchmarks", "import_time.py")
+    spec = importlib.util.spec_from_file_location("import_time", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+import_time = _benchmark()
+
+BUDGET_MS = 150
+RUNS = 3
+
+
+@pytest.mark.parametrize("name", sorted(import_time.TARGETS))
+def test_entry_point_import_time(name):
+    durations = []
+    for _ in range(RUNS):
+        duration, heavy = import_time.measure(import_time.TARGETS[name])
+        assert heavy == [], f"{name} imports {heavy} at parse time"
+        durations.append(duration)
+    assert statistics.median(durations) <= BUDGET_MS
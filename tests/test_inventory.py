@@ -0,0 +1,106 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from airflow_ansible_provider.utils.inventory import (
+    expand_host_range,
+    file_inventory_hosts,
+    host_inputs,
+    inventory_hosts,
+    resolve_inventory_hosts,
+)
+
+INVENTORY = {
+    "web": {"hosts": {"web1": {"port": 22}, "web2": None}, "vars": {"role": "web"}},
+    "prod": {"children": {"web": {}, "db": {"hosts": ["db1"]}}, "vars": {"env": "prod"}},
+    "_meta": {"hostvars": {"lb1": {"vip": True}}},
+}
+
+
+def test_inventory_hosts():
+    assert inventory_hosts(INVENTORY) == {"web1", "web2", "db1", "lb1"}
+    assert inventory_hosts("/etc/ansible/hosts") is None
+
+
+def test_host_inputs_follow_children():
+    inputs = host_inputs(INVENTORY)
+    assert inputs["web1"] == {
+        "vars": {"port": 22},
+        "groups": {"web": {"role": "web"}, "prod": {"env": "prod"}},
+    }
+    assert inputs["db1"]["groups"] == {"prod": {"env": "prod"}, "db": {}}
+    assert inputs["lb1"] == {"vars": {"vip": True}, "groups": {}}
+
+
+def test_expand_host_range():
+    assert expand_host_range("web[01:03].example.com") == [
+        "web01.example.com",
+        "web02.example.com",
+        "web03.example.com",
+    ]
+    assert expand_host_range("db[a:c]") == ["dba", "dbb", "dbc"]
+    assert expand_host_range("n[0:4:2]") == ["n0", "n2", "n4"]
+    assert expand_host_range("r[1:2]-[a:b]") == ["r1-a", "r1-b", "r2-a", "r2-b"]
+    assert expand_host_range("plain") == ["plain"]
+
+
+def test_ini_inventory(tmp_path):
+    path = tmp_path / "hosts"
+    path.write_text(
+        "lonely ansible_host=10.0.0.1\n"
+        "# comment\n"
+        "[web]\n"
+        "web[1:2] ansible_user=deploy\n"
+        "proxy:2222\n"
+        "[web:vars]\n"
+        "http_port=80\n"
+        "[prod:children]\n"
+        "web\n"
+    )
+    assert file_inventory_hosts(str(path)) == {"lonely", "web1", "web2", "proxy"}
+
+
+def test_yaml_and_json_inventory_directory(tmp_path):
+    pytest.importorskip("yaml")
+    (tmp_path / "web.yml").write_text(
+        "all:\n  children:\n    web:\n      hosts:\n        web1:\n        web2:\n"
+    )
+    (tmp_path / "db.json").write_text('{"db": {"hosts": ["db1"]}}')
+    (tmp_path / "group_vars").mkdir()
+    (tmp_path / "group_vars" / "all.yml").write_text("x: 1\n")
+    (tmp_path / "old~").write_text("[stale]\nstale1\n")
+    assert resolve_inventory_hosts(str(tmp_path)) == {"web1", "web2", "db1"}
+
+
+def test_unknown_inventories(tmp_path):
+    script = tmp_path / "ec2.py"
+    script.write_text("#!/bin/sh\necho '{}'\n")
+    os.chmod(script, 0o755)
+    assert file_inventory_hosts(str(script)) is None
+    plugin = tmp_path / "aws_ec2.json"
+    plugin.write_text('{"plugin": "aws_ec2"}')
+    assert file_inventory_hosts(str(plugin)) is None
+    broken = tmp_path / "broken.json"
+    broken.write_text("{")
+    assert file_inventory_hosts(str(broken)) is None
+    assert resolve_inventory_hosts(str(tmp_path / "missing")) is None
+    assert resolve_inventory_hosts(None) is None
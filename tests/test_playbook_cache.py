@@ -0,0 +1,73 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+from __future__ import annotations
+
+import base64
+import os
+import time
+
+from airflow_ansible_provider.utils.playbook_cache import (
+    PLAYBOOK_FILE,
+    evict,
+    materialize_playbook,
+)
+
+PLAYBOOK = b"- hosts: all\n  tasks: []\n"
+
+
+def encoded(data: bytes) -> str:
+    return base64.b64encode(data).decode()
+
+
+def age(path, seconds: float):
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_same_content_is_written_once(tmp_path):
+    first = materialize_playbook(encoded(PLAYBOOK), str(tmp_path))
+    with open(os.path.join(first, PLAYBOOK_FILE), "rb") as f:
+        assert f.read() == PLAYBOOK
+    age(first, 3600)
+    assert materialize_playbook(encoded(PLAYBOOK), str(tmp_path)) == first
+    # reuse refreshes the directory for eviction
+    assert time.time() - os.stat(first).st_mtime < 60
+    other = materialize_playbook(encoded(PLAYBOOK + b"# v2\n"), str(tmp_path))
+    assert other != first
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        [os.path.basename(first), os.path.basename(other)]
+    )
+
+
+def test_evict_least_recently_used_past_min_age(tmp_path):
+    for name, seconds in (("a", 400), ("b", 300), ("c", 200), ("d", 100)):
+        (tmp_path / name).mkdir()
+        age(tmp_path / name, seconds)
+    # only "a" is both over the quota and older than min_age
+    assert evict(str(tmp_path), max_entries=2, min_age=350) == 1
+    assert sorted(os.listdir(tmp_path)) == ["b", "c", "d"]
+    assert evict(str(tmp_path), max_entries=2, min_age=0) == 1
+    assert sorted(os.listdir(tmp_path)) == ["c", "d"]
+
+
+def test_stale_temporary_directories_are_evicted(tmp_path):
+    materialize_playbook(encoded(PLAYBOOK), str(tmp_path))
+    (tmp_path / ".tmp-crashed").mkdir()
+    age(tmp_path / ".tmp-crashed", 7200)
+    assert evict(str(tmp_path), max_entries=1, min_age=3600) == 1
+    assert not (tmp_path / ".tmp-crashed").exists()
@@ -0,0 +1,128 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+from __future__ import annotations
+
+from airflow_ansible_provider.utils.outcomes import outcome
+from airflow_ansible_provider.utils.progress import ProgressTracker, result_status
+
+
+def task_start(task: str) -> dict:
+    return {"event": "playbook_on_task_start", "event_data": {"task": task}}
+
+
+def result(host: str, event: str, **event_data) -> dict:
+    return {"event": event, "event_data": {"host": host, "task": "task", **event_data}}
+
+
+def stats(processed, failures=(), dark=(), **categories) -> dict:
+    data = {
+        "processed": {host: 1 for host in processed},
+        "failures": {host: 1 for host in failures},
+        "dark": {host: 1 for host in dark},
+    }
+    data.update({k: {host: 1 for host in v} for k, v in categories.items()})
+    return {"event": "playbook_on_stats", "event_data": data}
+
+
+def feed(tracker: ProgressTracker, events: list[dict]) -> ProgressTracker:
+    for data in events:
+        tracker.add(data)
+    return tracker
+
+
+def test_ignored_error_is_not_a_failure():
+    data = result("web1", "runner_on_failed", ignore_errors=True)
+    assert result_status(data) == "ignored"
+    assert outcome(data)["status"] == "ignored"
+    tracker = feed(ProgressTracker(), [task_start("probe"), data, task_start("next"), task_start("last")])
+    assert tracker.host_status == {"web1": "ok"}
+    assert tracker.status_counts["failed"] == 0
+
+
+def test_failure_counts_once_the_host_skipped_a_task():
+    tracker = feed(
+        ProgressTracker(),
+        [
+            task_start("t1"),
+            result("web1", "runner_on_failed"),
+            result("web2", "runner_on_ok"),
+            task_start("t2"),
+            result("web2", "runner_on_ok"),
+        ],
+    )
+    assert "web1" not in tracker.host_status
+    assert tracker.snapshot()["hosts_unsettled"] == 1
+    tracker.add(task_start("t3"))
+    assert tracker.host_status == {"web1": "failed", "web2": "ok"}
+    assert tracker.status_counts["failed"] == 1
+
+
+def test_rescued_host_recovers():
+    tracker = feed(
+        ProgressTracker(),
+        [
+            task_start("t1"),
+            result("web1", "runner_on_failed"),
+            result("web2", "runner_on_ok"),
+            task_start("t2"),
+            result("web2", "runner_on_ok"),
+            task_start("t3"),
+        ],
+    )
+    assert tracker.host_status["web1"] == "failed"
+    # linear strategy: the rescue of web1 runs after the rest of the block
+    feed(tracker, [task_start("rescue"), result("web1", "runner_on_ok")])
+    assert tracker.host_status == {"web1": "ok", "web2": "ok"}
+    assert tracker.status_counts == {"skipped": 0, "ok": 2, "failed": 0, "unreachable": 0}
+
+
+def test_stats_give_the_final_status():
+    tracker = feed(
+        ProgressTracker(),
+        [
+            task_start("t1"),
+            result("web1", "runner_on_failed"),
+            result("web2", "runner_on_failed"),
+            stats(["web1", "web2"], failures=["web2"], rescued=["web1"]),
+        ],
+    )
+    assert tracker.host_status == {"web1": "ok", "web2": "failed"}
+    assert tracker.snapshot()["hosts_unsettled"] == 0
+
+
+def test_stats_keep_the_worst_status_across_playbooks():
+    tracker = feed(
+        ProgressTracker(),
+        [
+            stats(["web1", "web2"], failures=["web1"]),
+            task_start("t1"),
+            result("web1", "runner_on_ok"),
+            result("web2", "runner_on_ok"),
+            stats(["web1", "web2"]),
+        ],
+    )
+    assert tracker.host_status == {"web1": "failed", "web2": "ok"}
+
+
+def test_settle_makes_pending_failures_final():
+    tracker = feed(
+        ProgressTracker(),
+        [task_start("t1"), result("web1", "runner_on_unreachable")],
+    )
+    tracker.settle()
+    assert tracker.host_status == {"web1": "unreachable"}
@@ -0,0 +1,96 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+from __future__ import annotations
+
+import os
+import time
+
+from airflow_ansible_provider.utils.result_cache import (
+    ResultCache,
+    content_hash,
+    git_head,
+)
+
+
+def test_content_hash_ignores_key_order():
+    assert content_hash({"a": 1, "b": [1, 2]}) == content_hash({"b": [1, 2], "a": 1})
+    assert content_hash({"a": 1}) != content_hash({"a": 2})
+
+
+def test_put_and_get(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    cache.put("k", {"status": "successful"}, ttl=60, metadata={"s3_key": "x"})
+    entry = cache.get("k")
+    assert entry["ansible_return"] == {"status": "successful"}
+    assert entry["metadata"] == {"s3_key": "x"}
+    assert entry["expires"] > time.time()
+    assert cache.get("missing") is None
+
+
+def test_expired_entry_is_a_miss_and_dropped(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    cache.put("k", {"status": "successful"}, ttl=-1)
+    assert cache.get("k") is None
+    assert not os.path.exists(tmp_path / "k.json")
+
+
+def test_unreadable_entry_is_a_miss(tmp_path):
+    (tmp_path / "k.json").write_text("{not json")
+    assert ResultCache(str(tmp_path)).get("k") is None
+    assert not os.path.exists(tmp_path / "k.json")
+
+
+def test_prune_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(str(tmp_path), max_entries=3)
+    now = time.time()
+    for age, key in ((30, "old"), (20, "used"), (10, "new")):
+        cache.put(key, {}, ttl=None)
+        os.utime(tmp_path / f"{key}.json", (now - age, now - age))
+    # a read refreshes the entry
+    assert cache.get("used") is not None
+    cache.max_entries = 2
+    assert cache.prune() == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["new.json", "used.json"]
+
+
+def test_prune_by_bytes(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=1)
+    cache.put("k", {"status": "successful"}, ttl=None)
+    assert cache.get("k") is None
+
+
+def test_invalidate_all(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    cache.put("a", {}, ttl=None)
+    cache.put("b", {}, ttl=None)
+    assert cache.invalidate() == 2
+    assert cache.get("a") is None
+    assert ResultCache(str(tmp_path / "missing")).invalidate() == 0
+
+
+def test_git_head(tmp_path):
+    assert git_head(str(tmp_path)) is None
+    git = tmp_path / ".git"
+    (git / "refs" / "heads").mkdir(parents=True)
+    (git / "HEAD").write_text("ref: refs/heads/main\n")
+    (git / "packed-refs").write_text("# pack-refs\nabc123 refs/heads/main\n")
+    assert git_head(str(tmp_path)) == "abc123"
+    (git / "refs" / "heads" / "main").write_text("def456\n")
+    assert git_head(str(tmp_path)) == "def456"
+    (git / "HEAD").write_text("0123abcd\n")
+    assert git_head(str(tmp_path)) == "0123abcd"
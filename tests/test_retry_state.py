@@ -0,0 +1,105 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+from __future__ import annotations
+
+from airflow_ansible_provider.utils.retry_state import (
+    final_host_status,
+    merge_by_host,
+    merge_stats,
+    rerun_hosts,
+    succeeded_hosts,
+    try_host_status,
+)
+
+
+def ansible_return(status="successful", processed=(), failures=(), dark=(), **extra) -> dict:
+    return {
+        "status": status,
+        "canceled": status == "canceled",
+        "timed_out": status == "timeout",
+        "stats": {
+            "processed": {host: 1 for host in processed},
+            "failures": {host: 1 for host in failures},
+            "dark": {host: 1 for host in dark},
+            "ok": {host: 1 for host in processed},
+        },
+        **extra,
+    }
+
+
+def test_merge_by_host_keeps_the_hosts_not_rerun():
+    previous = {"web1": "ok", "web2": "failed", "web3": "unreachable"}
+    current = {"web2": "ok"}
+    assert merge_by_host(previous, current, {"web2", "web3"}) == {"web1": "ok", "web2": "ok"}
+    assert merge_by_host(None, current, set()) == current
+
+
+def test_merge_stats_replaces_the_rerun_hosts():
+    previous = {"ok": {"web1": 3, "web2": 1}, "failures": {"web2": 1}}
+    current = {"ok": {"web2": 4}, "changed": {"web2": 1}}
+    assert merge_stats(previous, current, {"web2"}) == {
+        "ok": {"web1": 3, "web2": 4},
+        "failures": {},
+        "changed": {"web2": 1},
+    }
+    assert merge_stats(None, current, set()) == current
+
+
+def test_canceled_run_has_no_succeeded_host():
+    # web1 passed its first tasks before the breaker canceled the run
+    result = ansible_return("canceled", processed=["web1"])
+    assert final_host_status(result) == {}
+    hosts = try_host_status(result, {"web1": "ok", "web2": "failed"})
+    assert hosts == {"web1": "incomplete", "web2": "failed"}
+    assert succeeded_hosts({"hosts": hosts}) == set()
+
+
+def test_timed_out_or_cut_batch_has_no_succeeded_host():
+    assert final_host_status(ansible_return("timeout", processed=["web1"])) == {}
+    batch = ansible_return(
+        "failed",
+        processed=["web1", "web2"],
+        failures=["web2"],
+        playbooks=[{"status": "failed"}],
+        skipped_playbooks=["deploy.yml"],
+    )
+    assert final_host_status(batch) == {}
+
+
+def test_ignored_errors_succeed():
+    # ansible counts ignored errors in "ignored", not in "failures"
+    result = ansible_return("successful", processed=["web1", "web2"])
+    result["stats"]["ignored"] = {"web1": 1}
+    hosts = try_host_status(result, {"web1": "ok", "web2": "ok"})
+    assert hosts == {"web1": "ok", "web2": "ok"}
+    assert not [h for h, status in hosts.items() if status not in ("ok", "skipped")]
+
+
+def test_failed_run_keeps_its_ok_hosts():
+    result = ansible_return("failed", processed=["web1", "web2", "web3"], failures=["web2"], dark=["web3"])
+    assert try_host_status(result, {}) == {"web1": "ok", "web2": "failed", "web3": "unreachable"}
+
+
+def test_retry_reruns_every_host_that_did_not_succeed():
+    first = {"hosts": try_host_status(ansible_return("canceled"), {"web1": "ok", "web2": "failed"})}
+    assert rerun_hosts(first) == {"web1", "web2"}
+    second = try_host_status(ansible_return("successful", processed=["web1", "web2"]), {})
+    hosts = merge_by_host(first["hosts"], second, rerun_hosts(first))
+    assert succeeded_hosts({"hosts": hosts}) == {"web1", "web2"}
+    assert rerun_hosts({"hosts": {"web1": "ok"}}) == set()
+    assert rerun_hosts(None) == set()
@@ -0,0 +1,134 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+from airflow_ansible_provider.utils import run_index
+from airflow_ansible_provider.utils.run_index import RunIndex
+
+DAY = 86400
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(run_index, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def result(ident: str, host: str, event: str = "runner_on_ok", task: str = "ping") -> dict:
+    return {
+        "runner_ident": ident,
+        "event": event,
+        "event_data": {"host": host, "task": task, "duration": 0.5, "res": {"msg": event}},
+    }
+
+
+def record(index: RunIndex, ident: str, dag_id: str, finished: float):
+    index.record_run(
+        {"ident": ident, "dag_id": dag_id, "status": "successful", "finished": finished}
+    )
+
+
+def test_results_are_inserted_in_batches(tmp_path, clock):
+    index = RunIndex(str(tmp_path / "index.sqlite"), batch_size=2)
+    index.add(result("r1", "web1"))
+    assert index.host_history("web1") == []
+    # skipped task start, not a result
+    index.add({"runner_ident": "r1", "event": "playbook_on_task_start", "event_data": {}})
+    index.add(result("r1", "web2"))
+    assert len(index.host_history("web1")) == 1
+    index.add(result("r1", "web1", task="copy"))
+    index.flush()
+    assert [row["task"] for row in index.host_history("web1")] == ["copy", "ping"]
+
+
+def test_host_history_and_last_failure_by_dag(tmp_path, clock):
+    index = RunIndex(str(tmp_path / "index.sqlite"))
+    for ident, dag_id, event in (
+        ("r1", "deploy", "runner_on_failed"),
+        ("r2", "patch", "runner_on_unreachable"),
+        ("r3", "deploy", "runner_on_ok"),
+    ):
+        clock[0] += 60
+        index.add(result(ident, "web1", event))
+        index.flush()
+        record(index, ident, dag_id, clock[0])
+    history = index.host_history("web1", limit=2)
+    assert [(row["ident"], row["dag_id"]) for row in history] == [
+        ("r3", "deploy"),
+        ("r2", "patch"),
+    ]
+    last = history[-1]
+    older = index.host_history("web1", before=(last["at"], last["id"]))
+    assert [row["ident"] for row in older] == ["r1"]
+    assert index.last_failure("web1")["ident"] == "r2"
+    assert index.last_failure("web1", dag_ids={"deploy"})["status"] == "failed"
+    assert index.last_failure("web1", dag_ids=set()) is None
+    assert [row["ident"] for row in index.host_history("web1", dag_ids={"deploy"})] == ["r3", "r1"]
+
+
+def test_runs_pagination_and_filters(tmp_path, clock):
+    index = RunIndex(str(tmp_path / "index.sqlite"))
+    for i, dag_id in enumerate(("deploy", "patch", "deploy")):
+        record(index, f"r{i}", dag_id, clock[0] + i)
+    first = index.runs(limit=2)
+    assert [run["ident"] for run in first] == ["r2", "r1"]
+    before = (first[-1]["finished"], first[-1]["ident"])
+    assert [run["ident"] for run in index.runs(limit=2, before=before)] == ["r0"]
+    assert [run["ident"] for run in index.runs(dag_id="deploy")] == ["r2", "r0"]
+    assert [run["ident"] for run in index.runs(dag_ids={"patch"})] == ["r1"]
+    assert index.run("r1")["dag_id"] == "patch"
+    assert index.run("missing") is None
+
+
+def test_maintain_compacts_old_results_into_host_daily(tmp_path, clock):
+    index = RunIndex(str(tmp_path / "index.sqlite"))
+    started = clock[0]
+    index.add(result("old", "web1", "runner_on_failed"))
+    index.add(result("old", "web1", "runner_on_failed", task="copy"))
+    index.add(result("old", "web2"))
+    index.flush()
+    record(index, "old", "deploy", started)
+    clock[0] += 40 * DAY
+    index.add(result("new", "web2"))
+    index.flush()
+    record(index, "new", "deploy", clock[0])
+
+    assert index.maintain(detail_days=30, retention_days=365) == {
+        "compacted_results": 3,
+        "expired_runs": 0,
+    }
+    assert [row["ident"] for row in index.host_history("web1")] == []
+    assert [row["ident"] for row in index.host_history("web2")] == ["new"]
+    # the compacted day still answers the last failure
+    last = index.last_failure("web1")
+    assert last["status"] == "failed" and "day" in last
+    # at most once per interval, unless forced
+    assert index.maintain() is None
+
+    clock[0] += 400 * DAY
+    assert index.maintain(retention_days=365, force=True) == {
+        "compacted_results": 1,
+        "expired_runs": 2,
+    }
+    assert index.runs() == []
+    assert index.last_failure("web1") is None
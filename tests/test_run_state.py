@@ -0,0 +1,80 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+from __future__ import annotations
+
+import os
+import socket
+import sys
+
+from airflow_ansible_provider.utils.run_state import RunState, combine_stats
+from airflow_ansible_provider.utils.ssh_control import close_control_sockets
+
+
+def test_combine_stats_adds_up_hosts_across_playbooks():
+    first = {
+        "ok": {"web1": 3, "web2": 2},
+        "failures": {"web2": 1},
+        "processed": {"web1": 1, "web2": 1},
+    }
+    second = {"ok": {"web1": 4}, "changed": {"web1": 1}, "processed": {"web1": 1}}
+    assert combine_stats([first, None, second]) == {
+        "ok": {"web1": 7, "web2": 2},
+        "failures": {"web2": 1},
+        "processed": {"web1": 2, "web2": 1},
+        "changed": {"web1": 1},
+    }
+    assert combine_stats([None, {}]) is None
+
+
+def test_set_stats_keeps_the_stats_keys():
+    run = RunState("site.yml")
+    run.set_stats(
+        {
+            "event": "playbook_on_stats",
+            "event_data": {"ok": {"web1": 1}, "dark": {}, "playbook": "site.yml", "uuid": "x"},
+        }
+    )
+    assert run.stats == {"ok": {"web1": 1}, "dark": {}}
+
+
+def test_close_control_sockets(tmp_path, monkeypatch):
+    # a fake ssh records the masters it is asked to stop
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    calls = tmp_path / "calls"
+    ssh = bin_dir / "ssh"
+    ssh.write_text(
+        f"#!{sys.executable}\n"
+        "import sys\n"
+        f"open({str(calls)!r}, 'a').write(' '.join(sys.argv[1:]) + '\\n')\n"
+    )
+    os.chmod(ssh, 0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+    control_dir = tmp_path / "cp"
+    control_dir.mkdir()
+    master = socket.socket(socket.AF_UNIX)
+    master.bind(str(control_dir / "abc123"))
+    (control_dir / "not-a-socket").write_text("")
+    try:
+        assert close_control_sockets(str(control_dir)) == 1
+    finally:
+        master.close()
+    assert calls.read_text().split("\n")[0] == f"-S {control_dir / 'abc123'} -O exit control-master"
+    assert not control_dir.exists()
+    assert close_control_sockets(str(control_dir)) == 0
@@ -0,0 +1,133 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+from __future__ import annotations
+
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("ansible_runner")
+
+from airflow_ansible_provider.utils.streaming import run_streamed  # noqa: E402
+
+# stands in for ``ansible-runner worker``: reads the job, replies with a canned stream
+WORKER = r"""
+import json, os, sys, tempfile
+from ansible_runner.utils.streaming import stream_dir
+
+job = sys.stdin.buffer.read()
+assert b'"eof": true' in job or b'"eof":true' in job, job[-200:]
+out = sys.stdout.buffer
+
+
+def send(data):
+    out.write(json.dumps(data).encode() + b"\n")
+    out.flush()
+
+
+send({"status": "starting", "command": ["ansible-playbook", "site.yml"], "env": {}, "cwd": "/"})
+send({"status": "running"})
+for counter, (event, host) in enumerate(
+    [
+        ("playbook_on_start", None),
+        ("playbook_on_task_start", None),
+        ("runner_on_ok", "web1"),
+        ("runner_on_failed", "web2"),
+        ("playbook_on_stats", None),
+    ],
+    start=1,
+):
+    data = {"event": event, "uuid": f"uuid-{counter}", "counter": counter, "stdout": ""}
+    if host:
+        data["event_data"] = {"host": host, "task": "ping"}
+    send(data)
+send({"status": "failed", "rc": 2})
+with tempfile.TemporaryDirectory() as artifacts:
+    for name, value in (("rc", "2"), ("status", "failed")):
+        with open(os.path.join(artifacts, name), "w") as f:
+            f.write(value)
+    stream_dir(artifacts, out)
+send({"eof": True})
+"""
+
+HANG = r"""
+import sys, time
+sys.stdin.buffer.read()
+time.sleep(60)
+"""
+
+
+def runner_kwargs(tmp_path) -> dict:
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "site.yml").write_text("- hosts: all\n  tasks: []\n")
+    inventory = tmp_path / "hosts"
+    inventory.write_text("web1\nweb2\n")
+    return {
+        "project_dir": str(project),
+        "artifact_dir": str(tmp_path / "artifacts"),
+        "playbook": str(project / "site.yml"),
+        "inventory": str(inventory),
+        "quiet": True,
+    }
+
+
+def test_events_status_and_rc_come_back(tmp_path):
+    events = []
+    result = run_streamed(
+        [sys.executable, "-c", WORKER],
+        runner_kwargs(tmp_path),
+        event_handler=lambda data: events.append(data) or True,
+        cancel_callback=lambda: False,
+        work_dir=str(tmp_path),
+        poll_interval=0.05,
+    )
+    assert [event["event"] for event in events] == [
+        "playbook_on_start",
+        "playbook_on_task_start",
+        "runner_on_ok",
+        "runner_on_failed",
+        "playbook_on_stats",
+    ]
+    assert result.status == "failed"
+    assert result.rc == 2
+    assert not result.canceled and not result.errored
+    ident_dir = result.config.artifact_dir
+    assert os.path.basename(ident_dir) == result.config.ident
+    assert result.config.playbook == "site.yml"
+    # the artifacts and the inventory are in the local artifact dir
+    with open(os.path.join(ident_dir, "rc"), "r", encoding="utf-8") as f:
+        assert f.read() == "2"
+    with open(result.config.inventory, "r", encoding="utf-8") as f:
+        assert f.read() == "web1\nweb2\n"
+    # the temporary private data dir is gone
+    assert not [name for name in os.listdir(tmp_path) if name.startswith("transmit-")]
+
+
+def test_cancel_stops_the_executor(tmp_path):
+    result = run_streamed(
+        [sys.executable, "-c", HANG],
+        runner_kwargs(tmp_path),
+        event_handler=lambda data: True,
+        cancel_callback=lambda: True,
+        work_dir=str(tmp_path),
+        poll_interval=0.05,
+    )
+    assert result.canceled
+    assert result.status == "canceled"
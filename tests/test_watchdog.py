@@ -0,0 +1,104 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+from airflow_ansible_provider.utils import watchdog
+from airflow_ansible_provider.utils.watchdog import HostWatchdog
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(watchdog, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def event(event: str, host: str, task: str = "install", **event_data) -> dict:
+    return {"event": event, "event_data": dict(event_data, host=host, task=task)}
+
+
+def test_stalled_host_reaches_on_stall_after_kill_grace(clock):
+    calls = []
+
+    def on_stall(host, addresses):
+        calls.append((host, addresses))
+        return "connection_killed"
+
+    dog = HostWatchdog(stall_timeout=60, kill_grace=30, on_stall=on_stall)
+    dog.add(event("runner_on_start", "web1", remote_addr="10.0.0.1"))
+    dog.add(event("runner_on_start", "web2"))
+    clock[0] += 50
+    dog.add(event("runner_item_on_ok", "web2"))
+    clock[0] += 20
+    # web1 silent for 70s: stalled, web2 only for 20s
+    assert dog.check() == []
+    assert dog.report()["hosts"] == {
+        "web1": {"task": "install", "silent_seconds": 70.0, "action": "stalled", "result": None}
+    }
+    clock[0] += 10
+    assert dog.check() == []
+    clock[0] += 10
+    # 90s = stall_timeout + kill_grace
+    assert dog.check() == ["web1"]
+    assert calls == [("web1", {"web1", "10.0.0.1"})]
+    assert dog.report()["hosts"]["web1"]["action"] == "connection_killed"
+    # on_stall is called once per stall
+    clock[0] += 60
+    assert dog.check() == []
+    dog.add(event("runner_on_unreachable", "web1"))
+    assert dog.report()["hosts"]["web1"]["result"] == "unreachable"
+
+
+def test_task_timeout_and_recovery(clock):
+    dog = HostWatchdog(stall_timeout=10, kill_grace=100)
+    for host in ("web1", "web2"):
+        dog.add(event("runner_on_start", host))
+    clock[0] += 15
+    dog.check()
+    timeout = {"msg": "The ansible task exceeded the expected time frame"}
+    dog.add(event("runner_on_failed", "web1", res=timeout))
+    dog.add(event("runner_on_ok", "web2"))
+    hosts = dog.report()["hosts"]
+    assert hosts["web1"]["action"] == "task_timeout" and hosts["web1"]["result"] == "failed"
+    assert hosts["web2"]["action"] == "recovered" and hosts["web2"]["result"] == "ok"
+    assert dog.running == {}
+
+
+def test_failing_on_stall_is_reported(clock):
+    def on_stall(host, addresses):
+        raise OSError("no such process")
+
+    dog = HostWatchdog(stall_timeout=1, kill_grace=0, on_stall=on_stall)
+    dog.add(event("runner_on_start", "web1"))
+    clock[0] += 2
+    dog.check()
+    assert dog.check() == ["web1"]
+    assert dog.report()["hosts"]["web1"]["action"] == "kill_failed"
+
+
+def test_stats_end_the_watch(clock):
+    dog = HostWatchdog(stall_timeout=1)
+    dog.add(event("runner_on_start", "web1"))
+    dog.add({"event": "playbook_on_stats", "event_data": {}})
+    clock[0] += 10
+    assert dog.check() == []
+    assert dog.report()["hosts"] == {}